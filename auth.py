@@ -0,0 +1,161 @@
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from authindex import ALWAYS, NEVER
+from logstore import LogStore
+from metrics import Metrics
+
+# One decision about one code. `timestamp` is seconds since the epoch (the
+# frame's capture time, so replays log when things happened on camera).
+# `alert` is set by a detector (see detector.py) when the scan is part of a
+# suspicious pattern, and is empty otherwise.
+ScanEvent = namedtuple("ScanEvent", "code outcome timestamp camera alert", defaults=("",))
+
+AUTHORIZED = "authorized"
+UNAUTHORIZED = "unauthorized"
+EXPIRED = "expired"              # listed, but its valid-until has passed
+NOT_YET_VALID = "not_yet_valid"  # listed, but its valid-from is still ahead
+LOCKED_OUT = "locked_out"        # refused unchecked: the camera is locked out
+AWAITING = "awaiting"            # valid, but its rule group is not complete yet (rules.py)
+ADDED = "added"
+DUPLICATE = "duplicate"
+SCANNED = "scanned"
+
+
+def format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def log_line(event):
+    """The line written to the authorized / unauthorized logs (see logstore.py)."""
+    return f"{format_time(event.timestamp)}  |  {event.code}"
+
+
+class Authenticator:
+    """Cooldown, lookup and logging for scanned codes, without any GUI.
+
+    `QRAuthApp` and `main.py --replay` both feed decoded payloads through
+    `process_frame()`, so a recording is judged and logged exactly like a
+    live camera. All codes decoded from one frame are looked up in one pass
+    and logged with one write per log file. `index` is anything supporting
+    `windows()` and `add_many()` (normally an `authindex.AuthIndex`).
+
+    Decisions are logged to `logs` (a logstore.LogStore, sharded by camera)
+    or, without one, to the two log paths; None skips writing. Validity
+    windows are judged at the frame's timestamp; codes registered while
+    `valid_for` is set (seconds) expire that long after they were scanned.
+    An optional `detector` (detector.Detector) tags authorization events
+    with alerts and can lock the camera out, and optional `rules`
+    (rules.CodeRules) only grant grouped codes together.
+    """
+
+    def __init__(self, index, authorized_log=None, unauthorized_log=None, cooldown=2.0,
+                 camera="0", metrics=None, valid_for=None, detector=None, logs=None, rules=None):
+        self.index = index
+        self.rules = rules
+        if logs is None and (authorized_log or unauthorized_log):
+            logs = LogStore(sharded=False, legacy={AUTHORIZED: authorized_log, UNAUTHORIZED: unauthorized_log})
+        self.logs = logs
+        self.detector = detector
+        self.valid_for = valid_for
+        self.cooldown = cooldown
+        self.camera = str(camera)
+        self.metrics = metrics or Metrics()
+        self._recent = {}
+
+    def accept(self, data, timestamp):
+        """False while `data` was already accepted less than `cooldown` seconds ago."""
+        last = self._recent.get(data)
+        if last is not None and (timestamp - last) < self.cooldown:
+            return False
+        if len(self._recent) >= 256:
+            self._recent = {c: t for c, t in self._recent.items() if timestamp - t < self.cooldown}
+        self._recent[data] = timestamp
+        return True
+
+    def process(self, data, mode, timestamp=None):
+        """Run one decoded payload through the `mode` pipeline; None if suppressed."""
+        data = data.strip()
+        for event in self.process_frame([data], mode, timestamp):
+            if event.code == data:
+                return event
+        return None
+
+    def process_frame(self, codes, mode, timestamp=None):
+        """Run all payloads decoded from one frame through the `mode` pipeline.
+
+        Returns their events in frame order, without suppressed repeats; a
+        completed rule group adds events for members seen in earlier frames.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        fresh = []
+        for data in codes:
+            data = data.strip()
+            if data and data not in fresh and self.accept(data, timestamp):
+                fresh.append(data)
+        if not fresh:
+            return []
+        if mode == 'add':
+            return self.register_many(fresh, timestamp)
+        if mode == 'auth':
+            return self.authorize_many(fresh, timestamp)
+        return [ScanEvent(data, SCANNED, timestamp, self.camera) for data in fresh]
+
+    def authorize(self, data, timestamp):
+        return self.authorize_many([data], timestamp)[0]
+
+    def authorize_many(self, codes, timestamp):
+        detector = self.detector
+        if detector is not None and detector.locked(self.camera, timestamp):
+            outcomes = [LOCKED_OUT] * len(codes)
+        else:
+            with self.metrics.stage("lookup"):
+                windows = self.index.windows(codes)
+            outcomes = [_judge(window, timestamp) for window in windows]
+            if self.rules is not None:
+                # Members from earlier frames are looked up again before the grant.
+                codes, outcomes = self.rules.apply(
+                    codes, outcomes, timestamp,
+                    lambda earlier: [_judge(w, timestamp) == AUTHORIZED for w in self.index.windows(earlier)])
+        events = []
+        for code, outcome in zip(codes, outcomes):
+            event = ScanEvent(code, outcome, timestamp, self.camera)
+            if detector is not None and outcome not in (LOCKED_OUT, AWAITING):
+                alert = detector.observe(event)
+                if alert:
+                    event = event._replace(alert=alert)
+            events.append(event)
+        if self.logs is not None:
+            granted = [log_line(e) for e in events if e.outcome == AUTHORIZED]
+            denied = [log_line(e) for e in events if e.outcome not in (AUTHORIZED, AWAITING)]
+            with self.metrics.stage("log"):
+                for kind, lines in ((AUTHORIZED, granted), (UNAUTHORIZED, denied)):
+                    if lines:
+                        self.logs.write_lines(lines, kind, self.camera)
+        return events
+
+    def register(self, data, timestamp):
+        return self.register_many([data], timestamp)[0]
+
+    def register_many(self, codes, timestamp):
+        with self.metrics.stage("lookup"):
+            listed = [window is not None for window in self.index.windows(codes)]
+        window = (int(timestamp), int(timestamp + self.valid_for)) if self.valid_for else ALWAYS
+        new = [code for code, found in zip(codes, listed) if not found]
+        if new:
+            with self.metrics.stage("log"):
+                self.index.add_many([(code, window) for code in new])
+        return [ScanEvent(code, DUPLICATE if found else ADDED, timestamp, self.camera)
+                for code, found in zip(codes, listed)]
+
+
+def _judge(window, timestamp):
+    if window is None or window == NEVER:
+        return UNAUTHORIZED
+    if timestamp < window[0]:
+        return NOT_YET_VALID
+    if timestamp >= window[1]:
+        return EXPIRED
+    return AUTHORIZED
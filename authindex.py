@@ -0,0 +1,382 @@
+import hashlib
+import heapq
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+try:
+    import fcntl
+except ImportError:     # Windows: threads are still serialized, processes are not
+    fcntl = None
+
+# Sidecar layout: header, then `count` sorted fixed-width digests, then one
+# WINDOW record (followed by the UTF-8 code) per code with a validity window.
+MAGIC = b"QRAIDX02"
+HEADER = struct.Struct("<8sQqqQ")   # magic, count, source size, source mtime_ns, window bytes
+WINDOW = struct.Struct("<ddH")      # valid_from, valid_until, code length
+DIGEST_SIZE = 16
+ALWAYS = (0.0, float("inf"))
+NEVER = (float("inf"), 0.0)
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def digest(code):
+    return hashlib.blake2b(code.encode("utf-8"), digest_size=DIGEST_SIZE).digest()
+
+
+# ── List entries ───────────────────────────────────────────────────────────
+# A line of the list is `code`, or `code<TAB>valid_from<TAB>valid_until` with
+# local times like "2024-05-01 09:00:00" (or just a date). Either time may be
+# empty for no bound; a bare valid-until date lasts to the end of that day.
+
+def parse_time(text, end_of_day=False):
+    text = text.strip()
+    if not text:
+        return None
+    when = datetime.fromisoformat(text)
+    if end_of_day and len(text) <= 10:
+        when += timedelta(days=1)
+    return when.timestamp()
+
+
+def format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime(TIME_FORMAT)
+
+
+def parse_entry(line, strict=False):
+    """`(code, (valid_from, valid_until))` for one list line, or None if blank.
+
+    A time that cannot be parsed makes the code never valid rather than
+    valid forever (or raises ValueError when `strict`).
+    """
+    fields = line.rstrip("\r\n").split("\t")
+    code = fields[0].strip()
+    if not code:
+        return None
+    if len(fields) == 1:
+        return code, ALWAYS
+    try:
+        valid_from = parse_time(fields[1])
+        valid_until = parse_time(fields[2], end_of_day=True) if len(fields) > 2 else None
+    except ValueError:
+        if strict:
+            raise
+        return code, NEVER
+    return code, (valid_from or 0.0, float("inf") if valid_until is None else valid_until)
+
+
+def format_entry(code, window=ALWAYS):
+    if window == ALWAYS:
+        return code
+    valid_from, valid_until = window
+    return "\t".join((code, format_time(valid_from) if valid_from else "",
+                      format_time(valid_until) if valid_until != float("inf") else ""))
+
+
+def read_entries(source):
+    """Every entry of the list file, in file order."""
+    try:
+        with open(source, 'r', errors='replace') as f:
+            return [e for e in map(parse_entry, f) if e is not None]
+    except FileNotFoundError:
+        return []
+
+
+_list_locks = {}
+_list_locks_guard = threading.Lock()
+
+
+@contextmanager
+def list_lock(source):
+    """Hold the exclusive write lock of the list `source`.
+
+    Threads share one threading.Lock per list and processes take an flock
+    on `<source>.lock` (the list itself is replaced by rewrites, so it
+    cannot carry the lock). Every append and rewrite of the list happens
+    under it, so none of them can be lost to another's read-and-replace.
+    """
+    path = os.path.abspath(source)
+    with _list_locks_guard:
+        lock = _list_locks.setdefault(path, threading.Lock())
+    with lock:
+        with open(path + ".lock", 'a') as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+
+
+def _source_stat(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return (0, 0)
+    return (st.st_size, st.st_mtime_ns)
+
+
+def build_index(source, index_path):
+    """Compile the one-entry-per-line `source` into a sorted digest file."""
+    size, mtime_ns = _source_stat(source)
+    digests = set()
+    windows = {}
+    if size:
+        with open(source, 'r', errors='replace') as f:
+            for line in f:
+                entry = parse_entry(line)
+                if entry:
+                    code, window = entry
+                    digests.add(digest(code))
+                    if window != ALWAYS:
+                        windows[code] = window
+                    else:
+                        windows.pop(code, None)
+    records = []
+    for code, (valid_from, valid_until) in windows.items():
+        raw = code.encode("utf-8")
+        records.append(WINDOW.pack(valid_from, valid_until, len(raw)) + raw)
+    records = b"".join(records)
+    blob = (HEADER.pack(MAGIC, len(digests), size, mtime_ns, len(records))
+            + b"".join(sorted(digests)) + records)
+    tmp = f"{index_path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(blob)
+    try:
+        os.replace(tmp, index_path)
+    except OSError:
+        # Another process still maps the old index (Windows will not replace
+        # an open file); serve this build from memory until the next rebuild.
+        os.remove(tmp)
+    return blob
+
+
+class AuthIndex:
+    """Membership test for the authorized-code list backed by a mmap'd sidecar.
+
+    The sidecar (`<source>.idx` by default) holds sorted 16-byte blake2b
+    digests of every code, so opening it costs one mmap instead of reading
+    and hashing the whole text list, and every process on the host shares
+    the same page-cached copy. Lookups are a binary search over the map.
+
+    The source's size and mtime are recorded in the header. Whenever they
+    no longer match the file on disk (an edit, delete or import from any
+    process) the index is rebuilt before the next lookup. Codes appended
+    through `add()` are kept in a small overlay instead, so registering a
+    code does not force a rebuild of a large list.
+
+    Codes listed with a validity window (see `parse_entry`) are also kept
+    in a dict for an O(1) `window()` check after the lookup, and in a
+    min-heap by expiry so `purge_expired()` can drop every code that has
+    run out in one rewrite of the list instead of one per expiry.
+
+    With a `journal` (see sync.ChangeJournal) every add and remove made
+    through the index is also recorded there for other gates to pull.
+    Writers hold `list_lock()`, so several indexes on one list (the app's
+    and the sync thread's, or other processes') never drop each other's
+    changes.
+    """
+
+    def __init__(self, source, index_path=None, journal=None):
+        self.source = source
+        self.index_path = index_path or source + ".idx"
+        self.journal = journal
+        self.rebuilds = 0
+        self._file = None
+        self._map = None
+        self._count = 0
+        self._extra = set()
+        self._windows = {}
+        self._expiry = []
+        self._stat = None
+        self.open()
+
+    def open(self):
+        self.close()
+        stat = _source_stat(self.source)
+        data = self._map_existing(stat)
+        if data is None:
+            self._close_map()
+            data = build_index(self.source, self.index_path)
+            self.rebuilds += 1
+            mapped = self._map_existing(stat)
+            if mapped is not None:
+                data = mapped
+        self._count = HEADER.unpack_from(data)[1]
+        self._map = data
+        self._stat = stat
+        self._extra = set()
+        self._load_windows()
+
+    def _load_windows(self):
+        self._windows = {}
+        self._expiry = []
+        pos = HEADER.size + self._count * DIGEST_SIZE
+        end = len(self._map)
+        while pos < end:
+            valid_from, valid_until, n = WINDOW.unpack_from(self._map, pos)
+            pos += WINDOW.size
+            code = bytes(self._map[pos:pos + n]).decode("utf-8")
+            pos += n
+            self._set_window(code, (valid_from, valid_until))
+
+    def _set_window(self, code, window):
+        self._windows[code] = window
+        if window != NEVER and window[1] != float("inf"):
+            heapq.heappush(self._expiry, (window[1], code))
+
+    def _map_existing(self, stat):
+        try:
+            f = open(self.index_path, 'rb')
+        except FileNotFoundError:
+            return None
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            f.close()
+            return None
+        magic, count, size, mtime_ns, extra = HEADER.unpack_from(mm) if len(mm) >= HEADER.size else (None,) * 5
+        if (magic != MAGIC or (size, mtime_ns) != stat
+                or len(mm) != HEADER.size + count * DIGEST_SIZE + extra):
+            mm.close()
+            f.close()
+            return None
+        self._file = f
+        return mm
+
+    def _close_map(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self):
+        self._close_map()
+        self._count = 0
+
+    def refresh(self):
+        """Rebuild if the source list changed on disk; returns True when it did."""
+        if _source_stat(self.source) == self._stat:
+            return False
+        self.open()
+        return True
+
+    def __len__(self):
+        return self._count + len(self._extra)
+
+    def __contains__(self, code):
+        self.refresh()
+        return self._contains(code)
+
+    def _contains(self, code):
+        key = digest(code)
+        if key in self._extra:
+            return True
+        mm = self._map
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            off = HEADER.size + mid * DIGEST_SIZE
+            probe = mm[off:off + DIGEST_SIZE]
+            if probe < key:
+                lo = mid + 1
+            elif probe > key:
+                hi = mid
+            else:
+                return True
+        return False
+
+    def window(self, code):
+        """`(valid_from, valid_until)` for a listed code, or None if it is not listed."""
+        if code not in self:
+            return None
+        return self._windows.get(code, ALWAYS)
+
+    def windows(self, codes):
+        """`window()` of each code, checking the source list for changes once."""
+        self.refresh()
+        return [self._windows.get(code, ALWAYS) if self._contains(code) else None for code in codes]
+
+    def valid(self, code, when=None):
+        """True if `code` is listed and `when` (default: now) is inside its window."""
+        window = self.window(code)
+        if window is None:
+            return False
+        when = time.time() if when is None else when
+        return window[0] <= when < window[1]
+
+    def add(self, code, window=ALWAYS):
+        """Append `code` to the source list without rebuilding the index."""
+        self.add_many([(code, window)])
+
+    def add_many(self, codes):
+        """Append the codes that are not already listed; returns those added.
+
+        Items are codes, `(code, window)` pairs or list lines with time
+        columns. A code that is already listed keeps its current window.
+        """
+        entries = [parse_entry(item, strict=True) if isinstance(item, str) else item for item in codes]
+        with list_lock(self.source):
+            # Under the lock the list cannot change, so this view stays current.
+            self.refresh()
+            added, seen = [], set()
+            for entry in entries:
+                if entry is None:
+                    continue
+                code, window = entry
+                if code and code not in seen and not self._contains(code):
+                    seen.add(code)
+                    added.append(format_entry(code, window))
+                    self._extra.add(digest(code))
+                    if window != ALWAYS:
+                        self._set_window(code, window)
+            if not added:
+                return added
+            with open(self.source, 'a') as f:
+                f.write("".join(line + "\n" for line in added))
+            self._stat = _source_stat(self.source)
+            if self.journal is not None:
+                self.journal.record('+', added)
+        return added
+
+    def next_expiry(self):
+        """Earliest valid-until among listed codes, or None."""
+        self.refresh()
+        return self._expiry[0][0] if self._expiry else None
+
+    def purge_expired(self, now=None):
+        """Remove every code whose window has ended, in a single rewrite."""
+        with list_lock(self.source):
+            self.refresh()
+            now = time.time() if now is None else now
+            expired = []
+            while self._expiry and self._expiry[0][0] <= now:
+                until, code = heapq.heappop(self._expiry)
+                if self._windows.get(code, ALWAYS)[1] == until:
+                    expired.append(code)
+            return self._remove(expired) if expired else []
+
+    def remove(self, codes):
+        """Rewrite the source list without `codes`; the index rebuilds on next use."""
+        with list_lock(self.source):
+            return self._remove(codes)
+
+    def _remove(self, codes):
+        drop = set(codes)
+        with open(self.source, 'r') as f:
+            lines = f.read().splitlines()
+        listed = [(line, (parse_entry(line) or ("",))[0]) for line in lines]
+        kept = [line for line, code in listed if code not in drop]
+        removed = sorted({code for _, code in listed} & drop)
+        if not removed:
+            return removed
+        tmp = f"{self.source}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            f.write('\n'.join(kept) + '\n' if kept else '')
+        os.replace(tmp, self.source)
+        if self.journal is not None:
+            self.journal.record('-', removed)
+        return removed
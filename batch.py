@@ -0,0 +1,189 @@
+"""Decode every image under a directory and check the codes against the authorized list.
+
+    python batch.py scans/ --out results.jsonl
+    python main.py batch scans/ --out results.csv --workers 8
+
+Files are decoded on a process pool (chunked, results streamed back as they
+finish) and written one line per file. Re-running with the same --out skips
+files that are already in it, so an interrupted run resumes where it stopped.
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import cv2
+
+from authindex import AuthIndex
+from config import load_config, CONFIG_FILE
+from decoders import make_decoder, resolve_backend
+from sources import IMAGE_EXTENSIONS
+
+CSV_FIELDS = ["file", "status", "codes", "types", "authorized", "error", "decode_ms"]
+
+_decoder = None
+
+
+def _init_worker(backend, symbols):
+    global _decoder
+    cv2.setNumThreads(1)
+    _decoder = make_decoder(backend, symbols)
+
+
+def _decode_file(path):
+    t0 = time.perf_counter()
+    frame = cv2.imread(path)
+    if frame is None:
+        return {"file": path, "codes": [], "types": [], "error": "unreadable image", "decode_ms": 0.0}
+    errors = _decoder.errors
+    results = _decoder.decode(frame)
+    codes, types = [], []
+    for r in results:
+        data = r.data.decode("utf-8", "replace").strip()
+        if data and data not in codes:
+            codes.append(data)
+            types.append(r.type)
+    error = _decoder.last_error if _decoder.errors > errors else None
+    return {"file": path, "codes": codes, "types": types, "error": error,
+            "decode_ms": round((time.perf_counter() - t0) * 1000.0, 2)}
+
+
+def find_images(root):
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                yield os.path.join(dirpath, name)
+
+
+def _is_csv(path):
+    return path.lower().endswith(".csv")
+
+
+def load_done(out):
+    """Files already recorded in `out` (from an earlier, possibly interrupted run)."""
+    done = set()
+    if not os.path.exists(out):
+        return done
+    with open(out, 'r', newline='') as f:
+        if _is_csv(out):
+            for row in csv.DictReader(f):
+                if row.get("file") and row.get("status"):
+                    done.add(row["file"])
+        else:
+            for line in f:
+                try:
+                    done.add(json.loads(line)["file"])
+                except (ValueError, KeyError):
+                    pass   # a line cut short by the interruption
+    return done
+
+
+def classify(record, index):
+    if record["error"] and not record["codes"]:
+        record["authorized"] = []
+        record["status"] = "error"
+        return record
+    record["authorized"] = [index.valid(code) for code in record["codes"]]
+    if not record["codes"]:
+        record["status"] = "no_code"
+    elif all(record["authorized"]):
+        record["status"] = "authorized"
+    elif any(record["authorized"]):
+        record["status"] = "partial"
+    else:
+        record["status"] = "unauthorized"
+    return record
+
+
+def _trim_partial_line(path):
+    """Drop a last line left half-written by an interrupted run."""
+    with open(path, 'rb+') as f:
+        end = f.seek(0, os.SEEK_END)
+        pos = end
+        while pos > 0:
+            step = min(65536, pos)
+            f.seek(pos - step)
+            chunk = f.read(step)
+            nl = chunk.rfind(b"\n")
+            if nl >= 0:
+                pos = pos - step + nl + 1
+                break
+            pos -= step
+        if pos != end:
+            f.truncate(pos)
+
+
+class _Writer:
+    def __init__(self, out):
+        resume = os.path.exists(out) and os.path.getsize(out) > 0
+        self.f = open(out, 'a', newline='')
+        self.csv = csv.DictWriter(self.f, fieldnames=CSV_FIELDS) if _is_csv(out) else None
+        if self.csv and not resume:
+            self.csv.writeheader()
+
+    def write(self, record):
+        if self.csv:
+            self.csv.writerow({
+                "file": record["file"], "status": record["status"],
+                "codes": "|".join(record["codes"]), "types": "|".join(record["types"]),
+                "authorized": "|".join("1" if a else "0" for a in record["authorized"]),
+                "error": record["error"] or "", "decode_ms": record["decode_ms"],
+            })
+        else:
+            self.f.write(json.dumps({k: record[k] for k in CSV_FIELDS}) + "\n")
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+
+def run(root, out, authorized="myDataFile.txt", workers=None, chunksize=16, backend="pyzbar",
+        symbols=None, progress_every=500):
+    if os.path.exists(out):
+        _trim_partial_line(out)
+    done = load_done(out)
+    paths = [p for p in find_images(root) if p not in done]
+    counts = {}
+    index = AuthIndex(authorized)
+    writer = _Writer(out)
+    t0 = time.perf_counter()
+    try:
+        with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(backend, symbols)) as pool:
+            for n, record in enumerate(pool.imap_unordered(_decode_file, paths, chunksize), 1):
+                writer.write(classify(record, index))
+                counts[record["status"]] = counts.get(record["status"], 0) + 1
+                if progress_every and n % progress_every == 0:
+                    rate = n / (time.perf_counter() - t0)
+                    print(f"{n}/{len(paths)} files, {rate:.1f} files/s", file=sys.stderr)
+    finally:
+        writer.close()
+        index.close()
+    elapsed = time.perf_counter() - t0
+    return {"files": len(paths), "skipped": len(done), "seconds": round(elapsed, 2),
+            "files_per_sec": round(len(paths) / elapsed, 1) if elapsed else 0.0, "status": counts}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch-decode an image directory and check codes")
+    parser.add_argument("root", help="Directory to scan recursively")
+    parser.add_argument("--out", default="batch_results.jsonl", help="Results file (.jsonl or .csv); resumed if present")
+    parser.add_argument("--authorized", default="myDataFile.txt", help="Authorized code list")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunksize", type=int, default=16, help="Files handed to a worker at a time")
+    parser.add_argument("--mode", default="auth", help="Which config symbology set to use")
+    parser.add_argument("--config", default=CONFIG_FILE)
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config)
+    summary = run(args.root, args.out, args.authorized, args.workers, args.chunksize,
+                  resolve_backend(config["decoder"]), config["decoder"]["symbols"].get(args.mode))
+    print(json.dumps(summary), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
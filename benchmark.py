@@ -0,0 +1,670 @@
+"""Headless decode-throughput benchmark.
+
+Builds a reproducible synthetic corpus with the app's own QR/barcode
+generators, runs every decode strategy over it and writes a JSON report:
+
+    python benchmark.py decode --frames 200 --seed 1 --out bench.json
+    python benchmark.py decode --baseline bench_v1.json
+
+`python benchmark.py index` compares authorized-code lookups through the
+mmap'd digest index with the plain-text list (startup, latency, RSS).
+
+`python benchmark.py capture` measures capture-to-decode latency on a
+simulated camera: a plain read of a 4-frame driver queue, a 1-frame queue,
+and the latest-frame grabber.
+
+`python benchmark.py detector` measures how many scan events per second the
+brute-force detector absorbs, and how far its sketch over-counts.
+
+`python benchmark.py escalate` runs a dim, partly damaged corpus through
+the plain decoder and through the parallel variant escalation (and the same
+variants on one worker), with the success rate and cost of every variant.
+
+`python benchmark.py styles` measures status-label updates per second with
+per-update stylesheets versus the shared stylesheet's property flips.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import string
+import sys
+import tempfile
+import time
+
+import barcode
+import cv2
+import numpy as np
+
+from decoders import BACKENDS, DEFAULT_VARIANTS, make_decoder, select_backend
+from metrics import rss_mb
+from utils import decode_codes_silent, make_qr_image, make_barcode_image
+
+FRAME_SIZE = (640, 480)
+PREVIEW_SIZE = (540, 360)
+
+
+# ── Corpus ────────────────────────────────────────────────────────────────
+def _random_payload(rng, kind):
+    if kind == 'qr':
+        body = ''.join(rng.choice(string.ascii_letters + string.digits) for _ in range(rng.randint(8, 40)))
+        return rng.choice(["https://example.com/", "WIFI:S:", "ID-", ""]) + body
+    if kind == 'ean13':
+        return ''.join(rng.choice(string.digits) for _ in range(12))
+    if kind == 'code39':
+        return ''.join(rng.choice(string.ascii_uppercase + string.digits) for _ in range(rng.randint(6, 12)))
+    return ''.join(rng.choice(string.ascii_letters + string.digits) for _ in range(rng.randint(6, 20)))
+
+
+def _render_code(rng, kind):
+    payload = _random_payload(rng, kind)
+    if kind == 'qr':
+        pil_img = make_qr_image(payload)
+    else:
+        pil_img = make_barcode_image(kind, payload)
+    img = cv2.cvtColor(np.array(pil_img), cv2.COLOR_RGB2BGR)
+    if kind != 'qr':
+        # python-barcode appends check digits that decoders report back.
+        payload = barcode.get_barcode_class(kind)(payload).get_fullcode()
+    return payload, img
+
+
+def _transform(rng, img, max_w, max_h, rotation):
+    h, w = img.shape[:2]
+    scale = min(max_w / w, max_h / h) * rng.uniform(0.55, 0.95)
+    img = cv2.resize(img, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+    if rotation:
+        angle = rng.uniform(-rotation, rotation)
+        h, w = img.shape[:2]
+        m = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+        cos, sin = abs(m[0, 0]), abs(m[0, 1])
+        nw, nh = int(h * sin + w * cos), int(h * cos + w * sin)
+        m[0, 2] += nw / 2 - w / 2
+        m[1, 2] += nh / 2 - h / 2
+        img = cv2.warpAffine(img, m, (nw, nh), borderValue=(255, 255, 255))
+        h, w = img.shape[:2]
+        if w > max_w or h > max_h:
+            fit = min(max_w / w, max_h / h)
+            img = cv2.resize(img, (max(1, int(w * fit)), max(1, int(h * fit))), interpolation=cv2.INTER_AREA)
+    return img
+
+
+def make_frame(rng, kinds, codes_per_frame, noise, blur, rotation):
+    fw, fh = FRAME_SIZE
+    shade = rng.randint(90, 200)
+    frame = np.full((fh, fw, 3), shade, np.uint8)
+    n = rng.randint(1, codes_per_frame)
+    cell_w = fw // n
+    payloads = []
+    for i in range(n):
+        kind = rng.choice(kinds)
+        payload, img = _render_code(rng, kind)
+        img = _transform(rng, img, cell_w - 10, fh - 10, rotation)
+        h, w = img.shape[:2]
+        x = i * cell_w + rng.randint(0, max(0, cell_w - w))
+        y = rng.randint(0, max(0, fh - h))
+        frame[y:y + h, x:x + w] = img
+        payloads.append(payload)
+    if blur:
+        k = rng.choice([k for k in (1, 3, 5) if k <= blur * 2 + 1])
+        if k > 1:
+            frame = cv2.GaussianBlur(frame, (k, k), 0)
+    if noise:
+        nrng = np.random.default_rng(rng.randint(0, 2 ** 31))
+        grain = nrng.normal(0, noise, frame.shape)
+        frame = np.clip(frame.astype(np.float32) + grain, 0, 255).astype(np.uint8)
+    return frame, payloads
+
+
+def build_corpus(frames=100, seed=0, kinds=('qr', 'code128', 'ean13', 'code39'),
+                 codes_per_frame=2, noise=8.0, blur=1, rotation=15):
+    rng = random.Random(seed)
+    return [make_frame(rng, list(kinds), codes_per_frame, noise, blur, rotation) for _ in range(frames)]
+
+
+def save_corpus(corpus, directory):
+    os.makedirs(directory, exist_ok=True)
+    manifest = []
+    for i, (frame, payloads) in enumerate(corpus):
+        name = f"frame_{i:05d}.png"
+        cv2.imwrite(os.path.join(directory, name), frame)
+        manifest.append({"file": name, "codes": payloads})
+    with open(os.path.join(directory, "manifest.json"), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+
+# ── Strategies ────────────────────────────────────────────────────────────
+def _decode_gray(frame):
+    return decode_codes_silent(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+
+
+def _decode_half(frame):
+    small = cv2.resize(frame, None, fx=0.5, fy=0.5, interpolation=cv2.INTER_AREA)
+    return decode_codes_silent(small)
+
+
+def _camera_loop_step(frame):
+    """One `_update_camera` tick minus the Qt widget: decode + preview conversion."""
+    from PySide6.QtGui import QImage
+    barcodes = decode_codes_silent(frame)
+    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    frame_rgb = cv2.resize(frame_rgb, PREVIEW_SIZE)
+    h, w, ch = frame_rgb.shape
+    QImage(frame_rgb.data, w, h, ch * w, QImage.Format_RGB888).copy()
+    return barcodes
+
+
+STRATEGIES = {
+    'default_bgr': decode_codes_silent,
+    'default_gray': _decode_gray,
+    'default_half': _decode_half,
+    'camera_loop': _camera_loop_step,
+}
+# One strategy per decoder backend; `decoders.select_backend` reads these.
+for _name in BACKENDS:
+    STRATEGIES[_name] = _name
+
+
+# ── Measurement ───────────────────────────────────────────────────────────
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, int(round(q / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[idx]
+
+
+def _payloads(results):
+    out = set()
+    for r in results:
+        data = r.data.decode("utf-8", "replace") if isinstance(r.data, bytes) else str(r.data)
+        out.add(data.strip())
+    return out
+
+
+def run_strategy(fn, corpus, warmup=3, repeat=1):
+    for frame, _ in corpus[:warmup]:
+        fn(frame)
+    latencies = []
+    expected = found = frames_hit = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for frame, payloads in corpus:
+            t0 = time.perf_counter()
+            results = fn(frame)
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+            got = _payloads(results)
+            hits = sum(1 for p in payloads if p in got)
+            expected += len(payloads)
+            found += hits
+            frames_hit += 1 if hits == len(payloads) else 0
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    n = len(latencies)
+    return {
+        "frames": n,
+        "fps": round(n / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(latencies) / n, 3) if n else 0.0,
+            "p50": round(percentile(latencies, 50), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "max": round(latencies[-1], 3) if n else 0.0,
+        },
+        "detection_rate": round(found / expected, 4) if expected else 0.0,
+        "frame_success_rate": round(frames_hit / n, 4) if n else 0.0,
+    }
+
+
+def _environment():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+    }
+
+
+def compare(report, baseline, tolerance=0.05):
+    """Return human-readable regressions of `report` against `baseline`."""
+    problems = []
+    for name, cur in report["strategies"].items():
+        old = baseline.get("strategies", {}).get(name)
+        if not old:
+            continue
+        if old["fps"] and cur["fps"] < old["fps"] * (1 - tolerance):
+            problems.append(f"{name}: fps {old['fps']} -> {cur['fps']}")
+        if cur["latency_ms"]["p99"] > old["latency_ms"]["p99"] * (1 + tolerance):
+            problems.append(f"{name}: p99 {old['latency_ms']['p99']}ms -> {cur['latency_ms']['p99']}ms")
+        if "detection_rate" in cur and cur["detection_rate"] < old["detection_rate"] - tolerance / 5:
+            problems.append(f"{name}: detection {old['detection_rate']} -> {cur['detection_rate']}")
+    return problems
+
+
+def bench_decode(args):
+    corpus = build_corpus(args.frames, args.seed, tuple(args.kinds.split(',')),
+                          args.codes_per_frame, args.noise, args.blur, args.rotation)
+    if args.save_corpus:
+        save_corpus(corpus, args.save_corpus)
+    names = args.strategies.split(',') if args.strategies else list(STRATEGIES)
+    report = {
+        "benchmark": "decode",
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "environment": _environment(),
+        "corpus": {
+            "frames": args.frames, "seed": args.seed, "kinds": args.kinds,
+            "codes_per_frame": args.codes_per_frame, "noise": args.noise,
+            "blur": args.blur, "rotation": args.rotation,
+        },
+        "strategies": {},
+    }
+    for name in names:
+        fn, decoder = STRATEGIES[name], None
+        if isinstance(fn, str):
+            try:
+                decoder = make_decoder(fn)
+            except Exception as e:
+                print(f"{name:<16} skipped: {e}")
+                continue
+            fn = decoder.decode
+        report["strategies"][name] = s = run_strategy(fn, corpus, repeat=args.repeat)
+        if decoder is not None:
+            s["decode_errors"] = decoder.errors
+        print(f"{name:<16} {s['fps']:>9.1f} fps  p50 {s['latency_ms']['p50']:>8.2f} ms  "
+              f"p99 {s['latency_ms']['p99']:>8.2f} ms  detect {s['detection_rate']:.1%}")
+    report["recommended_backend"] = select_backend(report)
+    print("recommended decoder backend:", report["recommended_backend"])
+    return report
+
+
+def _lookup_stats(contains, probes):
+    latencies = []
+    start = time.perf_counter()
+    for code in probes:
+        t0 = time.perf_counter()
+        contains(code)
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+    total = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "fps": round(len(probes) / total, 1) if total else 0.0,
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies), 4),
+            "p50": round(percentile(latencies, 50), 4),
+            "p99": round(percentile(latencies, 99), 4),
+            "max": round(latencies[-1], 4),
+        },
+    }
+
+
+def bench_index(args):
+    from authindex import AuthIndex
+
+    rng = random.Random(args.seed)
+    alphabet = string.ascii_letters + string.digits
+    directory = tempfile.mkdtemp(prefix="qrauth_index_")
+    source = os.path.join(directory, "codes.txt")
+    with open(source, 'w') as f:
+        for _ in range(args.codes):
+            f.write("".join(rng.choice(alphabet) for _ in range(rng.randint(12, 64))) + "\n")
+    with open(source, 'r') as f:
+        present = rng.sample(f.read().splitlines(), min(args.lookups // 2, args.codes))
+    probes = present + ["missing-" + str(i) for i in range(args.lookups - len(present))]
+    rng.shuffle(probes)
+
+    report = {
+        "benchmark": "index",
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "environment": _environment(),
+        "codes": args.codes,
+        "lookups": len(probes),
+        "strategies": {},
+    }
+
+    t0 = time.perf_counter()
+    AuthIndex(source).close()
+    build_ms = (time.perf_counter() - t0) * 1000.0
+
+    rss0 = rss_mb()
+    t0 = time.perf_counter()
+    index = AuthIndex(source)
+    open_ms = (time.perf_counter() - t0) * 1000.0
+    s = _lookup_stats(index.__contains__, probes)
+    s.update(startup_ms=round(open_ms, 3), build_ms=round(build_ms, 3), rss_mb=round(rss_mb() - rss0, 2))
+    report["strategies"]["mmap_index"] = s
+    index.close()
+
+    # What the app did before: re-read the list for every scan.
+    def text_scan(code):
+        with open(source, 'r') as f:
+            return code in f.read().splitlines()
+    scan_probes = probes[:args.scan_lookups]
+    s = _lookup_stats(text_scan, scan_probes)
+    s.update(startup_ms=0.0, rss_mb=0.0)
+    report["strategies"]["text_scan"] = s
+
+    rss0 = rss_mb()
+    t0 = time.perf_counter()
+    with open(source, 'r') as f:
+        codes = {line.strip() for line in f if line.strip()}
+    set_ms = (time.perf_counter() - t0) * 1000.0
+    s = _lookup_stats(codes.__contains__, probes)
+    s.update(startup_ms=round(set_ms, 3), rss_mb=round(rss_mb() - rss0, 2))
+    report["strategies"]["text_set"] = s
+    del codes
+
+    for name, s in report["strategies"].items():
+        print(f"{name:<12} startup {s['startup_ms']:>10.2f} ms  p50 {s['latency_ms']['p50']:>9.4f} ms  "
+              f"p99 {s['latency_ms']['p99']:>9.4f} ms  rss +{s['rss_mb']:.1f} MB")
+    print(f"index build: {build_ms:.1f} ms for {args.codes} codes ({os.path.getsize(source + '.idx') / 1e6:.1f} MB sidecar)")
+    for name in os.listdir(directory):
+        os.remove(os.path.join(directory, name))
+    os.rmdir(directory)
+    return report
+
+
+def bench_capture(args):
+    from sources import FakeCamera, LatestFrameGrabber
+
+    setups = {
+        "read_buffer4": lambda: FakeCamera(args.fps, 4),
+        "read_buffer1": lambda: FakeCamera(args.fps, 1),
+        "latest_frame": lambda: LatestFrameGrabber(FakeCamera(args.fps, 4)),
+    }
+    report = {
+        "benchmark": "capture",
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "environment": _environment(),
+        "camera_fps": args.fps,
+        "decode_ms": args.decode_ms,
+        "strategies": {},
+    }
+    for name, make in setups.items():
+        source = make()
+        latencies = []
+        start = time.perf_counter()
+        for i in range(args.warmup + args.frames):
+            ok, frame = source.read()
+            if not ok:
+                break
+            if i >= args.warmup:
+                latencies.append((time.monotonic() - source.captured_at) * 1000.0)
+            time.sleep(args.decode_ms / 1000.0)   # stands in for decoding the frame
+        total = time.perf_counter() - start
+        source.release()
+        latencies.sort()
+        report["strategies"][name] = s = {
+            "fps": round((args.warmup + args.frames) / total, 1),
+            "latency_ms": {
+                "mean": round(sum(latencies) / len(latencies), 2),
+                "p50": round(percentile(latencies, 50), 2),
+                "p99": round(percentile(latencies, 99), 2),
+                "max": round(latencies[-1], 2),
+            },
+        }
+        print(f"{name:<14} {s['fps']:>6.1f} fps  capture->decode p50 {s['latency_ms']['p50']:>7.1f} ms  "
+              f"p99 {s['latency_ms']['p99']:>7.1f} ms")
+    return report
+
+
+def degrade(rng, frame, dim, damage):
+    """Low light and wear: contrast squeezed towards black by `dim` (0..1),
+    sensor noise, and up to `damage` dark scratches and blotches."""
+    nrng = np.random.default_rng(rng.randint(0, 2 ** 31))
+    out = frame.astype(np.float32) * (1.0 - dim) + 10.0 * dim
+    out += nrng.normal(0, 3 + 6 * dim, frame.shape)
+    out = np.clip(out, 0, 255).astype(np.uint8)
+    h, w = out.shape[:2]
+    for _ in range(rng.randint(0, damage)):
+        x, y = rng.randint(0, w - 1), rng.randint(0, h - 1)
+        if rng.random() < 0.5:
+            cv2.line(out, (x, y), (x + rng.randint(-80, 80), y + rng.randint(-80, 80)), (40, 40, 40), rng.randint(2, 5))
+        else:
+            cv2.circle(out, (x, y), rng.randint(3, 10), (60, 60, 60), -1)
+    return out
+
+
+def bench_escalate(args):
+    corpus = build_corpus(args.frames, args.seed, tuple(args.kinds.split(',')), codes_per_frame=1,
+                          noise=0, blur=1, rotation=args.rotation)
+    rng = random.Random(args.seed)
+    corpus = [(degrade(rng, frame, args.dim, args.damage), payloads) for frame, payloads in corpus]
+    variants = args.variants.split(',') if args.variants else list(DEFAULT_VARIANTS)
+    report = {
+        "benchmark": "escalate",
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "environment": _environment(),
+        "corpus": {"frames": args.frames, "seed": args.seed, "kinds": args.kinds, "rotation": args.rotation,
+                   "dim": args.dim, "damage": args.damage},
+        "backend": args.backend,
+        "budget_ms": args.budget_ms,
+        "strategies": {},
+    }
+    setups = {
+        "plain": None,
+        "escalate_serial": 1,
+        "escalate": args.workers,
+    }
+    for name, workers in setups.items():
+        escalate = None if workers is None else {
+            "enabled": True, "variants": variants, "budget_ms": args.budget_ms, "workers": workers, "interval": 0}
+        decoder = make_decoder(args.backend, escalate=escalate)
+        report["strategies"][name] = s = run_strategy(decoder.decode, corpus, warmup=0)
+        line = (f"{name:<16} {s['fps']:>9.1f} fps  p50 {s['latency_ms']['p50']:>8.2f} ms  "
+                f"p99 {s['latency_ms']['p99']:>8.2f} ms  detect {s['detection_rate']:.1%}")
+        if workers is not None:
+            s["escalation"] = e = decoder.escalation_stats()
+            line += f"  rescued {e['rescued']}/{e['escalations']}  +{e['added_ms_mean']:.1f} ms"
+        print(line)
+        decoder.close()
+    print(f"{'variant':<12} {'success':>8} {'wins':>6} {'mean ms':>9}")
+    for name, v in report["strategies"]["escalate"]["escalation"]["variants"].items():
+        print(f"{name:<12} {v['success_rate']:>8.1%} {v['wins']:>6} {v['mean_ms']:>9.2f}")
+    return report
+
+
+def bench_detector(args):
+    from auth import ScanEvent, UNAUTHORIZED
+    from detector import Detector
+
+    rng = random.Random(args.seed)
+    codes = [f"CODE-{rng.getrandbits(48):012x}" for _ in range(args.codes)]
+    cameras = [str(i) for i in range(args.cameras)]
+    rate = args.events / args.seconds
+    events = [ScanEvent(rng.choice(codes), UNAUTHORIZED, i / rate, rng.choice(cameras))
+              for i in range(args.events)]
+    # Per-code alerts at the default threshold; camera checks would fire on everything.
+    detector = Detector(window=args.window, camera_alert=0, camera_lockout=0)
+
+    latencies = []
+    alerted = []
+    start = time.perf_counter()
+    for event in events:
+        t0 = time.perf_counter()
+        if detector.observe(event):
+            alerted.append(event)
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+    total = time.perf_counter() - start
+    latencies.sort()
+
+    # An alert is false when the code was denied fewer than code_alert times in the window.
+    seen = {}
+    for event in events:
+        seen.setdefault(event.code, []).append(event.timestamp)
+    false_alerts = sum(1 for e in alerted
+                       if sum(1 for t in seen[e.code] if e.timestamp - args.window < t <= e.timestamp)
+                       < detector.code_alert)
+
+    # Over-count of the sketch against exact counts for the final window.
+    sketch = detector.denied_codes
+    end = events[-1].timestamp
+    first = (int(end // sketch.slot_span) - sketch.slots + 1) * sketch.slot_span
+    exact = {}
+    for event in events:
+        if event.timestamp >= first:
+            exact[event.code] = exact.get(event.code, 0) + 1
+    errors = sorted(sketch.estimate(code, end) - n for code, n in exact.items())
+
+    report = {
+        "benchmark": "detector",
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "environment": _environment(),
+        "events": args.events,
+        "codes": args.codes,
+        "strategies": {"sketch": {
+            "fps": round(args.events / total, 1) if total else 0.0,
+            "latency_ms": {
+                "mean": round(sum(latencies) / len(latencies), 4),
+                "p50": round(percentile(latencies, 50), 4),
+                "p99": round(percentile(latencies, 99), 4),
+                "max": round(latencies[-1], 4),
+            },
+            "overcount": {"p50": percentile(errors, 50), "p99": percentile(errors, 99), "max": errors[-1]},
+            "alerts": len(alerted),
+            "false_alerts": false_alerts,
+        }},
+    }
+    s = report["strategies"]["sketch"]
+    print(f"detector {s['fps']:>10.1f} events/s  p50 {s['latency_ms']['p50']:.4f} ms  "
+          f"p99 {s['latency_ms']['p99']:.4f} ms  over-count p99 {s['overcount']['p99']}  "
+          f"alerts {s['alerts']} ({s['false_alerts']} false)")
+    return report
+
+
+def bench_styles(args):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtWidgets import QApplication, QLabel
+    from styles import COLORS, GLOBAL_STYLESHEET, STATES, set_state
+
+    app = QApplication.instance() or QApplication([])
+    app.setStyleSheet(GLOBAL_STYLESHEET)
+    states = ('success', 'danger', 'warning', 'idle')
+
+    inline_label = QLabel("status")
+    inline_label.show()
+
+    def inline(i):
+        color = COLORS[STATES[states[i % len(states)]]]
+        inline_label.setStyleSheet(f"color: {color}; font-family: 'Segoe UI'; font-size: 15px; "
+                                   f"font-weight: bold; padding: 8px;")
+
+    prop_label = QLabel("status")
+    prop_label.setObjectName("statusLabel")
+    prop_label.setProperty("state", "idle")
+    prop_label.setProperty("emphasis", True)
+    prop_label.show()
+
+    def prop(i):
+        set_state(prop_label, "state", states[i % len(states)])
+
+    report = {
+        "benchmark": "styles",
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "environment": _environment(),
+        "updates": args.updates,
+        "strategies": {},
+    }
+    for name, fn in (("setStyleSheet", inline), ("property", prop)):
+        for i in range(20):
+            fn(i)
+            app.processEvents()
+        latencies = []
+        start = time.perf_counter()
+        for i in range(args.updates):
+            t0 = time.perf_counter()
+            fn(i)
+            app.processEvents()
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+        total = time.perf_counter() - start
+        latencies.sort()
+        report["strategies"][name] = s = {
+            "fps": round(args.updates / total, 1) if total else 0.0,
+            "latency_ms": {
+                "mean": round(sum(latencies) / len(latencies), 4),
+                "p50": round(percentile(latencies, 50), 4),
+                "p99": round(percentile(latencies, 99), 4),
+                "max": round(latencies[-1], 4),
+            },
+        }
+        print(f"{name:<16} {s['fps']:>9.1f} updates/s  p50 {s['latency_ms']['p50']:>8.3f} ms  "
+              f"p99 {s['latency_ms']['p99']:>8.3f} ms")
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="QR & Barcode benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("decode", help="Decode throughput over a synthetic corpus")
+    p.add_argument("--frames", type=int, default=100)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--kinds", default="qr,code128,ean13,code39")
+    p.add_argument("--codes-per-frame", type=int, default=2)
+    p.add_argument("--noise", type=float, default=8.0, help="Gaussian noise sigma")
+    p.add_argument("--blur", type=int, default=1, help="Max blur radius (0 disables)")
+    p.add_argument("--rotation", type=float, default=15.0, help="Max rotation in degrees")
+    p.add_argument("--repeat", type=int, default=1)
+    p.add_argument("--strategies", default="", help="Comma-separated subset of strategies")
+    p.add_argument("--save-corpus", default="", help="Also write the corpus as PNGs to this directory")
+    p.set_defaults(func=bench_decode)
+
+    p = sub.add_parser("index", help="Authorized-code lookups: mmap'd digest index vs text list")
+    p.add_argument("--codes", type=int, default=1000000)
+    p.add_argument("--lookups", type=int, default=20000)
+    p.add_argument("--scan-lookups", type=int, default=20, help="Lookups for the slow re-read-per-scan path")
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(func=bench_index)
+
+    p = sub.add_parser("capture", help="Capture-to-decode latency on a simulated camera")
+    p.add_argument("--fps", type=float, default=30.0, help="Simulated camera frame rate")
+    p.add_argument("--decode-ms", type=float, default=60.0, help="Simulated decode time per frame")
+    p.add_argument("--frames", type=int, default=100)
+    p.add_argument("--warmup", type=int, default=10)
+    p.set_defaults(func=bench_capture)
+
+    p = sub.add_parser("detector", help="Brute-force detector throughput and sketch accuracy")
+    p.add_argument("--events", type=int, default=200000)
+    p.add_argument("--codes", type=int, default=50000, help="Distinct denied codes")
+    p.add_argument("--cameras", type=int, default=8)
+    p.add_argument("--seconds", type=float, default=600.0, help="Time span the events cover")
+    p.add_argument("--window", type=float, default=60.0)
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(func=bench_detector)
+
+    p = sub.add_parser("escalate", help="Parallel variant escalation on dim, damaged codes")
+    p.add_argument("--frames", type=int, default=100)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--kinds", default="qr,code128,ean13,code39")
+    p.add_argument("--rotation", type=float, default=35.0, help="Max rotation in degrees")
+    p.add_argument("--dim", type=float, default=0.75, help="Contrast lost to low light (0..1)")
+    p.add_argument("--damage", type=int, default=4, help="Max scratches/blotches per frame")
+    p.add_argument("--backend", default="pyzbar", choices=list(BACKENDS))
+    p.add_argument("--variants", default="", help="Comma-separated variants (default: the config defaults)")
+    p.add_argument("--budget-ms", type=float, default=80.0)
+    p.add_argument("--workers", type=int, default=4)
+    p.set_defaults(func=bench_escalate)
+
+    p = sub.add_parser("styles", help="Status-label style updates per second (offscreen Qt)")
+    p.add_argument("--updates", type=int, default=2000)
+    p.set_defaults(func=bench_styles)
+
+    for p in sub.choices.values():
+        p.add_argument("--out", default="", help="Write the JSON report here")
+        p.add_argument("--baseline", default="", help="Compare against a previous JSON report")
+
+    args = parser.parse_args(argv)
+    report = args.func(args)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            problems = compare(report, json.load(f))
+        for line in problems:
+            print("REGRESSION:", line)
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
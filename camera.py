@@ -0,0 +1,65 @@
+from PySide6.QtCore import QObject, QTimer
+
+from utils import init_camera
+
+
+class CameraSession(QObject):
+    """Keeps one capture device open across view switches.
+
+    Views call `acquire()` when they show a camera preview and `pause()`
+    when they go away. The device stays open while paused so the next
+    camera view starts instantly, and is only released after `idle_timeout`
+    seconds without any view using it (or on `release()`). A capture with
+    its own grab thread (sources.LatestFrameGrabber) is paused with it.
+    """
+
+    def __init__(self, parent=None, camera_id=0, width=640, height=480, idle_timeout=60.0,
+                 open_fn=init_camera):
+        super().__init__(parent)
+        self.camera_id = camera_id
+        self.width = width
+        self.height = height
+        self.open_fn = open_fn
+        self.cap = None
+        self.active = False
+        self.opens = 0
+        self.idle_timer = QTimer(self)
+        self.idle_timer.setSingleShot(True)
+        self.idle_timer.setInterval(int(idle_timeout * 1000))
+        self.idle_timer.timeout.connect(self.release)
+
+    @property
+    def is_open(self):
+        return self.cap is not None
+
+    def acquire(self):
+        """Return an open capture, opening the device only if it was released."""
+        self.idle_timer.stop()
+        if self.cap is None:
+            cap = self.open_fn(self.camera_id, self.width, self.height)
+            if hasattr(cap, "isOpened") and not cap.isOpened():
+                cap.release()
+                raise RuntimeError(f"camera {self.camera_id} could not be opened")
+            self.cap = cap
+            self.opens += 1
+        elif not self.active and hasattr(self.cap, "resume"):
+            self.cap.resume()
+        self.active = True
+        return self.cap
+
+    def pause(self):
+        """Stop consuming frames but keep the device warm until the idle timeout."""
+        if not self.active:
+            return
+        self.active = False
+        if self.cap is not None:
+            if hasattr(self.cap, "pause"):
+                self.cap.pause()
+            self.idle_timer.start()
+
+    def release(self):
+        self.idle_timer.stop()
+        self.active = False
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
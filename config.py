@@ -0,0 +1,135 @@
+import copy
+import json
+import os
+
+CONFIG_FILE = "config.json"
+
+# Every key can be overridden from config.json; nested dicts are merged.
+DEFAULT_CONFIG = {
+    "camera": {
+        "index": 0,
+        "width": 640,
+        "height": 480,
+        # Seconds the device stays open with no camera view before release.
+        "idle_timeout": 60,
+        # Capture settings (utils.CAMERA_PROFILES): "low_latency" asks for
+        # MJPEG at 30 fps with a one-frame driver buffer; "default" leaves the
+        # driver alone. A dict of fourcc/fps/buffersize works too.
+        "profile": "low_latency",
+        # Grab frames on a background thread and decode only the newest.
+        "latest_frame": True,
+        # Video file, image folder or glob to use instead of the camera
+        # (e.g. to replay gate footage through the app), or "fake:30:4" for a
+        # simulated 30 fps camera with a 4-frame queue; empty for live.
+        "source": "",
+    },
+    "decoder": {
+        # pyzbar | opencv_qr | opencv_barcode | opencv | cascade | auto
+        "backend": "auto",
+        # `benchmark.py decode --out` report consulted when backend is "auto";
+        # without it "auto" falls back to pyzbar.
+        "report": "bench.json",
+        # Symbologies per mode (see decoders.SYMBOLOGIES); empty means all.
+        "symbols": {"add": [], "auth": [], "scanner": []},
+        # When a frame decodes to nothing, retry it on preprocessed variants
+        # in parallel (decoders.VARIANTS, "rotate_<deg>", "scale_<factor>");
+        # the first variant that finds a code wins.
+        "escalate": {
+            "enabled": True,
+            "variants": ["clahe", "threshold", "sharpen", "invert", "rotate_30", "rotate_-30"],
+            "budget_ms": 80,     # extra time a missed frame may spend on variants
+            "workers": 4,
+            "interval": 0.25,    # min seconds between escalations (empty scenes miss every frame)
+        },
+    },
+    "expiry": {
+        # Minimum seconds between purges of expired codes from the list
+        # (0 = leave them listed; they are refused either way).
+        "purge_interval": 60,
+    },
+    "detector": {
+        "enabled": True,
+        "window": 60,            # seconds the counters look back
+        "code_alert": 3,         # denied scans of one code before an alert
+        "camera_alert": 20,      # denied scans at one camera before an alert
+        # Denied scans at one camera before it refuses everything (0 = off).
+        # Opt-in: anyone holding that many distinct bad codes can lock the
+        # gate for everyone, since the cooldown only applies per code.
+        "camera_lockout": 0,
+        "lockout_seconds": 300,
+        "replay_alert": 0,       # authorized scans of one code before an alert (0 = off)
+    },
+    "rules": {
+        # Codes that only grant access together, e.g. [["BADGE-0042", "CAR-TAG-77"]]:
+        # every code of a group must be scanned within `window` seconds.
+        "window": 10,
+        "groups": [],
+    },
+    "snapshots": {
+        # Evidence frames saved around every denied scan.
+        "enabled": True,
+        "directory": "snapshots",
+        "ring_size": 30,      # recent frames kept in memory
+        "pre_roll": 5,        # frames saved from before the decision
+        "post_roll": 5,       # ... and after it
+        "quality": 85,        # JPEG quality
+        "workers": 2,
+        "quota_mb": 500,      # oldest incidents are deleted beyond this
+        "max_pending": 200,   # queued encodes before new frames are dropped
+    },
+    "logs": {
+        # One authorized and one unauthorized file per gate and camera in `directory`.
+        # Off: everything goes to Authorized_log.txt / Unauthorized_log.txt as before.
+        "sharded": True,
+        "directory": "logs",
+        "instance": "",        # gate name in shard file names (default: host name)
+        "view_lines": 5000,    # newest entries shown in the log views
+        "index_every": 1000,   # lines between entries of the <shard>.tidx time index
+    },
+    "diagnostics": {
+        # Profiling and leak diagnostics (ui_app.py --diagnostics or Ctrl+Shift+D).
+        "enabled": False,
+        "directory": "diagnostics",
+        "interval": 300,          # seconds between tracemalloc snapshots
+        "profiler": "cprofile",   # or "yappi" (all threads) when installed
+    },
+    "sync": {
+        # Serve this gate's change journal on this port (0 = off). It holds
+        # the whole authorized list: bind to the LAN address explicitly.
+        "serve_port": 0,
+        "host": "127.0.0.1",
+        # Shared secret every gate sends and checks; serving and pulling
+        # need it (or the QRAUTH_SYNC_TOKEN environment variable).
+        "token": "",
+        # Pull changes from another gate, e.g. "http://gate1:8766" (empty = off).
+        "peer": "",
+        "interval": 30,
+    },
+    "events": {
+        # Where scan events go, e.g. {"type": "http", "url": "http://127.0.0.1:8765/"},
+        # {"type": "unix", "path": "/run/gate.sock"} or {"type": "script", "command": "./relay.sh"}.
+        "sinks": [],
+        "queue_size": 1000,     # per sink; the oldest event is dropped when full
+        "batch_size": 50,
+        "flush_interval": 0.5,  # seconds to wait for a batch to fill
+        "retries": 3,
+        "backoff": 0.5,         # seconds, doubled on each retry
+    },
+}
+
+
+def _merge(base, override):
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            _merge(base[key], value)
+        else:
+            base[key] = value
+    return base
+
+
+def load_config(path=CONFIG_FILE):
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    if path and os.path.exists(path):
+        with open(path, 'r') as f:
+            _merge(config, json.load(f))
+    return config
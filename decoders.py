@@ -0,0 +1,492 @@
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import cv2
+import numpy as np
+
+# Same shape as pyzbar's Decoded so every backend is interchangeable.
+DecodedCode = namedtuple("DecodedCode", "data type rect polygon")
+Rect = namedtuple("Rect", "left top width height")
+
+# Symbology names accepted in config, mapped to pyzbar / OpenCV type names.
+SYMBOLOGIES = {
+    'qrcode': ('QRCODE', 'QRCODE'),
+    'code128': ('CODE128', 'CODE_128'),
+    'code39': ('CODE39', 'CODE_39'),
+    'ean13': ('EAN13', 'EAN_13'),
+    'ean8': ('EAN8', 'EAN_8'),
+    'upca': ('UPCA', 'UPC_A'),
+    'upce': ('UPCE', 'UPC_E'),
+    'isbn13': ('ISBN13', 'EAN_13'),
+    'i25': ('I25', 'ITF'),
+    'codabar': ('CODABAR', 'CODABAR'),
+    'pdf417': ('PDF417', 'PDF417'),
+}
+
+DEFAULT_BACKEND = 'pyzbar'
+
+
+def _rect_from_points(points):
+    xs = [int(p[0]) for p in points]
+    ys = [int(p[1]) for p in points]
+    return Rect(min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys))
+
+
+class Decoder:
+    """Base class: subclasses implement `_decode(frame)` returning DecodedCode-like items.
+
+    Exceptions never escape `decode()`, but they are counted in `errors`
+    (with the most recent one kept in `last_error`) instead of vanishing.
+    Wrappers report the errors of the decoders they run (`children()`) in
+    `errors` too, since those swallow their own exceptions.
+    """
+
+    name = 'base'
+
+    def __init__(self, symbols=None):
+        self.symbols = [s.lower() for s in symbols] if symbols else []
+        unknown = [s for s in self.symbols if s not in SYMBOLOGIES]
+        if unknown:
+            raise ValueError(f"Unknown symbology {', '.join(map(repr, unknown))} "
+                             f"(choose from {', '.join(SYMBOLOGIES)})")
+        self.calls = 0
+        self.own_errors = 0
+        self.last_error = None
+
+    @property
+    def errors(self):
+        return self.own_errors + sum(d.errors for d in self.children())
+
+    def children(self):
+        return []
+
+    def decode(self, frame):
+        self.calls += 1
+        try:
+            return self._decode(frame)
+        except Exception as e:
+            self.own_errors += 1
+            self.last_error = f"{type(e).__name__}: {e}"
+            return []
+
+    def _decode(self, frame):
+        raise NotImplementedError
+
+    def accepts(self, symbology):
+        return not self.symbols or symbology in self.symbols
+
+    def stats(self):
+        return {"backend": self.name, "calls": self.calls, "errors": self.errors, "last_error": self.last_error}
+
+    def close(self):
+        pass
+
+
+class PyzbarDecoder(Decoder):
+    name = 'pyzbar'
+
+    def __init__(self, symbols=None):
+        super().__init__(symbols)
+        from pyzbar.pyzbar import decode, ZBarSymbol
+        self._decode_fn = decode
+        self._zbar_symbols = [getattr(ZBarSymbol, SYMBOLOGIES[s][0]) for s in self.symbols
+                              if hasattr(ZBarSymbol, SYMBOLOGIES[s][0])] or None
+        if self.symbols and self._zbar_symbols is None:
+            # An empty filter would mean "every symbology".
+            raise ValueError(f"This pyzbar build supports none of {', '.join(self.symbols)}")
+
+    def _decode(self, frame):
+        return self._decode_fn(frame, symbols=self._zbar_symbols)
+
+
+class OpenCVQRDecoder(Decoder):
+    name = 'opencv_qr'
+
+    def __init__(self, symbols=None):
+        super().__init__(symbols)
+        self._detector = cv2.QRCodeDetector()
+
+    def _decode(self, frame):
+        if not self.accepts('qrcode'):
+            return []
+        ok, texts, points, _ = self._detector.detectAndDecodeMulti(frame)
+        if not ok or points is None:
+            return []
+        results = []
+        for text, pts in zip(texts, points):
+            if text:
+                results.append(DecodedCode(text.encode("utf-8"), 'QRCODE', _rect_from_points(pts),
+                                           [(int(x), int(y)) for x, y in pts]))
+        return results
+
+
+class OpenCVBarcodeDecoder(Decoder):
+    name = 'opencv_barcode'
+
+    _TYPES = {cv_name: zbar_name for zbar_name, cv_name in SYMBOLOGIES.values()}
+
+    def __init__(self, symbols=None):
+        super().__init__(symbols)
+        self._detector = cv2.barcode.BarcodeDetector()
+        self._allowed = {SYMBOLOGIES[s][1] for s in self.symbols}
+
+    def _decode(self, frame):
+        _, texts, types, points = self._detector.detectAndDecodeWithType(frame)
+        if points is None:
+            return []
+        results = []
+        for text, kind, pts in zip(texts, types, points):
+            if not text or (self._allowed and kind not in self._allowed):
+                continue
+            results.append(DecodedCode(text.encode("utf-8"), self._TYPES.get(kind, kind),
+                                       _rect_from_points(pts), [(int(x), int(y)) for x, y in pts]))
+        return results
+
+
+class CascadeDecoder(Decoder):
+    """Runs several backends in order.
+
+    With `stop_on_first` (the default) later backends only run when earlier
+    ones found nothing; otherwise results from all backends are merged and
+    de-duplicated by payload.
+    """
+
+    name = 'cascade'
+
+    def __init__(self, decoders, stop_on_first=True, name=None):
+        super().__init__()
+        self.decoders = decoders
+        self.stop_on_first = stop_on_first
+        if name:
+            self.name = name
+
+    def _decode(self, frame):
+        merged = []
+        seen = set()
+        for decoder in self.decoders:
+            errors = decoder.errors
+            for code in decoder.decode(frame):
+                if code.data not in seen:
+                    seen.add(code.data)
+                    merged.append(code)
+            if decoder.errors > errors:
+                self.last_error = decoder.last_error
+            if merged and self.stop_on_first:
+                break
+        return merged
+
+    def children(self):
+        return self.decoders
+
+    def stats(self):
+        info = super().stats()
+        info["backends"] = [d.stats() for d in self.decoders]
+        return info
+
+    def close(self):
+        for decoder in self.decoders:
+            decoder.close()
+
+
+# ── Escalation ────────────────────────────────────────────────────────────
+# Preprocessing variants for frames the plain decode misses. Each takes the
+# grayscale frame and returns (image, inverse), where `inverse` is the 2x3
+# affine transform from image back to frame coordinates, or None if the
+# geometry is unchanged.
+def _clahe(gray):
+    return cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8)).apply(gray), None
+
+
+def _threshold(gray):
+    return cv2.adaptiveThreshold(cv2.medianBlur(gray, 3), 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                 cv2.THRESH_BINARY, 31, 10), None
+
+
+def _sharpen(gray):
+    return cv2.addWeighted(gray, 1.8, cv2.GaussianBlur(gray, (0, 0), 2.0), -0.8, 0), None
+
+
+def _invert(gray):
+    return cv2.bitwise_not(gray), None
+
+
+def _rotate(angle):
+    def variant(gray):
+        h, w = gray.shape[:2]
+        m = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+        cos, sin = abs(m[0, 0]), abs(m[0, 1])
+        nw, nh = int(h * sin + w * cos), int(h * cos + w * sin)
+        m[0, 2] += nw / 2 - w / 2
+        m[1, 2] += nh / 2 - h / 2
+        return cv2.warpAffine(gray, m, (nw, nh), borderMode=cv2.BORDER_REPLICATE), cv2.invertAffineTransform(m)
+    return variant
+
+
+def _scale(factor):
+    def variant(gray):
+        image = cv2.resize(gray, None, fx=factor, fy=factor, interpolation=cv2.INTER_CUBIC)
+        return image, np.float64([[1 / factor, 0, 0], [0, 1 / factor, 0]])
+    return variant
+
+
+VARIANTS = {
+    'clahe': _clahe,            # local contrast for dim or unevenly lit badges
+    'threshold': _threshold,    # adaptive binarisation for glare and faded print
+    'sharpen': _sharpen,        # unsharp mask for slight defocus and motion blur
+    'invert': _invert,          # light-on-dark codes
+}
+DEFAULT_VARIANTS = ('clahe', 'threshold', 'sharpen', 'invert', 'rotate_30', 'rotate_-30')
+
+
+def make_variant(name):
+    """A VARIANTS entry, or "rotate_<degrees>" / "scale_<factor>"."""
+    if name in VARIANTS:
+        return VARIANTS[name]
+    kind, _, arg = name.partition('_')
+    try:
+        if kind == 'rotate':
+            return _rotate(float(arg))
+        if kind == 'scale' and float(arg) > 0:
+            return _scale(float(arg))
+    except ValueError:
+        pass
+    raise ValueError(f"Unknown decode variant '{name}' (choose from {', '.join(VARIANTS)}, rotate_<deg>, scale_<factor>)")
+
+
+def _map_code(code, inverse):
+    """`code` with its polygon and rect moved back into frame coordinates."""
+    if inverse is None or not code.polygon:
+        return code
+    points = cv2.transform(np.float64([[(p[0], p[1]) for p in code.polygon]]), inverse)[0]
+    polygon = [(int(round(x)), int(round(y))) for x, y in points]
+    return DecodedCode(code.data, code.type, _rect_from_points(polygon), polygon)
+
+
+class EscalatingDecoder(Decoder):
+    """Retries frames the plain decode misses on preprocessed variants in parallel.
+
+    The variants run on a small thread pool (pyzbar's ctypes call and the
+    OpenCV filters release the GIL), each worker with its own backend from
+    `factory()`. The first variant to find a code wins; the others are
+    cancelled, and the frame gives up once `budget_ms` is spent. Empty
+    scenes miss on every frame, so escalation runs at most once per
+    `interval` seconds and never while stragglers of the last one are still
+    running.
+
+    With `budget_ms` None the outcome does not depend on the clock: every
+    missed frame runs every variant to the end and the first one in the
+    given order that finds a code wins (used for replays, with interval 0).
+    """
+
+    name = 'escalate'
+
+    def __init__(self, factory, variants=DEFAULT_VARIANTS, budget_ms=80, workers=4, interval=0.25, metrics=None):
+        super().__init__()
+        self.factory = factory
+        self.base = factory()
+        self.variants = {name: make_variant(name) for name in variants}
+        self.budget = None if budget_ms is None else budget_ms / 1000.0
+        # More workers than cores only slows every variant down; with one
+        # core the variants simply run in the order given until the budget ends.
+        self.workers = max(1, min(workers, len(self.variants), os.cpu_count() or 1))
+        self.interval = interval
+        self.metrics = metrics
+        self.escalations = 0
+        self.rescued = 0
+        self.over_budget = 0
+        self.skipped = 0
+        self.added_ms = 0.0
+        self.variant_stats = {name: {"runs": 0, "hits": 0, "wins": 0, "total_ms": 0.0} for name in self.variants}
+        self._pool = None
+        self._local = threading.local()
+        self._worker_decoders = []
+        self._lock = threading.Lock()
+        self._running = []
+        self._last = float("-inf")
+
+    def _decode(self, frame):
+        codes = self.base.decode(frame)
+        if codes or not self.variants:
+            return codes
+        now = time.monotonic()
+        if now - self._last < self.interval:
+            return codes
+        self._running = [f for f in self._running if not f.done()]
+        if self._running:
+            self.skipped += 1
+            return codes
+        self._last = now
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return self._escalate(gray, now)
+
+    def _result(self, future, name):
+        try:
+            return future.result()
+        except Exception as e:
+            # A failing variant is a miss; the others still count.
+            self.own_errors += 1
+            self.last_error = f"{name}: {type(e).__name__}: {e}"
+            return []
+
+    def _win(self, name):
+        with self._lock:
+            self.variant_stats[name]["wins"] += 1
+
+    def _escalate(self, gray, started):
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="decode-variant")
+        cancel = threading.Event()
+        futures = {self._pool.submit(self._run_variant, name, gray, cancel): name for name in self.variants}
+        codes = []
+        if self.budget is None:
+            for future, name in futures.items():
+                result = self._result(future, name)
+                if result and not codes:
+                    codes = result
+                    self._win(name)
+            pending = ()
+        else:
+            deadline = started + self.budget
+            pending = set(futures)
+            while pending and not codes:
+                done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()),
+                                     return_when=FIRST_COMPLETED)
+                if not done:
+                    self.over_budget += 1
+                    break
+                for future in done:
+                    result = self._result(future, futures[future])
+                    if result and not codes:
+                        codes = result
+                        self._win(futures[future])
+        if pending:
+            cancel.set()
+            for future in pending:
+                future.cancel()
+            self._running = [f for f in pending if not f.done()]
+        ms = (time.monotonic() - started) * 1000.0
+        self.escalations += 1
+        self.rescued += 1 if codes else 0
+        self.added_ms += ms
+        if self.metrics is not None:
+            self.metrics.observe("escalate", ms)
+        return codes
+
+    def _run_variant(self, name, gray, cancel):
+        if cancel.is_set():
+            return []
+        t0 = time.perf_counter()
+        image, inverse = self.variants[name](gray)
+        if cancel.is_set():
+            return []
+        decoder = getattr(self._local, "decoder", None)
+        if decoder is None:
+            decoder = self._local.decoder = self.factory()
+            with self._lock:
+                self._worker_decoders.append(decoder)
+        codes = decoder.decode(image)
+        ms = (time.perf_counter() - t0) * 1000.0
+        with self._lock:
+            s = self.variant_stats[name]
+            s["runs"] += 1
+            s["total_ms"] += ms
+            s["hits"] += 1 if codes else 0
+        return [_map_code(code, inverse) for code in codes]
+
+    def escalation_stats(self):
+        """Rescue rate, added latency and per-variant success rate and cost."""
+        with self._lock:
+            variants = {name: {
+                "runs": s["runs"],
+                "hits": s["hits"],
+                "wins": s["wins"],
+                "success_rate": round(s["hits"] / s["runs"], 4) if s["runs"] else 0.0,
+                "mean_ms": round(s["total_ms"] / s["runs"], 3) if s["runs"] else 0.0,
+            } for name, s in self.variant_stats.items()}
+        n = self.escalations
+        return {
+            "escalations": n,
+            "rescued": self.rescued,
+            "rescue_rate": round(self.rescued / n, 4) if n else 0.0,
+            "over_budget": self.over_budget,
+            "skipped_busy": self.skipped,
+            "added_ms_mean": round(self.added_ms / n, 3) if n else 0.0,
+            "variants": variants,
+        }
+
+    def children(self):
+        with self._lock:
+            return [self.base] + self._worker_decoders
+
+    def stats(self):
+        info = super().stats()
+        info["base"] = self.base.stats()
+        info["escalation"] = self.escalation_stats()
+        return info
+
+    def close(self):
+        """Stop the pool (waiting for running variants) and close every backend."""
+        for future in self._running:
+            future.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        for decoder in self.children():
+            decoder.close()
+        with self._lock:
+            self._worker_decoders = []
+        self._local = threading.local()
+
+
+BACKENDS = {
+    'pyzbar': lambda symbols: PyzbarDecoder(symbols),
+    'opencv_qr': lambda symbols: OpenCVQRDecoder(symbols),
+    'opencv_barcode': lambda symbols: OpenCVBarcodeDecoder(symbols),
+    'opencv': lambda symbols: CascadeDecoder(
+        [OpenCVQRDecoder(symbols), OpenCVBarcodeDecoder(symbols)], stop_on_first=False, name='opencv'),
+    'cascade': lambda symbols: CascadeDecoder(
+        [PyzbarDecoder(symbols), OpenCVQRDecoder(symbols), OpenCVBarcodeDecoder(symbols)]),
+}
+
+
+def make_decoder(backend=DEFAULT_BACKEND, symbols=None, escalate=None, metrics=None):
+    """A decoder for `backend`, wrapped in an EscalatingDecoder when the
+    `escalate` section of the decoder config is enabled."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown decoder backend '{backend}' (choose from {', '.join(BACKENDS)})")
+    cfg = escalate or {}
+    if cfg.get("enabled"):
+        return EscalatingDecoder(lambda: BACKENDS[backend](symbols), cfg.get("variants", DEFAULT_VARIANTS),
+                                 cfg.get("budget_ms", 80), cfg.get("workers", 4), cfg.get("interval", 0.25), metrics)
+    return BACKENDS[backend](symbols)
+
+
+def select_backend(report, min_detection_gap=0.02):
+    """Pick the backend with the best detection rate from a `benchmark.py decode` report.
+
+    Backends within `min_detection_gap` of the best detection rate are
+    considered equivalent and the fastest of them wins.
+    """
+    if isinstance(report, str):
+        with open(report, 'r') as f:
+            report = json.load(f)
+    candidates = {name: s for name, s in report.get("strategies", {}).items() if name in BACKENDS}
+    if not candidates:
+        return DEFAULT_BACKEND
+    best_rate = max(s["detection_rate"] for s in candidates.values())
+    close = [(s["fps"], name) for name, s in candidates.items()
+             if s["detection_rate"] >= best_rate - min_detection_gap]
+    return max(close)[1]
+
+
+def resolve_backend(decoder_config):
+    """The backend name to use for a `config["decoder"]` section, resolving "auto"."""
+    backend = decoder_config["backend"]
+    if backend == "auto":
+        report = decoder_config.get("report")
+        backend = select_backend(report) if report and os.path.exists(report) else DEFAULT_BACKEND
+    return backend
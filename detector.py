@@ -0,0 +1,197 @@
+"""Sliding-window detection of brute-force and replayed scans.
+
+Denied scans are counted per code in a count-min sketch and per camera in
+a ring of time slots, both covering the last `window` seconds in fixed
+memory no matter how many distinct codes are tried. Under load the sketch
+over-counts by more than a small per-code threshold, so a code it reports
+over the threshold is confirmed against the exact times of its last few
+denials before alerting. Crossing a threshold raises an alert on the event; a camera that keeps denying codes is locked
+out for `lockout_seconds`, during which every scan there is refused.
+Nothing is re-read from the logs.
+"""
+import hashlib
+from array import array
+from collections import OrderedDict, deque
+
+from auth import AUTHORIZED, UNAUTHORIZED, EXPIRED, NOT_YET_VALID
+
+DENIED = (UNAUTHORIZED, EXPIRED, NOT_YET_VALID)
+
+# Alert levels carried in ScanEvent.alert.
+ALERT = "alert"          # a denied code keeps being retried
+REPLAY = "replay"        # an authorized code is presented unusually often
+LOCKOUT = "lockout"      # the camera crossed its lockout threshold
+
+
+class SlidingSketch:
+    """Count-min sketch over a sliding time window.
+
+    The window is split into `slots` sub-sketches; a slot is cleared when
+    time moves past it, so counts older than `window` seconds fall away.
+    `estimate()` never under-counts and over-counts by at most
+    ~e/width of the events in the window (with probability 1 - e^-depth).
+    """
+
+    def __init__(self, window=60.0, slots=12, width=2048, depth=4):
+        self.window = window
+        self.slots = slots
+        self.width = width
+        self.depth = depth
+        self.slot_span = window / slots
+        self.tables = [array('I', bytes(4 * width * depth)) for _ in range(slots)]
+        self.current = None
+
+    def _advance(self, now):
+        slot = int(now // self.slot_span)
+        if self.current is None or slot - self.current >= self.slots:
+            for table in self.tables:
+                table[:] = array('I', bytes(4 * self.width * self.depth))
+        elif slot > self.current:
+            for s in range(self.current + 1, slot + 1):
+                table = self.tables[s % self.slots]
+                table[:] = array('I', bytes(4 * self.width * self.depth))
+        if self.current is None or slot > self.current:
+            self.current = slot
+        return self.current % self.slots
+
+    def _cells(self, key):
+        h = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(h[:8], "little")
+        h2 = int.from_bytes(h[8:], "little") | 1
+        width = self.width
+        return [row * width + (h1 + row * h2) % width for row in range(self.depth)]
+
+    def add(self, key, now):
+        """Count one occurrence of `key`; returns its estimated count in the window."""
+        table = self.tables[self._advance(now)]
+        cells = self._cells(key)
+        for cell in cells:
+            table[cell] += 1
+        return min(sum(t[cell] for t in self.tables) for cell in cells)
+
+    def estimate(self, key, now):
+        self._advance(now)
+        cells = self._cells(key)
+        return min(sum(t[cell] for t in self.tables) for cell in cells)
+
+
+class SlidingCounter:
+    """Exact per-key counts over a sliding window for a small key set (cameras)."""
+
+    def __init__(self, window=60.0, slots=12):
+        self.slots = slots
+        self.slot_span = window / slots
+        self.rings = {}
+
+    def add(self, key, now):
+        slot = int(now // self.slot_span)
+        ring = self.rings.get(key)
+        if ring is None:
+            ring = self.rings[key] = [slot, [0] * self.slots]
+        last, counts = ring
+        if slot - last >= self.slots:
+            counts[:] = [0] * self.slots
+        else:
+            for s in range(last + 1, slot + 1):
+                counts[s % self.slots] = 0
+        ring[0] = max(last, slot)
+        counts[ring[0] % self.slots] += 1
+        return sum(counts)
+
+
+class RecentTimes:
+    """Exact counts of the last `keep` occurrences per key within `window`.
+
+    Keys are kept in order of their latest occurrence and dropped once that
+    falls out of the window, so memory follows the keys seen in the window,
+    capped at `capacity`. Past the cap the stalest key is forgotten, which
+    can only under-count. `keep` times are enough to tell whether a
+    threshold of `keep` was reached.
+    """
+
+    def __init__(self, window=60.0, keep=3, capacity=32768):
+        self.window = window
+        self.keep = keep
+        self.capacity = capacity
+        self.times = {}
+
+    def add(self, key, now):
+        """Record one occurrence of `key`; returns its count (at most `keep`) in the window."""
+        times = self.times
+        recent = times.pop(key, None)
+        while times:
+            oldest = next(iter(times))
+            if len(times) < self.capacity and now - times[oldest][-1] < self.window:
+                break
+            del times[oldest]
+        if recent is None:
+            recent = deque(maxlen=self.keep)
+        recent.append(now)
+        times[key] = recent
+        return sum(1 for t in recent if now - t < self.window)
+
+
+class Detector:
+    """Escalates repeated denied (and, optionally, repeated authorized) scans.
+
+    `observe(event)` returns the alert level for the event ("" for none);
+    `locked(camera, now)` is True while a lockout on that camera lasts.
+    A threshold of 0 disables that check. Per-code thresholds are checked
+    against the sketch first and then confirmed exactly (see RecentTimes,
+    which remembers `exact_codes` codes).
+    """
+
+    def __init__(self, window=60.0, code_alert=3, camera_alert=20, camera_lockout=0,
+                 lockout_seconds=300.0, replay_alert=0, width=2048, depth=4, exact_codes=32768):
+        self.code_alert = code_alert
+        self.camera_alert = camera_alert
+        self.camera_lockout = camera_lockout
+        self.lockout_seconds = lockout_seconds
+        self.replay_alert = replay_alert
+        self.denied_codes = SlidingSketch(window, width=width, depth=depth)
+        self.authorized_codes = SlidingSketch(window, width=width, depth=depth) if replay_alert else None
+        self.denied_recent = RecentTimes(window, code_alert, exact_codes) if code_alert else None
+        self.authorized_recent = RecentTimes(window, replay_alert, exact_codes) if replay_alert else None
+        self.denied_cameras = SlidingCounter(window)
+        self.lockouts = {}
+        self.alerts = 0
+
+    def locked(self, camera, now):
+        until = self.lockouts.get(camera)
+        if until is None:
+            return False
+        if now >= until:
+            del self.lockouts[camera]
+            return False
+        return True
+
+    def observe(self, event):
+        level = ""
+        now = event.timestamp
+        if event.outcome in DENIED:
+            n = self.denied_codes.add(event.code, now)
+            if self.code_alert:
+                exact = self.denied_recent.add(event.code, now)
+                if n >= self.code_alert and exact >= self.code_alert:
+                    level = ALERT
+            n = self.denied_cameras.add(event.camera, now)
+            if self.camera_alert and n >= self.camera_alert:
+                level = ALERT
+            if self.camera_lockout and n >= self.camera_lockout:
+                self.lockouts[event.camera] = now + self.lockout_seconds
+                level = LOCKOUT
+        elif event.outcome == AUTHORIZED and self.authorized_codes is not None:
+            n = self.authorized_codes.add(event.code, now)
+            if self.authorized_recent.add(event.code, now) >= self.replay_alert and n >= self.replay_alert:
+                level = REPLAY
+        if level:
+            self.alerts += 1
+        return level
+
+
+def make_detector(detector_config):
+    """Detector from the `detector` section of config.json, or None when disabled."""
+    cfg = dict(detector_config or {})
+    if not cfg.pop("enabled", True):
+        return None
+    return Detector(**cfg)
@@ -0,0 +1,250 @@
+"""Profiling and leak diagnostics for long-running kiosks.
+
+Started with `ui_app.py --diagnostics` or Ctrl+Shift+D at runtime. While on:
+
+- Ctrl+Shift+P toggles profiling of the scan loop. cProfile (or yappi when
+  it is installed and `profiler` is "yappi") only runs inside the camera
+  tick. Stopping writes `profile_N.pstats` and a readable `profile_N.txt`.
+- tracemalloc is started and a snapshot is taken every `interval` seconds
+  and on every view switch. Each `tracemalloc_N_<label>.txt` lists the top
+  allocation growth since the previous snapshot and since the first one.
+- Ctrl+Shift+S writes `report_N.json`: live QObjects and widgets by class,
+  Python objects by type, RSS, open descriptors, threads and app metrics.
+  Every report also refreshes `diagnostics.zip`, a bundle of the whole
+  session directory that can be attached to a ticket.
+
+Everything goes to `diagnostics/<start time>/`.
+"""
+import cProfile
+import gc
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import zipfile
+from collections import Counter
+
+from PySide6.QtCore import QObject, QTimer
+from PySide6.QtWidgets import QApplication
+
+from metrics import open_fds, rss_mb
+
+try:
+    import yappi
+except ImportError:
+    yappi = None
+
+
+class _NullContext:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL = _NullContext()
+
+
+class _ProfileContext:
+    __slots__ = ("profiler",)
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+
+    def __enter__(self):
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.disable()
+        return False
+
+
+def count_qobjects(roots=()):
+    """Live QObjects by class: every widget the app knows of plus the
+    non-widget children (timers, shortcuts, models...) of `roots`."""
+    objects = {id(w): w for w in QApplication.allWidgets()}
+    for root in roots:
+        objects[id(root)] = root
+        for child in root.findChildren(QObject):
+            objects[id(child)] = child
+    return Counter(type(o).__name__ for o in objects.values())
+
+
+class Diagnostics(QObject):
+    def __init__(self, parent=None, directory="diagnostics", interval=300, profiler="cprofile",
+                 top=30, metrics=None):
+        super().__init__(parent)
+        self.root = parent
+        self.directory = os.path.join(directory, time.strftime("%Y%m%d_%H%M%S"))
+        self.profiler_name = profiler if profiler != "yappi" or yappi is not None else "cprofile"
+        self.top = top
+        self.metrics = metrics
+        self.enabled = False
+        self.profiler = None
+        self.profiles = 0
+        self.reports = 0
+        self.snapshots = 0
+        self._first = None
+        self._previous = None
+        self._yappi = False
+        self.timer = QTimer(self)
+        self.timer.setInterval(int(interval * 1000))
+        self.timer.timeout.connect(lambda: self.snapshot("periodic"))
+
+    def _path(self, name):
+        os.makedirs(self.directory, exist_ok=True)
+        return os.path.join(self.directory, name)
+
+    # ── Mode ──────────────────────────────────────────────────────────────
+    def start(self, trace_frames=10):
+        if self.enabled:
+            return
+        self.enabled = True
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(trace_frames)
+        self.snapshot("start")
+        self.timer.start()
+
+    def stop(self):
+        if not self.enabled:
+            return
+        self.stop_profiling()
+        self.snapshot("stop")
+        self.report()
+        self.timer.stop()
+        tracemalloc.stop()
+        self._first = self._previous = None
+        self.enabled = False
+
+    def toggle(self):
+        self.stop() if self.enabled else self.start()
+        return self.enabled
+
+    # ── Profiling ─────────────────────────────────────────────────────────
+    def scan_profile(self):
+        """Context for one scan-loop tick; a shared no-op unless cProfile is on."""
+        if self.profiler is None:
+            return _NULL
+        return _ProfileContext(self.profiler)
+
+    @property
+    def profiling(self):
+        return self.profiler is not None or self._yappi
+
+    def start_profiling(self):
+        if self.profiling:
+            return
+        if self.profiler_name == "yappi":
+            # yappi runs continuously and covers every thread (grabber, encoders, sinks).
+            yappi.set_clock_type("wall")
+            yappi.clear_stats()
+            yappi.start()
+            self._yappi = True
+        else:
+            self.profiler = cProfile.Profile()
+
+    def stop_profiling(self):
+        if not self.profiling:
+            return None
+        self.profiles += 1
+        base = self._path(f"profile_{self.profiles}")
+        if self._yappi:
+            yappi.stop()
+            stats = yappi.get_func_stats()
+            stats.save(base + ".pstats", type="pstat")
+            with open(base + ".txt", 'w') as f:
+                stats.sort("ttot").print_all(out=f)
+                yappi.get_thread_stats().print_all(out=f)
+            self._yappi = False
+        else:
+            self.profiler.dump_stats(base + ".pstats")
+            out = io.StringIO()
+            pstats.Stats(self.profiler, stream=out).sort_stats("cumulative").print_stats(self.top * 2)
+            with open(base + ".txt", 'w') as f:
+                f.write(out.getvalue())
+            self.profiler = None
+        return base + ".txt"
+
+    def toggle_profiling(self):
+        if self.profiling:
+            self.stop_profiling()
+            return False
+        self.start_profiling()
+        return True
+
+    # ── Memory ────────────────────────────────────────────────────────────
+    def snapshot(self, label):
+        """tracemalloc snapshot diffed against the previous and the first one."""
+        if not self.enabled or not tracemalloc.is_tracing():
+            return None
+        gc.collect()
+        snap = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ))
+        self.snapshots += 1
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [f"# {time.strftime('%Y-%m-%d %H:%M:%S')}  {label}  traced {current / 1e6:.1f} MB "
+                 f"(peak {peak / 1e6:.1f} MB)  rss {rss_mb():.1f} MB"]
+        for title, other in (("since previous snapshot", self._previous), ("since first snapshot", self._first)):
+            if other is None:
+                continue
+            lines.append(f"\n## Top growth {title}")
+            lines.extend(str(stat) for stat in snap.compare_to(other, "lineno")[:self.top])
+        lines.append("\n## Largest allocations")
+        lines.extend(str(stat) for stat in snap.statistics("lineno")[:self.top])
+        safe = "".join(c if c.isalnum() else "_" for c in label)
+        path = self._path(f"tracemalloc_{self.snapshots:03d}_{safe}.txt")
+        with open(path, 'w') as f:
+            f.write("\n".join(lines) + "\n")
+        if self._first is None:
+            self._first = snap
+        self._previous = snap
+        return path
+
+    def view_switched(self, name):
+        if self.enabled:
+            self.snapshot(f"view_{name}")
+
+    # ── Reports ───────────────────────────────────────────────────────────
+    def report(self):
+        gc.collect()
+        qobjects = count_qobjects([self.root] if self.root is not None else [])
+        py_types = Counter(type(o).__name__ for o in gc.get_objects())
+        data = {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": sys.version.split()[0],
+            "rss_mb": round(rss_mb(), 1),
+            "open_fds": open_fds(),
+            "threads": sorted(t.name for t in threading.enumerate()),
+            "qobjects_total": sum(qobjects.values()),
+            "qobjects": dict(qobjects.most_common()),
+            "top_level_widgets": len(QApplication.topLevelWidgets()),
+            "gc_counts": gc.get_count(),
+            "python_objects_total": sum(py_types.values()),
+            "python_objects": dict(py_types.most_common(self.top)),
+            "tracemalloc_mb": round(tracemalloc.get_traced_memory()[0] / 1e6, 2) if tracemalloc.is_tracing() else None,
+            "metrics": self.metrics.to_dict() if self.metrics is not None else None,
+        }
+        self.reports += 1
+        path = self._path(f"report_{self.reports}.json")
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+        self.bundle()
+        return path
+
+    def bundle(self):
+        """Zip the session directory for sharing."""
+        path = self._path("diagnostics.zip")
+        with zipfile.ZipFile(path + ".tmp", 'w', zipfile.ZIP_DEFLATED) as z:
+            for name in sorted(os.listdir(self.directory)):
+                if not name.startswith("diagnostics.zip"):
+                    z.write(os.path.join(self.directory, name), name)
+        os.replace(path + ".tmp", path)
+        return path
@@ -0,0 +1,221 @@
+"""Scan-event hooks delivered off the GUI thread.
+
+Every decision (`auth.ScanEvent`) is published to an `EventBus`, which hands
+it to each configured sink through that sink's own bounded queue and worker
+thread. Sinks receive batches, failed deliveries are retried with backoff,
+and a full queue drops the oldest event instead of blocking the publisher,
+so a slow or dead sink never delays the authorization decision.
+
+A stand-in HTTP receiver for testing sinks locally:
+
+    python events.py collect --port 8765
+"""
+import argparse
+import json
+import queue
+import socket
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.request import Request, urlopen
+
+from auth import format_time
+
+
+def event_to_dict(event):
+    d = event._asdict()
+    d["time"] = format_time(event.timestamp)
+    return d
+
+
+class HttpSink:
+    """POSTs each batch as a JSON array."""
+
+    def __init__(self, url, timeout=5.0, headers=None):
+        self.name = f"http:{url}"
+        self.url = url
+        self.timeout = timeout
+        self.headers = {"Content-Type": "application/json", **(headers or {})}
+
+    def send(self, batch):
+        body = json.dumps(batch).encode("utf-8")
+        with urlopen(Request(self.url, data=body, headers=self.headers, method="POST"),
+                     timeout=self.timeout) as resp:
+            resp.read()
+
+
+class UnixSocketSink:
+    """Writes each batch as newline-delimited JSON to a Unix stream socket."""
+
+    def __init__(self, path, timeout=5.0):
+        self.name = f"unix:{path}"
+        self.path = path
+        self.timeout = timeout
+
+    def send(self, batch):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+            s.settimeout(self.timeout)
+            s.connect(self.path)
+            s.sendall("".join(json.dumps(e) + "\n" for e in batch).encode("utf-8"))
+
+
+class ScriptSink:
+    """Runs a command per batch with the events as JSON lines on stdin."""
+
+    def __init__(self, command, timeout=10.0):
+        self.name = f"script:{command}"
+        self.command = command
+        self.timeout = timeout
+
+    def send(self, batch):
+        subprocess.run(self.command, input="".join(json.dumps(e) + "\n" for e in batch),
+                       text=True, shell=isinstance(self.command, str), timeout=self.timeout, check=True)
+
+
+SINKS = {
+    'http': lambda cfg: HttpSink(cfg["url"], cfg.get("timeout", 5.0), cfg.get("headers")),
+    'unix': lambda cfg: UnixSocketSink(cfg["path"], cfg.get("timeout", 5.0)),
+    'script': lambda cfg: ScriptSink(cfg["command"], cfg.get("timeout", 10.0)),
+}
+
+
+class _SinkWorker:
+    def __init__(self, sink, queue_size, batch_size, flush_interval, retries, backoff):
+        self.sink = sink
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self.backoff = backoff
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.retried = 0
+        self.last_error = None
+        self.thread = threading.Thread(target=self._run, name=f"events-{sink.name}", daemon=True)
+        self.thread.start()
+
+    def put(self, item):
+        while True:
+            try:
+                self.queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self.queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._deliver(batch)
+
+    def _deliver(self, batch):
+        for attempt in range(self.retries + 1):
+            try:
+                self.sink.send(batch)
+                self.sent += len(batch)
+                return
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                if attempt < self.retries:
+                    self.retried += 1
+                    time.sleep(self.backoff * (2 ** attempt))
+        self.failed += len(batch)
+
+    def stats(self):
+        return {"sink": self.sink.name, "sent": self.sent, "failed": self.failed, "dropped": self.dropped,
+                "retried": self.retried, "queued": self.queue.qsize(), "last_error": self.last_error}
+
+
+class EventBus:
+    """Fans scan events out to sinks; `publish()` never blocks."""
+
+    def __init__(self, sinks=(), queue_size=1000, batch_size=50, flush_interval=0.5, retries=3, backoff=0.5):
+        self.workers = [_SinkWorker(s, queue_size, batch_size, flush_interval, retries, backoff) for s in sinks]
+
+    def publish(self, event):
+        if not self.workers:
+            return
+        item = event_to_dict(event)
+        for worker in self.workers:
+            worker.put(item)
+
+    @property
+    def dropped(self):
+        return sum(w.dropped + w.failed for w in self.workers)
+
+    def stats(self):
+        return [w.stats() for w in self.workers]
+
+    def close(self, timeout=2.0):
+        """Flush what is queued (up to `timeout` seconds per sink) and stop the workers."""
+        for worker in self.workers:
+            worker.put(None)
+        for worker in self.workers:
+            worker.thread.join(timeout)
+
+
+def make_bus(events_config):
+    """EventBus from the `events` section of config.json."""
+    cfg = dict(events_config or {})
+    sinks = [SINKS[s["type"]](s) for s in cfg.pop("sinks", [])]
+    return EventBus(sinks, **cfg)
+
+
+def collect(port, host="127.0.0.1"):
+    """Local stand-in for a webhook receiver: prints every batch it is POSTed."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            for event in json.loads(body or b"[]"):
+                print(json.dumps(event), flush=True)
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    print(f"collecting on http://{host}:{port}/", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scan-event helpers")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("collect", help="Print events POSTed by an http sink")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--host", default="127.0.0.1")
+    args = parser.parse_args(argv)
+    return collect(args.port, args.host)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
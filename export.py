@@ -0,0 +1,168 @@
+"""Streaming export of the access logs for analysis.
+
+Entries come from `LogStore.read()` (all gates and cameras merged in time
+order, seeking straight to `--from`) and are written in row groups of
+`batch_rows`, so memory stays bounded however much history is exported.
+
+    python export.py access.parquet --from 2024-05-01 --to 2024-06-01
+    python export.py denied.feather --kind unauthorized
+    python export.py access.csv.gz
+
+The format follows the extension. Parquet (.parquet) and Arrow/Feather
+(.feather, .arrow) need pyarrow and are written with typed columns: `time`
+as a timestamp, `outcome` and `camera` dictionary-encoded. Without pyarrow
+they fall back to gzip CSV (the path gets `.csv.gz`). `.csv` is plain CSV.
+"""
+import argparse
+import csv
+import gzip
+import os
+import sys
+from datetime import datetime
+from itertools import islice
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+from config import load_config, CONFIG_FILE
+from logstore import AUTHORIZED, KINDS, TIME_FORMAT, UNAUTHORIZED, make_logstore
+
+COLUMNS = ("time", "code", "outcome", "camera")
+ARROW_FORMATS = {".parquet": "parquet", ".feather": "feather", ".arrow": "feather"}
+
+
+def export_format(path):
+    """(format, path) to write for `path`, falling back to gzip CSV without pyarrow."""
+    lower = path.lower()
+    if lower.endswith(".csv.gz"):
+        return "csv.gz", path
+    ext = os.path.splitext(lower)[1]
+    if ext in ARROW_FORMATS:
+        if pa is not None:
+            return ARROW_FORMATS[ext], path
+        return "csv.gz", os.path.splitext(path)[0] + ".csv.gz"
+    return "csv", path
+
+
+def _batches(entries, batch_rows):
+    while True:
+        batch = list(islice(entries, batch_rows))
+        if not batch:
+            return
+        yield batch
+
+
+# ── Writers ───────────────────────────────────────────────────────────────
+def _write_csv(entries, path, batch_rows, compressed):
+    opener = gzip.open if compressed else open
+    rows = 0
+    with opener(path, 'wt', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for batch in _batches(entries, batch_rows):
+            writer.writerows((e.time, e.code, e.kind, e.shard) for e in batch)
+            rows += len(batch)
+    return rows
+
+
+def _schema():
+    return pa.schema([
+        ("time", pa.timestamp("s")),
+        ("code", pa.string()),
+        ("outcome", pa.dictionary(pa.int8(), pa.string())),
+        ("camera", pa.dictionary(pa.int32(), pa.string())),
+    ])
+
+
+def _record_batch(batch, schema):
+    times = pc.strptime(pa.array([e.time for e in batch], pa.string()), format=TIME_FORMAT, unit="s")
+    return pa.record_batch([
+        times,
+        pa.array([e.code for e in batch], pa.string()),
+        pa.array([e.kind for e in batch], pa.string()).dictionary_encode().cast(schema.field("outcome").type),
+        pa.array([e.shard for e in batch], pa.string()).dictionary_encode().cast(schema.field("camera").type),
+    ], schema=schema)
+
+
+def _write_arrow(entries, path, batch_rows, fmt, compression):
+    schema = _schema()
+    tmp = path + ".tmp"
+    rows = 0
+    try:
+        if fmt == "parquet":
+            writer = pq.ParquetWriter(tmp, schema, compression=compression)
+        else:
+            # Feather v2 is the Arrow IPC file format.
+            writer = pa.ipc.new_file(tmp, schema, options=pa.ipc.IpcWriteOptions(compression=compression))
+        try:
+            for batch in _batches(entries, batch_rows):
+                record_batch = _record_batch(batch, schema)
+                if fmt == "parquet":
+                    writer.write_batch(record_batch, row_group_size=batch_rows)
+                else:
+                    writer.write_batch(record_batch)
+                rows += len(batch)
+        finally:
+            writer.close()
+        os.replace(tmp, path)
+    except BaseException:
+        # Leave no half-written file behind.
+        try:
+            os.remove(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+    return rows
+
+
+def export_logs(store, path, kinds=KINDS, start=None, end=None, batch_rows=65536, compression="zstd"):
+    """Write the entries of `kinds` between `start` and `end` (epoch seconds) to `path`.
+
+    Returns (rows, path actually written, format).
+    """
+    fmt, path = export_format(path)
+    entries = store.read(kinds, start, end)
+    if fmt in ("parquet", "feather"):
+        rows = _write_arrow(entries, path, batch_rows, fmt, compression)
+    else:
+        rows = _write_csv(entries, path, batch_rows, compressed=fmt == "csv.gz")
+    return rows, path, fmt
+
+
+def _parse_when(text):
+    for fmt in (TIME_FORMAT, "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(text, fmt).timestamp()
+        except ValueError:
+            pass
+    raise argparse.ArgumentTypeError(f"expected YYYY-MM-DD[ HH:MM[:SS]], got {text!r}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the access logs (Parquet, Feather or CSV)")
+    parser.add_argument("output", help="Output file; the extension picks the format")
+    parser.add_argument("--from", dest="start", type=_parse_when, help="First time to include (local time)")
+    parser.add_argument("--to", dest="end", type=_parse_when, help="Export up to, not including, this time")
+    parser.add_argument("--kind", choices=KINDS, action="append", help="Only these outcomes (default: both)")
+    parser.add_argument("--batch-rows", type=int, default=65536, help="Rows per row group / batch")
+    parser.add_argument("--compression", default="zstd", help="Parquet/Feather codec (zstd, lz4, snappy...)")
+    parser.add_argument("--config", default=CONFIG_FILE)
+    args = parser.parse_args(argv)
+
+    store = make_logstore(load_config(args.config)["logs"],
+                          legacy={AUTHORIZED: "Authorized_log.txt", UNAUTHORIZED: "Unauthorized_log.txt"})
+    rows, path, fmt = export_logs(store, args.output, tuple(args.kind or KINDS), args.start, args.end,
+                                  args.batch_rows, args.compression)
+    if path != args.output:
+        print("pyarrow is not installed; wrote gzip CSV instead", file=sys.stderr)
+    print(f"{rows} rows -> {path} ({fmt})", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
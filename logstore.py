@@ -0,0 +1,298 @@
+"""Per-gate, per-outcome log shards with a time-ordered merged reader.
+
+Each app instance and camera appends to its own pair of files in `logs/`,
+`<instance>-<camera>.authorized.log` and `<instance>-<camera>.unauthorized.log`,
+so gates sharing a directory never write to the same file. Lines keep the
+`YYYY-MM-DD HH:MM:SS  |  code` format of the original global logs, and those
+files (Authorized_log.txt, Unauthorized_log.txt) are still read as extra
+shards so older history stays visible.
+
+`read()` merges any set of shards with a heap: it holds one line per shard,
+however large the files are, and yields entries in timestamp order from an
+optional start time. Each shard is assumed to be in time order, which holds
+because it is only ever appended to as events happen.
+
+Every shard has a sparse `<shard>.tidx` sidecar that records the byte offset
+and timestamp of every `index_every`-th line. A read from a start time seeks
+straight to the nearest indexed line at or before it, so "last hour" costs
+the same on a year of history as on a day. The index is extended as lines
+are appended (only the new tail is scanned) and rebuilt from the log when
+the sidecar is missing or no longer matches it, e.g. after a clear.
+"""
+import glob
+import heapq
+import os
+import re
+import socket
+import threading
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+from datetime import datetime
+
+AUTHORIZED = "authorized"
+UNAUTHORIZED = "unauthorized"   # every denied outcome
+KINDS = (AUTHORIZED, UNAUTHORIZED)
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# `time` is the line's timestamp text (sortable); `shard` names the gate and camera.
+LogEntry = namedtuple("LogEntry", "time code kind shard")
+
+
+def _safe(text):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", str(text)).strip("_.") or "default"
+
+
+def time_key(timestamp):
+    """Epoch seconds as log timestamp text, for comparing with lines (None passes through)."""
+    return None if timestamp is None else datetime.fromtimestamp(timestamp).strftime(TIME_FORMAT)
+
+
+def parse_line(line):
+    """(time, code) of a log line, or None for headers and blank lines."""
+    stamp, sep, code = line.partition("|")
+    if not sep:
+        return None
+    return stamp.strip(), code.strip()
+
+
+def shard_label(path, kind):
+    name = os.path.basename(path)
+    suffix = f".{kind}.log"
+    return name[:-len(suffix)] if name.endswith(suffix) else os.path.splitext(name)[0]
+
+
+def _line_time(line):
+    """Timestamp text of a raw log line, or None for headers."""
+    stamp, sep, _ = line.partition(b"|")
+    return stamp.strip().decode("ascii", "replace") if sep else None
+
+
+class TimeIndex:
+    """Sparse timestamp -> byte offset index of one log, persisted in `<log>.tidx`.
+
+    The first line with a timestamp and every `every`-th one after it are
+    recorded. `refresh()` indexes lines appended since the last call and
+    starts over if the log was truncated or rewritten underneath it.
+    """
+
+    def __init__(self, path, every=1000):
+        self.path = path
+        self.sidecar = path + ".tidx"
+        self.every = every
+        self.header = f"#tidx\t{every}\n"
+        self._load()
+
+    def _reset(self):
+        self.times = []
+        self.offsets = array('q')
+        self.scanned = 0      # bytes of the log indexed so far
+        self.since = 0        # timestamped lines since the last record
+        self.saved = 0        # records already in the sidecar
+
+    def _load(self):
+        self._reset()
+        try:
+            with open(self.sidecar, 'r', encoding='utf-8') as f:
+                if f.readline() != self.header:
+                    return
+                for line in f:
+                    offset, sep, stamp = line.rstrip("\n").partition("\t")
+                    if not sep or not offset.isdigit() or (self.offsets and int(offset) <= self.offsets[-1]):
+                        break
+                    self.offsets.append(int(offset))
+                    self.times.append(stamp)
+        except OSError:
+            return
+        if self.offsets and self._matches():
+            # Re-read from the last record; its line is not recorded twice.
+            self.scanned = self.offsets[-1]
+            self.saved = len(self.offsets)
+        else:
+            self._reset()
+
+    def _matches(self):
+        """True if the last recorded line is still where the sidecar says it is."""
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(self.offsets[-1])
+                return _line_time(f.readline()) == self.times[-1]
+        except OSError:
+            return False
+
+    def refresh(self):
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            size = 0
+        if size < self.scanned or (self.offsets and not self._matches()):
+            self._reset()
+        if size == self.scanned:
+            return
+        pos = self.scanned
+        with open(self.path, 'rb') as f:
+            f.seek(pos)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break       # a line still being written
+                stamp = _line_time(line)
+                if stamp is not None:
+                    if self.since == 0 and (not self.offsets or pos > self.offsets[-1]):
+                        self.offsets.append(pos)
+                        self.times.append(stamp)
+                    self.since = (self.since + 1) % self.every
+                pos += len(line)
+        self.scanned = pos
+        self._save()
+
+    def _save(self):
+        if self.saved == len(self.offsets):
+            return
+        records = "".join(f"{self.offsets[i]}\t{self.times[i]}\n" for i in range(self.saved, len(self.offsets)))
+        try:
+            if self.saved == 0:
+                tmp = f"{self.sidecar}.{os.getpid()}.tmp"
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    f.write(self.header + records)
+                os.replace(tmp, self.sidecar)
+            else:
+                with open(self.sidecar, 'a', encoding='utf-8') as f:
+                    f.write(records)
+            self.saved = len(self.offsets)
+        except OSError:
+            pass        # read-only share: the in-memory index still works
+
+    def offset_before(self, stamp):
+        """Byte offset to start reading from to see every line with time >= `stamp`."""
+        i = bisect_left(self.times, stamp) - 1
+        return self.offsets[i] if i >= 0 else 0
+
+    def remove(self):
+        self._reset()
+        try:
+            os.remove(self.sidecar)
+        except FileNotFoundError:
+            pass
+
+
+def read_shard(path, kind, start=None, end=None, offset=0):
+    """LogEntry for each line of one shard with start <= time < end (timestamp text),
+    reading from byte `offset` (see TimeIndex.offset_before)."""
+    label = shard_label(path, kind)
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return
+    with f:
+        f.seek(offset)
+        for raw in f:
+            parsed = parse_line(raw.decode('utf-8', 'replace'))
+            if parsed is None:
+                continue
+            stamp, code = parsed
+            if start is not None and stamp < start:
+                continue
+            if end is not None and stamp >= end:
+                break
+            yield LogEntry(stamp, code, kind, label)
+
+
+class LogStore:
+    """Writes log lines to this instance's shards and reads all shards merged.
+
+    With `sharded` off, lines go to the `legacy` files ({kind: path}) as
+    before; reading still includes any shards found in `directory`.
+    """
+
+    def __init__(self, directory="logs", instance="", sharded=True, legacy=None, index_every=1000):
+        self.directory = directory
+        self.instance = _safe(instance or socket.gethostname())
+        self.sharded = sharded
+        self.legacy = {kind: path for kind, path in (legacy or {}).items() if path}
+        self.index_every = index_every
+        self.lock = threading.Lock()
+        self._files = {}
+        self._indexes = {}
+        self._unindexed = {}
+
+    def path(self, kind, camera="0"):
+        if not self.sharded:
+            return self.legacy.get(kind)
+        return os.path.join(self.directory, f"{self.instance}-{_safe(camera)}.{kind}.log")
+
+    def write(self, line, kind, camera="0"):
+        self.write_lines([line], kind, camera)
+
+    def write_lines(self, lines, kind, camera="0"):
+        """Append `lines` to one shard in a single write."""
+        path = self.path(kind, camera)
+        if path is None:
+            return
+        with self.lock:
+            f = self._files.get(path)
+            if f is None:
+                if self.sharded:
+                    os.makedirs(self.directory, exist_ok=True)
+                f = self._files[path] = open(path, 'a', encoding='utf-8')
+            f.write("".join(line + "\n" for line in lines))
+            f.flush()
+            # Keep the time index of our own shards current as they grow.
+            n = self._unindexed.get(path, 0) + len(lines)
+            if n >= self.index_every:
+                self._index(path)
+                n = 0
+            self._unindexed[path] = n
+
+    def _index(self, path):
+        """The refreshed TimeIndex of `path` (call with the lock held)."""
+        index = self._indexes.get(path)
+        if index is None:
+            index = self._indexes[path] = TimeIndex(path, self.index_every)
+        index.refresh()
+        return index
+
+    def shards(self, kinds=KINDS):
+        """(path, kind) of every existing shard of `kinds`, legacy files included."""
+        found = []
+        for kind in kinds:
+            legacy = self.legacy.get(kind)
+            if legacy and os.path.exists(legacy):
+                found.append((legacy, kind))
+            found.extend((p, kind) for p in sorted(glob.glob(os.path.join(self.directory, f"*.{kind}.log"))))
+        return found
+
+    def read(self, kinds=KINDS, start=None, end=None):
+        """Entries of all shards of `kinds` in timestamp order; `start`/`end` are epoch seconds."""
+        start, end = time_key(start), time_key(end)
+        streams = []
+        for path, kind in self.shards(kinds):
+            offset = 0
+            if start is not None:
+                with self.lock:
+                    offset = self._index(path).offset_before(start)
+            streams.append(read_shard(path, kind, start, end, offset))
+        return heapq.merge(*streams, key=lambda entry: entry.time)
+
+    def clear(self, kinds=KINDS):
+        """Empty every shard of `kinds` (truncated in place, so open writers carry on)."""
+        with self.lock:
+            for path, kind in self.shards(kinds):
+                header = f"=== {kind.upper()} LOG START ===\n" if path == self.legacy.get(kind) else ""
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(header)
+                index = self._indexes.pop(path, None) or TimeIndex(path, self.index_every)
+                index.remove()
+                self._unindexed.pop(path, None)
+
+    def close(self):
+        with self.lock:
+            for f in self._files.values():
+                f.close()
+            self._files = {}
+
+
+def make_logstore(log_config, legacy=None):
+    """LogStore from the `logs` section of config.json."""
+    cfg = log_config or {}
+    return LogStore(cfg.get("directory", "logs"), cfg.get("instance", ""), cfg.get("sharded", True), legacy,
+                    cfg.get("index_every", 1000))
@@ -1,5 +1,20 @@
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+
 import cv2
-from utils import decode_codes_silent, init_camera
+from utils import decode_codes_silent
+from auth import Authenticator, log_line, SCANNED, AUTHORIZED, UNAUTHORIZED
+from authindex import AuthIndex
+from config import load_config, CONFIG_FILE
+from decoders import make_decoder, resolve_backend
+from sources import open_source
+from events import make_bus
+from detector import make_detector
+from logstore import make_logstore
+from rules import make_rules
 
 
 def draw_barcode(img, barcode, color=(255, 0, 255)):
@@ -22,8 +37,79 @@ def cleanup(cap):
     cv2.destroyAllWindows()
 
 
-if __name__ == "__main__":
-    cap = init_camera()
+def _emit(event, as_json):
+    if as_json:
+        print(json.dumps(dict(event._asdict(), timestamp=round(event.timestamp, 3))), flush=True)
+    elif event.outcome == SCANNED:
+        print("Scanned:", event.code, flush=True)
+    else:
+        alert = f"  [{event.alert}]" if event.alert else ""
+        print(f"{event.outcome.upper():<13} {log_line(event)}{alert}", flush=True)
+
+
+def replay(args):
+    """Run a recording through decode -> cooldown -> authorization -> logging."""
+    config = load_config(args.config)
+    start = datetime.strptime(args.start, "%Y-%m-%d %H:%M:%S").timestamp() if args.start else None
+    source = open_source(args.replay, fps=args.fps, start=start)
+    if not source.isOpened():
+        print(f"Cannot open {args.replay}", file=sys.stderr)
+        return 1
+    mode = 'scanner' if args.mode == 'scan' else args.mode
+    # Escalate every missed frame and wait for all variants, so a recording
+    # is judged the same however fast this machine plays it back.
+    escalate = dict(config["decoder"].get("escalate") or {}, budget_ms=None, interval=0)
+    decoder = make_decoder(resolve_backend(config["decoder"]), config["decoder"]["symbols"].get(mode), escalate)
+    auth = Authenticator(
+        AuthIndex(args.authorized),
+        logs=make_logstore(config["logs"], legacy={AUTHORIZED: "Authorized_log.txt",
+                                                   UNAUTHORIZED: "Unauthorized_log.txt"}) if args.write_logs else None,
+        cooldown=args.cooldown,
+        camera=args.camera or args.replay,
+        valid_for=args.valid_for or None,
+        detector=make_detector(config["detector"]),
+        rules=make_rules(config["rules"]),
+    )
+    events = make_bus(config["events"])
+    counts = {}
+    t0 = time.perf_counter()
+    while True:
+        ok, frame = source.read()
+        if not ok:
+            break
+        decoded = decoder.decode(frame)
+        codes = [bc.data.decode("utf-8", "replace") for bc in decoded]
+        for event in auth.process_frame(codes, args.mode, source.timestamp):
+            counts[event.outcome] = counts.get(event.outcome, 0) + 1
+            events.publish(event)
+            _emit(event, args.json)
+        if args.display:
+            for bc in decoded:
+                draw_barcode(frame, bc)
+            show_frame(frame)
+            if cv2.waitKey(1) & 0xFF == ord("q"):
+                break
+    elapsed = time.perf_counter() - t0
+    events.close(timeout=10.0)
+    decoder.close()
+    if args.display:
+        cleanup(source)
+    else:
+        source.release()
+    summary = ", ".join(f"{k} {v}" for k, v in sorted(counts.items())) or "no codes"
+    print(f"{source.frames} frames in {elapsed:.2f}s ({source.frames / elapsed if elapsed else 0:.1f} fps): "
+          f"{summary}", file=sys.stderr)
+    if hasattr(decoder, "escalation_stats"):
+        e = decoder.escalation_stats()
+        print(f"escalated {e['escalations']} missed frames, rescued {e['rescued']} "
+              f"(+{e['added_ms_mean']:.1f} ms each)", file=sys.stderr)
+    return 0
+
+
+def live(args):
+    cam = load_config(args.config)["camera"]
+    cap = open_source(cam["source"] or cam["index"], cam["width"], cam["height"],
+                      profile=cam["profile"], latest=cam["latest_frame"])
     while True:
         success, img = cap.read()
         if not success:
@@ -36,3 +122,38 @@ if __name__ == "__main__":
         if cv2.waitKey(1) & 0xFF == ord("q"):
             break
     cleanup(cap)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["batch"]:
+        import batch
+        return batch.main(argv[1:])
+    parser = argparse.ArgumentParser(description="Standalone QR/barcode scanner and recording replay",
+                                     epilog="'main.py batch DIR ...' decodes a whole image directory (see batch.py)")
+    parser.add_argument("--replay", default="",
+                        help="Video file, image directory or glob to run through the pipeline instead of the camera")
+    parser.add_argument("--mode", choices=("auth", "add", "scan"), default="auth",
+                        help="Pipeline to replay through (default: auth); 'add' appends new codes to the authorized list")
+    parser.add_argument("--json", action="store_true", help="Emit one JSON event per line instead of log lines")
+    parser.add_argument("--write-logs", action="store_true",
+                        help="Also append to the authorized / unauthorized logs like the app does")
+    parser.add_argument("--display", action="store_true", help="Show frames while replaying (slower)")
+    parser.add_argument("--start", default="",
+                        help="Wall-clock time of the first frame, 'YYYY-MM-DD HH:MM:SS' (default: now)")
+    parser.add_argument("--fps", type=float, default=10.0, help="Frame rate assumed for image sequences")
+    parser.add_argument("--cooldown", type=float, default=2.0, help="Seconds a repeated code is ignored")
+    parser.add_argument("--valid-for", type=float, default=0,
+                        help="With --mode add, seconds until added codes expire (default: never)")
+    parser.add_argument("--camera", default="", help="Camera name recorded in events (default: the replay path)")
+    parser.add_argument("--authorized", default="myDataFile.txt", help="Authorized code list")
+    parser.add_argument("--config", default=CONFIG_FILE)
+    args = parser.parse_args(argv)
+    if args.replay:
+        return replay(args)
+    live(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
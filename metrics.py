@@ -0,0 +1,236 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Histogram bucket upper bounds in milliseconds (Prometheus-style, cumulative).
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+# ── Process stats ─────────────────────────────────────────────────────────
+# Shared by the benchmarks, the soak test and the diagnostics reports:
+# /proc where it exists, psutil elsewhere, 0 when neither is available.
+def rss_mb():
+    """Resident set size of this process in MB."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 1e6
+    except ImportError:
+        return 0.0
+
+
+def open_fds():
+    """Open file descriptors (handles on Windows) of this process."""
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        pass
+    try:
+        import psutil
+        proc = psutil.Process()
+        return proc.num_fds() if hasattr(proc, "num_fds") else proc.num_handles()
+    except ImportError:
+        return 0
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _StageTimer:
+    __slots__ = ("stats", "t0")
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.stats.add((time.perf_counter() - self.t0) * 1000.0)
+        return False
+
+
+class StageStats:
+    """Rolling latency window plus lifetime histogram for one pipeline stage."""
+
+    def __init__(self, window=300):
+        self.recent = deque(maxlen=window)
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.lock = threading.Lock()
+
+    def add(self, ms):
+        with self.lock:
+            self.recent.append(ms)
+            self.count += 1
+            self.total_ms += ms
+            for i, bound in enumerate(BUCKETS_MS):
+                if ms <= bound:
+                    self.buckets[i] += 1
+                    break
+            else:
+                self.buckets[-1] += 1
+
+    def summary(self):
+        with self.lock:
+            values = sorted(self.recent)
+            count, total = self.count, self.total_ms
+        if not values:
+            return {"count": count, "mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+        pick = lambda q: values[min(len(values) - 1, int(q * len(values)))]
+        return {
+            "count": count,
+            "mean": round(total / count, 3),
+            "p50": round(pick(0.50), 3),
+            "p95": round(pick(0.95), 3),
+            "p99": round(pick(0.99), 3),
+            "max": round(values[-1], 3),
+        }
+
+
+class Metrics:
+    """Per-stage timers for the scan loop.
+
+    When disabled, `stage()` hands back a shared no-op context manager so the
+    instrumented code pays only for one attribute lookup and a method call.
+    """
+
+    def __init__(self, enabled=False, window=300):
+        self.enabled = enabled
+        self.window = window
+        self.stages = {}
+        self.counters = {}
+        self.frame_times = deque(maxlen=window)
+        self.started = time.time()
+
+    def stage(self, name):
+        if not self.enabled:
+            return _NULL_TIMER
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages.setdefault(name, StageStats(self.window))
+        return _StageTimer(stats)
+
+    def observe(self, name, ms):
+        """Record a duration measured elsewhere (e.g. capture-to-decode latency)."""
+        if not self.enabled:
+            return
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages.setdefault(name, StageStats(self.window))
+        stats.add(ms)
+
+    def frame(self):
+        if self.enabled:
+            self.frame_times.append(time.perf_counter())
+
+    def set_counter(self, name, value):
+        self.counters[name] = value
+
+    def fps(self):
+        times = self.frame_times
+        if len(times) < 2:
+            return 0.0
+        span = times[-1] - times[0]
+        return (len(times) - 1) / span if span > 0 else 0.0
+
+    def summary(self):
+        return {name: stats.summary() for name, stats in sorted(self.stages.items())}
+
+    def overlay_text(self):
+        lines = [f"FPS {self.fps():5.1f}"]
+        for name, s in self.summary().items():
+            lines.append(f"{name:<8} p50 {s['p50']:6.1f}  p99 {s['p99']:6.1f} ms")
+        for name, value in sorted(self.counters.items()):
+            if value:
+                lines.append(f"{name} {value}")
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return {
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "uptime_s": round(time.time() - self.started, 1),
+            "fps": round(self.fps(), 2),
+            "stages": self.summary(),
+            "counters": dict(self.counters),
+        }
+
+    def to_prometheus(self):
+        out = [
+            "# HELP qrauth_fps Frames processed per second (rolling window).",
+            "# TYPE qrauth_fps gauge",
+            f"qrauth_fps {self.fps():.3f}",
+            "# HELP qrauth_stage_seconds Time spent in each scan-loop stage.",
+            "# TYPE qrauth_stage_seconds histogram",
+        ]
+        for name, stats in sorted(self.stages.items()):
+            with stats.lock:
+                buckets = list(stats.buckets)
+                count, total = stats.count, stats.total_ms
+            cumulative = 0
+            for bound, n in zip(BUCKETS_MS, buckets):
+                cumulative += n
+                out.append(f'qrauth_stage_seconds_bucket{{stage="{name}",le="{bound / 1000.0:g}"}} {cumulative}')
+            out.append(f'qrauth_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {count}')
+            out.append(f'qrauth_stage_seconds_sum{{stage="{name}"}} {total / 1000.0:.6f}')
+            out.append(f'qrauth_stage_seconds_count{{stage="{name}"}} {count}')
+        for name, value in sorted(self.counters.items()):
+            out.append(f"# TYPE qrauth_{name}_total counter")
+            out.append(f"qrauth_{name}_total {value}")
+        return "\n".join(out) + "\n"
+
+    def dump(self, path):
+        """Write a snapshot; `.prom`/`.txt` get the text exposition format, anything else JSON."""
+        if path.endswith((".prom", ".txt")):
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(self.to_dict(), indent=2)
+        tmp = path + ".tmp"
+        with open(tmp, 'w') as f:
+            f.write(content)
+        os.replace(tmp, path)
+
+    def serve(self, port, host="127.0.0.1"):
+        """Expose `/metrics` in Prometheus text format on a daemon thread."""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] == "/metrics":
+                    body = metrics.to_prometheus().encode()
+                    ctype = "text/plain; version=0.0.4"
+                elif self.path.split("?")[0] == "/metrics.json":
+                    body = json.dumps(metrics.to_dict()).encode()
+                    ctype = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
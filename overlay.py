@@ -0,0 +1,90 @@
+"""Code outlines painted over the camera preview.
+
+The scan loop never draws into capture frames. Decisions add shapes here
+instead, in frame coordinates, and every preview update paints the live
+shapes onto the downscaled pixmap with QPainter. A shape lasts `ttl`
+seconds and fades out over the last `fade` of them, so an outline lingers
+briefly after its code leaves the picture instead of flickering off.
+Because frames stay untouched they can be marked read-only and shared
+with the decoder, the tracker and the evidence recorder without copies.
+"""
+import time
+
+from PySide6.QtCore import QPointF, Qt
+from PySide6.QtGui import QColor, QFont, QPainter, QPen, QPolygonF
+
+
+class _Shape:
+    __slots__ = ("polygon", "color", "label", "born")
+
+    def __init__(self, polygon, color, label, born):
+        self.polygon = polygon
+        self.color = color
+        self.label = label
+        self.born = born
+
+
+class Overlay:
+    def __init__(self, ttl=0.6, fade=0.3, width=3):
+        self.ttl = ttl
+        self.fade = min(fade, ttl)
+        self.width = width
+        self.shapes = {}
+        self.last = {}
+
+    def add(self, key, polygon, color, label="", now=None):
+        """Outline `polygon` ([(x, y)] in frame pixels) in BGR `color`; replaces
+        the shape previously added under `key` (normally the code's data)."""
+        if len(self.last) >= 256 and key not in self.last:
+            self.last.clear()
+        self.last[key] = (color, label)
+        if not polygon:
+            return
+        b, g, r = color
+        self.shapes[key] = _Shape([QPointF(x, y) for x, y in polygon], QColor(r, g, b), label,
+                                  time.monotonic() if now is None else now)
+
+    def repeat(self, key, polygon, now=None):
+        """Outline `polygon` again with the color and label last added under
+        `key`, e.g. for a code held back by the cooldown; False if there are none."""
+        if key not in self.last:
+            return False
+        color, label = self.last[key]
+        self.add(key, polygon, color, label, now)
+        return True
+
+    def clear(self):
+        self.shapes.clear()
+        self.last.clear()
+
+    def paint(self, pixmap, frame_size, now=None):
+        """Draw the live shapes onto `pixmap`, scaled from `frame_size` (w, h)."""
+        now = time.monotonic() if now is None else now
+        for key in [k for k, s in self.shapes.items() if now - s.born >= self.ttl]:
+            del self.shapes[key]
+        if not self.shapes:
+            return pixmap
+        sx = pixmap.width() / frame_size[0]
+        sy = pixmap.height() / frame_size[1]
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.scale(sx, sy)
+        font = QFont()
+        font.setPixelSize(max(10, int(16 / sy)))
+        font.setBold(True)
+        painter.setFont(font)
+        for shape in self.shapes.values():
+            left = self.ttl - (now - shape.born)
+            color = QColor(shape.color)
+            if left < self.fade:
+                color.setAlphaF(max(0.0, left / self.fade))
+            pen = QPen(color, self.width / min(sx, sy))
+            pen.setJoinStyle(Qt.RoundJoin)
+            painter.setPen(pen)
+            polygon = QPolygonF(shape.polygon)
+            painter.drawPolygon(polygon)
+            if shape.label:
+                top_left = polygon.boundingRect().topLeft()
+                painter.drawText(QPointF(top_left.x(), top_left.y() - 6 / sy), shape.label)
+        painter.end()
+        return pixmap
@@ -0,0 +1,81 @@
+"""Multi-code rules: codes that only grant access together.
+
+A rule group lists codes that must all be presented within `window`
+seconds of each other, such as a staff badge and the tag of the vehicle
+it may drive through. A listed, valid member seen alone is answered with
+AWAITING (nothing is logged and the gate stays shut). When the last member
+turns up, every member is authorized at once and the group starts over.
+Codes outside all groups are not affected.
+
+    "rules": {"window": 10, "groups": [["BADGE-0042", "CAR-TAG-77"]]}
+"""
+from auth import AUTHORIZED, AWAITING
+
+
+class CodeRules:
+    def __init__(self, groups=(), window=10.0):
+        self.window = window
+        self.groups = [tuple(dict.fromkeys(str(code).strip() for code in group)) for group in groups]
+        self.groups = [g for g in self.groups if len(g) > 1]
+        self.member_of = {}
+        for group in self.groups:
+            for code in group:
+                self.member_of.setdefault(code, []).append(group)
+        self.seen = {}     # member code -> when it was last presented valid
+
+    def _complete(self, group, now):
+        return all(now - self.seen.get(code, float("-inf")) <= self.window for code in group)
+
+    def _grantable(self, group, now, present, valid, checked):
+        """True if every member of `group` counts now. Members seen in earlier
+        frames are re-checked with `valid` at grant time, since their window
+        may have ended since; one that fails is forgotten."""
+        if group not in checked:
+            ok = self._complete(group, now)
+            earlier = [code for code in group if code not in present]
+            if ok and earlier and valid is not None:
+                for code, still in zip(earlier, valid(earlier)):
+                    if not still:
+                        self.seen.pop(code, None)
+                        ok = False
+            checked[group] = ok
+        return checked[group]
+
+    def apply(self, codes, outcomes, now, valid=None):
+        """Adjust one frame's (codes, outcomes) for the rule groups.
+
+        Valid members become AWAITING until their group is complete; a group
+        completed by this frame authorizes all its members, and members seen
+        in earlier frames are appended so the grant covers the whole group.
+        `valid(codes)` returns whether each of those earlier members is still
+        authorized at `now`.
+        """
+        members = [i for i, (code, outcome) in enumerate(zip(codes, outcomes))
+                   if outcome == AUTHORIZED and code in self.member_of]
+        if not members:
+            return codes, outcomes
+        for i in members:
+            self.seen[codes[i]] = now
+        codes, outcomes = list(codes), list(outcomes)
+        present = set(codes)
+        completed, checked = [], {}
+        for i in members:
+            done = [g for g in self.member_of[codes[i]] if self._grantable(g, now, present, valid, checked)]
+            outcomes[i] = AUTHORIZED if done else AWAITING
+            completed.extend(g for g in done if g not in completed)
+        for group in completed:
+            for code in group:
+                if code not in present:
+                    codes.append(code)
+                    outcomes.append(AUTHORIZED)
+                    present.add(code)
+                self.seen.pop(code, None)
+        return codes, outcomes
+
+
+def make_rules(rules_config):
+    """CodeRules from the `rules` section of config.json, or None without groups."""
+    cfg = dict(rules_config or {})
+    if not cfg.get("groups"):
+        return None
+    return CodeRules(cfg["groups"], cfg.get("window", 10.0))
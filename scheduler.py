@@ -0,0 +1,72 @@
+import time
+
+import cv2
+import numpy as np
+
+
+class FrameScheduler:
+    """Paces the camera loop and gates decoding on frame changes.
+
+    Each tick compares a tiny grayscale thumbnail of the frame with the
+    previous one. Decoding only runs when enough pixels changed, for `settle`
+    seconds after the last change (autofocus/exposure catching up), or when
+    `force_every` seconds have passed without a decode. After `idle_after`
+    seconds without motion or detections the loop drops from the camera
+    frame rate to `idle_interval_ms`.
+    """
+
+    def __init__(self, fps=30, idle_after=10.0, idle_interval_ms=100,
+                 pixel_threshold=16, changed_fraction=0.01, settle=0.5,
+                 force_every=1.0, thumb_size=(80, 60)):
+        self.idle_after = idle_after
+        self.idle_interval_ms = idle_interval_ms
+        self.pixel_threshold = pixel_threshold
+        self.changed_fraction = changed_fraction
+        self.settle = settle
+        self.force_every = force_every
+        self.thumb_size = thumb_size
+        self.reset(fps)
+
+    def reset(self, fps=None):
+        self.frame_interval_ms = 1000.0 / min(fps, 60) if fps and fps > 1 else 1000.0 / 30
+        self._last_thumb = None
+        now = time.monotonic()
+        self.last_activity = now
+        self.last_change = now
+        self.last_decode = 0.0
+        self.skipped = 0
+
+    @property
+    def idle(self):
+        return time.monotonic() - self.last_activity > self.idle_after
+
+    def frame_changed(self, frame):
+        small = cv2.resize(frame, self.thumb_size, interpolation=cv2.INTER_AREA)
+        thumb = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        last, self._last_thumb = self._last_thumb, thumb
+        if last is None:
+            return True
+        diff = cv2.absdiff(thumb, last)
+        return np.count_nonzero(diff > self.pixel_threshold) > self.changed_fraction * diff.size
+
+    def should_decode(self, frame):
+        """Return True if `frame` is worth running through the decoder."""
+        now = time.monotonic()
+        changed = self.frame_changed(frame)
+        if changed:
+            self.last_activity = self.last_change = now
+        if (changed or now - self.last_change < self.settle
+                or now - self.last_decode >= self.force_every):
+            self.last_decode = now
+            return True
+        self.skipped += 1
+        return False
+
+    def note_detection(self):
+        self.last_activity = time.monotonic()
+
+    def next_interval_ms(self, elapsed_ms=0.0):
+        """Delay before the next tick, discounting time already spent on this one."""
+        if self.idle:
+            return self.idle_interval_ms
+        return max(1, int(self.frame_interval_ms - elapsed_ms))
@@ -0,0 +1,215 @@
+"""Evidence snapshots around denied scans.
+
+The scan loop pushes every frame into a bounded ring. When a scan is
+denied, the frame that was decoded, the `pre_roll` frames before it and
+the `post_roll` frames after it are JPEG-encoded on a worker pool and
+written to `snapshots/YYYYMMDD/HHMMSS_<code>/` together with the event as
+JSON. `push()` and `trigger()` only enqueue, so the scan loop never waits
+on encoding or the disk; frames are copied only if they are writable (the
+app marks its frames read-only). When the encoders fall behind, new work
+is dropped (and counted) instead. Old incidents are deleted oldest
+first to keep the directory under `quota_mb`.
+"""
+import json
+import os
+import re
+import shutil
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import cv2
+
+from events import event_to_dict
+
+
+def _safe(text, limit=40):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", str(text))[:limit].strip("_") or "code"
+
+
+class _Incident:
+    __slots__ = ("directory", "remaining", "index")
+
+    def __init__(self, directory, remaining):
+        self.directory = directory
+        self.remaining = remaining
+        self.index = 0
+
+
+class SnapshotRecorder:
+    def __init__(self, directory="snapshots", ring_size=30, pre_roll=5, post_roll=5, quality=85,
+                 workers=2, quota_mb=500, max_pending=200):
+        self.directory = directory
+        self.ring = deque(maxlen=max(ring_size, pre_roll + 1))
+        self.pre_roll = pre_roll
+        self.post_roll = post_roll
+        self.params = [cv2.IMWRITE_JPEG_QUALITY, int(quality)]
+        self.quota = int(quota_mb * 1024 * 1024)
+        self.max_pending = max_pending
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="snapshot")
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.saved = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_error = None
+        self._open = []
+        self._used = 0
+        self._incidents = {}   # directory -> bytes, oldest first
+        self._scanned = threading.Event()
+        # Count what earlier runs left behind off the calling thread.
+        self.pool.submit(self._scan_existing)
+
+    # ── Scan-loop side (never blocks) ─────────────────────────────────────
+    def push(self, frame, timestamp):
+        """Keep `frame` (a copy unless it is read-only); feeds post-roll of incidents still recording."""
+        if frame.flags.writeable:
+            frame = frame.copy()
+        self.ring.append((timestamp, frame))
+        if self._open:
+            still_open = []
+            for incident in self._open:
+                incident.index += 1
+                self._submit(self._write_frame, incident.directory, f"post_{incident.index:02d}.jpg", frame)
+                incident.remaining -= 1
+                if incident.remaining > 0:
+                    still_open.append(incident)
+            self._open = still_open
+
+    def trigger(self, event):
+        """Save the last pushed frame (the one `event` was decided on) with its pre/post-roll."""
+        if not self.ring:
+            return None
+        stamp = datetime.fromtimestamp(event.timestamp)
+        directory = os.path.join(self.directory, stamp.strftime("%Y%m%d"),
+                                 f"{stamp.strftime('%H%M%S')}_{int(stamp.microsecond / 1000):03d}_{_safe(event.code)}")
+        frames = list(self.ring)[-(self.pre_roll + 1):]
+        *before, (_, decided) = frames
+        self._submit(self._write_event, directory, event)
+        self._submit(self._write_frame, directory, "decision.jpg", decided)
+        for i, (_, frame) in enumerate(reversed(before), 1):
+            self._submit(self._write_frame, directory, f"pre_{i:02d}.jpg", frame)
+        if self.post_roll:
+            self._open.append(_Incident(directory, self.post_roll))
+        return directory
+
+    def save(self, frame, path):
+        """Encode and write one frame to `path` now, with the evidence settings.
+
+        A snapshot the user asked for is never queued behind (or dropped with)
+        background evidence; encoding or write errors are raised to the caller.
+        """
+        self._write_file(path, frame)
+
+    def _submit(self, fn, *args):
+        with self.lock:
+            if self.pending >= self.max_pending:
+                self.dropped += 1
+                return
+            self.pending += 1
+        self.pool.submit(self._run, fn, args)
+
+    # ── Worker side ───────────────────────────────────────────────────────
+    def _run(self, fn, args):
+        try:
+            written = fn(*args)
+            with self.lock:
+                self.saved += 1
+            if written:
+                self._account(written)
+        except Exception as e:
+            with self.lock:
+                self.errors += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+        finally:
+            with self.lock:
+                self.pending -= 1
+
+    def _write_file(self, path, frame):
+        ext = os.path.splitext(path)[1].lower() or ".png"
+        ok, data = cv2.imencode(ext, frame, self.params if ext in (".jpg", ".jpeg") else [])
+        if not ok:
+            raise ValueError(f"could not encode {path}")
+        with open(path, 'wb') as f:
+            f.write(data.tobytes())
+        return 0
+
+    def _write_frame(self, directory, name, frame):
+        ok, data = cv2.imencode(".jpg", frame, self.params)
+        if not ok:
+            raise ValueError("could not encode frame")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, name), 'wb') as f:
+            f.write(data.tobytes())
+        return len(data), directory
+
+    def _write_event(self, directory, event):
+        os.makedirs(directory, exist_ok=True)
+        body = json.dumps(event_to_dict(event), indent=2).encode("utf-8")
+        with open(os.path.join(directory, "event.json"), 'wb') as f:
+            f.write(body)
+        return len(body), directory
+
+    # ── Quota ─────────────────────────────────────────────────────────────
+    def _scan_existing(self):
+        incidents = []
+        try:
+            for day in sorted(os.listdir(self.directory)):
+                day_dir = os.path.join(self.directory, day)
+                if not os.path.isdir(day_dir):
+                    continue
+                for name in sorted(os.listdir(day_dir)):
+                    path = os.path.join(day_dir, name)
+                    if os.path.isdir(path):
+                        size = sum(e.stat().st_size for e in os.scandir(path) if e.is_file())
+                        incidents.append((path, size))
+        except OSError:
+            pass
+        with self.lock:
+            merged = {path: size for path, size in incidents if path not in self._incidents}
+            self._used += sum(merged.values())
+            merged.update(self._incidents)
+            self._incidents = merged
+        self._scanned.set()
+
+    def _account(self, written):
+        size, directory = written
+        self._scanned.wait()
+        with self.lock:
+            self._used += size
+            self._incidents[directory] = self._incidents.get(directory, 0) + size
+            victims = []
+            # Never delete the incident being written, even over quota.
+            while self._used > self.quota:
+                path = next(iter(self._incidents))
+                if path == directory:
+                    break
+                self._used -= self._incidents.pop(path)
+                victims.append(path)
+        for path in victims:
+            shutil.rmtree(path, ignore_errors=True)
+            parent = os.path.dirname(path)
+            try:
+                os.rmdir(parent)   # the day directory, once empty
+            except OSError:
+                pass
+
+    def stats(self):
+        with self.lock:
+            return {"saved": self.saved, "pending": self.pending, "dropped": self.dropped,
+                    "errors": self.errors, "used_mb": round(self._used / 1048576, 1),
+                    "last_error": self.last_error}
+
+    def close(self):
+        """Stop recording post-roll and wait for queued encodes to finish."""
+        self._open = []
+        self.pool.shutdown(wait=True)
+
+
+def make_recorder(snapshot_config):
+    """SnapshotRecorder from the `snapshots` section of config.json, or None when disabled."""
+    cfg = dict(snapshot_config or {})
+    if not cfg.pop("enabled", True):
+        return None
+    return SnapshotRecorder(**cfg)
@@ -0,0 +1,419 @@
+"""Sustained-load soak test for the authentication path.
+
+Feeds a synthetic stream of camera frames and decoded codes through the
+scan path for as long as asked, and samples latency percentiles, RSS,
+open file descriptors and the size of the logs and evidence on disk at
+regular intervals:
+
+    python soak.py --duration 14400 --rate 15 --out soak.json
+    python soak.py --target app --duration 3600 --timeline soak.jsonl
+    python soak.py --duration 600 --baseline soak.json
+
+`--target core` (the default) drives auth.Authenticator plus the event bus
+and snapshot recorder without any GUI. `--target app` runs the real
+QRAuthApp on the offscreen Qt platform and calls its `_camera_tick` with
+a synthetic capture and decoder, so cooldown, detection, evidence,
+tracking, preview and UI updates all run as they do at a gate. Everything
+is written to a scratch directory, never to the real lists and logs.
+
+At the end, trends are fitted over the samples after warm-up. Memory or
+descriptor growth, latency that worsens over the run, a run that falls
+behind the requested rate, or a worse result than `--baseline` are
+printed as REGRESSION lines and make the exit code 1.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import string
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from benchmark import _environment, percentile
+from config import load_config, CONFIG_FILE
+from metrics import open_fds, rss_mb
+from tracker import TrackedCode
+
+
+def _disk_bytes(path):
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                pass
+    return total
+
+
+def _slope_per_hour(samples, key):
+    """Least-squares slope of `key` against elapsed time, per hour."""
+    xs = [s["elapsed_s"] / 3600.0 for s in samples]
+    ys = [s[key] for s in samples]
+    if len(xs) < 2 or xs[-1] == xs[0]:
+        return 0.0
+    mx, my = sum(xs) / len(xs), sum(ys) / len(ys)
+    var = sum((x - mx) ** 2 for x in xs)
+    return sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / var if var else 0.0
+
+
+# ── Synthetic input ───────────────────────────────────────────────────────
+class ScanStream:
+    """Frames and the codes "decoded" from them, in a configurable mix."""
+
+    def __init__(self, authorized, seed=0, authorized_ratio=0.7, repeat_ratio=0.3,
+                 codes_per_frame=1, empty_ratio=0.5, width=640, height=480):
+        self.rng = random.Random(seed)
+        self.authorized = authorized
+        self.authorized_ratio = authorized_ratio
+        self.repeat_ratio = repeat_ratio
+        self.codes_per_frame = codes_per_frame
+        self.empty_ratio = empty_ratio
+        # A few frames with a block in different places, so the motion gate
+        # sees change; smooth enough to encode like real footage.
+        base = np.tile(np.linspace(60, 190, width, dtype=np.uint8), (height, 1))
+        self.frames = []
+        for i in range(8):
+            frame = cv2.cvtColor(base, cv2.COLOR_GRAY2BGR)
+            x = 40 + i * (width - 200) // 8
+            frame[height // 2:height // 2 + 120, x:x + 120] = (30 * i, 255 - 30 * i, 128)
+            self.frames.append(frame)
+        self.width, self.height = width, height
+        self.last = []
+        self.count = 0
+        self.codes = []
+
+    def _code(self):
+        rng = self.rng
+        if self.last and rng.random() < self.repeat_ratio:
+            return rng.choice(self.last)
+        if rng.random() < self.authorized_ratio:
+            return rng.choice(self.authorized)
+        return "UNK-" + "".join(rng.choice(string.ascii_uppercase + string.digits) for _ in range(10))
+
+    def next(self):
+        frame = self.frames[self.count % len(self.frames)]
+        self.count += 1
+        if self.rng.random() < self.empty_ratio:
+            self.codes = []
+        else:
+            n = self.rng.randint(1, self.codes_per_frame)
+            self.codes = [self._code() for _ in range(n)]
+            self.last = self.codes
+        return frame
+
+    def barcodes(self):
+        out = []
+        for i, code in enumerate(self.codes):
+            x, y = 40 + 150 * i % (self.width - 140), 60
+            out.append(TrackedCode(code.encode("utf-8"), "QRCODE", (x, y, 120, 120),
+                                   [(x, y), (x + 120, y), (x + 120, y + 120), (x, y + 120)]))
+        return out
+
+
+class _SyntheticCapture:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def read(self):
+        return True, self.stream.next()
+
+    def get(self, prop):
+        return 0.0
+
+    def isOpened(self):
+        return True
+
+    def release(self):
+        pass
+
+
+class _SyntheticDecoder:
+    def __init__(self, stream):
+        self.stream = stream
+        self.errors = 0
+        self.last_error = None
+
+    def decode(self, frame):
+        return self.stream.barcodes()
+
+    def close(self):
+        pass
+
+
+# ── Targets ───────────────────────────────────────────────────────────────
+class CoreTarget:
+    """The scan path without Qt: cooldown, lookup, detection, logging, events, evidence."""
+
+    def __init__(self, config, stream, authorized_file):
+        from auth import Authenticator, LOCKED_OUT
+        from authindex import AuthIndex
+        from detector import make_detector, DENIED
+        from events import make_bus
+        from logstore import make_logstore
+        from snapshots import make_recorder
+
+        self.stream = stream
+        self.index = AuthIndex(authorized_file)
+        self.logs = make_logstore(config["logs"])
+        self.auth = Authenticator(self.index, logs=self.logs, detector=make_detector(config["detector"]))
+        self.events = make_bus(config["events"])
+        self.snapshots = make_recorder(config["snapshots"])
+        self.denied = DENIED + (LOCKED_OUT,)
+
+    def step(self):
+        frame = self.stream.next()
+        now = time.time()
+        if self.snapshots is not None:
+            self.snapshots.push(frame, now)
+        codes = [bc.data.decode("utf-8") for bc in self.stream.barcodes()]
+        denied = None
+        for event in self.auth.process_frame(codes, 'auth', now):
+            self.events.publish(event)
+            if denied is None and event.outcome in self.denied:
+                denied = event
+        if self.snapshots is not None and denied is not None:
+            self.snapshots.trigger(denied)
+
+    def close(self):
+        self.events.close()
+        if self.snapshots is not None:
+            self.snapshots.close()
+        self.logs.close()
+        self.index.close()
+
+
+class AppTarget:
+    """QRAuthApp's real camera tick on the offscreen platform, with synthetic capture and decoding."""
+
+    def __init__(self, config, stream, authorized_file, switch_every=0.0):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PySide6.QtWidgets import QApplication
+        import ui_app
+
+        self.app = QApplication.instance() or QApplication([])
+        self.window = w = ui_app.QRAuthApp(config=config)
+        w.sound_enabled = False
+        w.show()
+        self.stream = stream
+        self.switch_every = switch_every
+        self.last_switch = time.monotonic()
+        self._enter_auth()
+
+    def _enter_auth(self):
+        w = self.window
+        w._activate_view('auth', w._build_auth, mode='auth')
+        w.cap = _SyntheticCapture(self.stream)
+        w.decoders['auth'] = _SyntheticDecoder(self.stream)
+        w.camera_running = True
+
+    def step(self):
+        w = self.window
+        if self.switch_every and time.monotonic() - self.last_switch >= self.switch_every:
+            # Navigate away and back, as an operator would during a shift.
+            w._show_welcome()
+            self.app.processEvents()
+            self._enter_auth()
+            self.last_switch = time.monotonic()
+        w._camera_tick()
+        self.app.processEvents()
+
+    def close(self):
+        self.window.close()
+        self.app.processEvents()
+
+
+# ── Run ───────────────────────────────────────────────────────────────────
+def _write_authorized(path, count, rng):
+    alphabet = string.ascii_uppercase + string.digits
+    codes = ["AUTH-" + "".join(rng.choice(alphabet) for _ in range(12)) for _ in range(count)]
+    with open(path, 'w') as f:
+        f.write("".join(code + "\n" for code in codes))
+    return codes
+
+
+def _sample(start, latencies, frames, workdir):
+    latencies.sort()
+    return {
+        "elapsed_s": round(time.monotonic() - start, 1),
+        "frames": frames,
+        "rate": 0.0,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "max_ms": round(latencies[-1], 3) if latencies else 0.0,
+        "rss_mb": round(rss_mb(), 1),
+        "fds": open_fds(),
+        "log_mb": round(_disk_bytes(os.path.join(workdir, "logs")) / 1e6 + sum(
+            os.path.getsize(p) for p in ("Authorized_log.txt", "Unauthorized_log.txt") if os.path.exists(p)) / 1e6, 3),
+        "disk_mb": round(_disk_bytes(workdir) / 1e6, 2),
+    }
+
+
+def analyse(samples, args):
+    """Trends over the post-warm-up samples, and the regressions they show."""
+    steady = [s for s in samples if s["elapsed_s"] >= args.warmup] or samples
+    quarter = max(1, len(steady) // 4)
+    first, last = steady[:quarter], steady[-quarter:]
+    mean = lambda rows, key: sum(r[key] for r in rows) / len(rows)
+    summary = {
+        "samples": len(samples),
+        "rss_mb_per_hour": round(_slope_per_hour(steady, "rss_mb"), 2),
+        "fds_per_hour": round(_slope_per_hour(steady, "fds"), 2),
+        "log_mb_per_hour": round(_slope_per_hour(steady, "log_mb"), 3),
+        "disk_mb_per_hour": round(_slope_per_hour(steady, "disk_mb"), 2),
+        "p99_ms_first": round(mean(first, "p99_ms"), 3),
+        "p99_ms_last": round(mean(last, "p99_ms"), 3),
+        "p99_ms_overall": round(percentile(sorted(s["p99_ms"] for s in steady), 50), 3),
+        "rate_last": round(mean(last, "rate"), 2),
+        "fds_growth": max(s["fds"] for s in steady) - steady[0]["fds"],
+    }
+    problems = []
+    if len(steady) >= 4:
+        if summary["rss_mb_per_hour"] > args.max_rss_growth:
+            problems.append(f"RSS grows {summary['rss_mb_per_hour']} MB/hour (limit {args.max_rss_growth})")
+        if summary["p99_ms_first"] and summary["p99_ms_last"] > summary["p99_ms_first"] * (1 + args.latency_tolerance):
+            problems.append(f"p99 latency {summary['p99_ms_first']} ms -> {summary['p99_ms_last']} ms over the run")
+    if summary["fds_growth"] > args.max_fd_growth:
+        problems.append(f"open file descriptors grew by {summary['fds_growth']}")
+    if summary["rate_last"] < args.rate * 0.9:
+        problems.append(f"fell behind: {summary['rate_last']} frames/s of {args.rate} requested")
+    return summary, problems
+
+
+def compare_soak(summary, baseline, tolerance):
+    old = baseline.get("summary", {})
+    problems = []
+    for key in ("p99_ms_overall", "rss_mb_per_hour"):
+        if key in old and summary[key] > max(old[key], 0.0) * (1 + tolerance) + 0.5:
+            problems.append(f"{key}: {old[key]} -> {summary[key]} (baseline)")
+    return problems
+
+
+def run(args):
+    config = load_config(args.config)
+    rng = random.Random(args.seed)
+    workdir = args.workdir or tempfile.mkdtemp(prefix="qrauth_soak_")
+    os.makedirs(workdir, exist_ok=True)
+    cwd = os.getcwd()
+    timeline = open(args.timeline, 'a') if args.timeline else None
+    os.chdir(workdir)
+    try:
+        authorized = _write_authorized("myDataFile.txt", args.codes, rng)
+        stream = ScanStream(authorized, args.seed, args.authorized_ratio, args.repeat_ratio,
+                            args.codes_per_frame, args.empty_ratio)
+        config["camera"]["source"] = ""
+        config["sync"].update(serve_port=0, peer="")
+        if args.target == "app":
+            target = AppTarget(config, stream, "myDataFile.txt", args.switch_every)
+        else:
+            target = CoreTarget(config, stream, "myDataFile.txt")
+
+        samples, latencies = [], []
+        start = time.monotonic()
+        next_sample = start + args.sample_every
+        frames = last_frames = 0
+        interval = 1.0 / args.rate
+        next_frame = start
+        try:
+            while time.monotonic() - start < args.duration:
+                t0 = time.perf_counter()
+                target.step()
+                latencies.append((time.perf_counter() - t0) * 1000.0)
+                frames += 1
+                next_frame += interval
+                delay = next_frame - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_frame = time.monotonic()   # behind: do not try to catch up in a burst
+                now = time.monotonic()
+                if now >= next_sample:
+                    s = _sample(start, latencies, frames, workdir)
+                    s["rate"] = round((frames - last_frames) / args.sample_every, 2)
+                    samples.append(s)
+                    if timeline:
+                        timeline.write(json.dumps(s) + "\n")
+                        timeline.flush()
+                    print(f"{s['elapsed_s']:>8.0f}s  {s['rate']:>6.1f} f/s  p50 {s['p50_ms']:>7.2f}  "
+                          f"p99 {s['p99_ms']:>7.2f} ms  rss {s['rss_mb']:>7.1f} MB  fds {s['fds']:>4}  "
+                          f"log {s['log_mb']:>7.2f} MB  disk {s['disk_mb']:>7.1f} MB", file=sys.stderr)
+                    latencies, last_frames = [], frames
+                    next_sample += args.sample_every
+        finally:
+            target.close()
+    finally:
+        os.chdir(cwd)
+        if timeline:
+            timeline.close()
+        if not args.workdir and not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if not samples:
+        raise SystemExit("run shorter than one --sample-every interval; nothing to report")
+    summary, problems = analyse(samples, args)
+    report = {
+        "benchmark": "soak",
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "environment": _environment(),
+        "settings": {k: v for k, v in vars(args).items() if k not in ("out", "baseline", "timeline")},
+        "samples": samples,
+        "summary": summary,
+    }
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            problems += compare_soak(summary, json.load(f), args.latency_tolerance)
+    report["regressions"] = problems
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Soak test for the authentication path")
+    parser.add_argument("--target", choices=("core", "app"), default="core",
+                        help="GUI-free scan path, or the real app on the offscreen Qt platform")
+    parser.add_argument("--duration", type=float, default=3600.0, help="Seconds to run")
+    parser.add_argument("--rate", type=float, default=15.0, help="Frames per second to feed")
+    parser.add_argument("--authorized-ratio", type=float, default=0.7, help="Share of codes that are authorized")
+    parser.add_argument("--repeat-ratio", type=float, default=0.3, help="Share of codes repeating the previous frame's")
+    parser.add_argument("--codes-per-frame", type=int, default=2, help="Up to this many codes in a frame")
+    parser.add_argument("--empty-ratio", type=float, default=0.5, help="Share of frames without any code")
+    parser.add_argument("--codes", type=int, default=10000, help="Size of the authorized list")
+    parser.add_argument("--switch-every", type=float, default=300.0,
+                        help="With --target app, leave and re-enter the view this often (0 = never)")
+    parser.add_argument("--sample-every", type=float, default=60.0, help="Seconds between samples")
+    parser.add_argument("--warmup", type=float, default=120.0, help="Seconds excluded from trends")
+    parser.add_argument("--max-rss-growth", type=float, default=10.0, help="MB/hour of RSS growth tolerated")
+    parser.add_argument("--max-fd-growth", type=int, default=3, help="Extra open descriptors tolerated")
+    parser.add_argument("--latency-tolerance", type=float, default=0.5,
+                        help="Allowed relative p99 increase (over the run, and against --baseline)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--config", default=CONFIG_FILE, help="App settings to run with")
+    parser.add_argument("--workdir", default="", help="Scratch directory (default: a temporary one)")
+    parser.add_argument("--keep", action="store_true", help="Keep the temporary scratch directory")
+    parser.add_argument("--timeline", default="", help="Append every sample to this JSONL file as it is taken")
+    parser.add_argument("--out", default="", help="Write the JSON report here")
+    parser.add_argument("--baseline", default="", help="Compare against a previous report")
+    args = parser.parse_args(argv)
+    args.config = os.path.abspath(args.config) if args.config and os.path.exists(args.config) else None
+    args.timeline = os.path.abspath(args.timeline) if args.timeline else ""
+
+    report = run(args)
+    summary = report["summary"]
+    print(f"RSS {summary['rss_mb_per_hour']:+.2f} MB/h  fds {summary['fds_per_hour']:+.2f}/h  "
+          f"log {summary['log_mb_per_hour']:+.3f} MB/h  disk {summary['disk_mb_per_hour']:+.2f} MB/h  "
+          f"p99 {summary['p99_ms_first']} -> {summary['p99_ms_last']} ms")
+    for line in report["regressions"]:
+        print("REGRESSION:", line)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 1 if report["regressions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
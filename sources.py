@@ -0,0 +1,376 @@
+import glob
+import os
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+from utils import init_camera
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.webp')
+
+
+class FrameSource:
+    """VideoCapture-shaped frame source.
+
+    `read()`, `get()`, `isOpened()` and `release()` behave like
+    `cv2.VideoCapture`, so a source can stand in for the camera anywhere
+    (including `CameraSession.open_fn`). After each successful `read()`,
+    `timestamp` holds the frame's capture time in epoch seconds. For
+    recordings that is `start` plus the position in the recording, so
+    cooldowns and log times follow the footage, not the replay speed.
+    `realtime` is False for sources that can be consumed as fast as
+    decoding allows.
+
+    Live sources also set `captured_at`, the `time.monotonic()` moment the
+    frame was captured, so the time a frame spent queued before decoding
+    can be measured. `grab()` + `retrieve()` split a read like OpenCV's.
+    """
+
+    name = 'source'
+    realtime = False
+
+    def __init__(self, start=None):
+        self.start = time.time() if start is None else start
+        self.timestamp = self.start
+        self.captured_at = None
+        self.frames = 0
+        self._grabbed = None
+
+    def read(self):
+        raise NotImplementedError
+
+    def grab(self):
+        self._grabbed = self.read()
+        return self._grabbed[0]
+
+    def retrieve(self):
+        grabbed, self._grabbed = self._grabbed or (False, None), None
+        return grabbed
+
+    def get(self, prop):
+        return 0.0
+
+    def isOpened(self):
+        return True
+
+    def release(self):
+        pass
+
+
+class CameraSource(FrameSource):
+    name = 'camera'
+    realtime = True
+
+    def __init__(self, camera_id=0, width=640, height=480, profile=None):
+        super().__init__()
+        self.cap = init_camera(camera_id, width, height, profile)
+
+    def _stamp(self):
+        now = time.monotonic()
+        # V4L2 reports the driver's buffer timestamp (CLOCK_MONOTONIC, ms) as
+        # POS_MSEC; use it when it is plausible, else the time read returned.
+        pos = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+        self.captured_at = pos if 0.0 <= now - pos < 10.0 else now
+        self.timestamp = time.time() - (now - self.captured_at)
+        self.frames += 1
+
+    def read(self):
+        ok, frame = self.cap.read()
+        if ok:
+            self._stamp()
+        return ok, frame
+
+    def grab(self):
+        ok = self.cap.grab()
+        if ok:
+            self._stamp()
+        return ok
+
+    def retrieve(self):
+        return self.cap.retrieve()
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def release(self):
+        self.cap.release()
+
+
+class VideoFileSource(FrameSource):
+    name = 'video'
+
+    def __init__(self, path, start=None):
+        super().__init__(start)
+        self.path = path
+        self.cap = cv2.VideoCapture(path)
+
+    def read(self):
+        ok, frame = self.cap.read()
+        if ok:
+            self.timestamp = self.start + self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+            self.frames += 1
+        return ok, frame
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageSequenceSource(FrameSource):
+    """Numbered stills (a directory or glob), played back at `fps`."""
+
+    name = 'images'
+
+    def __init__(self, pattern, fps=10.0, start=None):
+        super().__init__(start)
+        if os.path.isdir(pattern):
+            paths = [os.path.join(pattern, n) for n in os.listdir(pattern)]
+        else:
+            paths = glob.glob(pattern)
+        self.paths = sorted(p for p in paths if p.lower().endswith(IMAGE_EXTENSIONS))
+        self.fps = fps
+        self.pos = 0
+
+    def read(self):
+        while self.pos < len(self.paths):
+            frame = cv2.imread(self.paths[self.pos])
+            self.pos += 1
+            if frame is not None:
+                self.timestamp = self.start + (self.pos - 1) / self.fps
+                self.frames += 1
+                return True, frame
+        return False, None
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return float(len(self.paths))
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.pos)
+        return 0.0
+
+    def isOpened(self):
+        return bool(self.paths)
+
+
+class FakeCamera(FrameSource):
+    """Simulated capture device with a driver-style frame queue.
+
+    Frames are "captured" every 1/`fps` seconds into a queue of
+    `buffersize` slots; frames arriving while it is full are dropped, and
+    `read()` returns the oldest queued frame, just as a V4L2 device with
+    several buffers does. A consumer slower than the camera therefore sees
+    frames up to `buffersize` reads old. Each frame shows its sequence
+    number on `image` (a file path) or a grey background.
+    """
+
+    name = 'fake'
+    realtime = True
+
+    def __init__(self, fps=30.0, buffersize=4, width=640, height=480, image=None):
+        super().__init__()
+        self.fps = fps
+        self.buffersize = buffersize
+        self.background = None
+        if image:
+            self.background = cv2.resize(cv2.imread(image), (width, height))
+        if self.background is None:
+            self.background = np.full((height, width, 3), 128, np.uint8)
+        self.epoch = time.monotonic()
+        self.tick = 0
+        self.queue = deque()
+        self.captured = 0
+        self.dropped = 0
+        self.opened = True
+
+    def _capture_until(self, now):
+        due = int((now - self.epoch) * self.fps)
+        while self.tick < due:
+            self.tick += 1
+            self.captured += 1
+            if len(self.queue) < self.buffersize:
+                self.queue.append(self.tick)
+            else:
+                self.dropped += 1
+
+    def grab(self):
+        if not self.opened:
+            return False
+        self._capture_until(time.monotonic())
+        while not self.queue:
+            time.sleep(max(0.0, self.epoch + (self.tick + 1) / self.fps - time.monotonic()))
+            self._capture_until(time.monotonic())
+        seq = self.queue.popleft()
+        self.captured_at = self.epoch + seq / self.fps
+        self.timestamp = time.time() - (time.monotonic() - self.captured_at)
+        self.frames += 1
+        self._grabbed = seq
+        return True
+
+    def retrieve(self):
+        if self._grabbed is None:
+            return False, None
+        frame = self.background.copy()
+        cv2.putText(frame, f"#{self._grabbed}", (10, frame.shape[0] - 12),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+        self._grabbed = None
+        return True, frame
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_BUFFERSIZE:
+            return float(self.buffersize)
+        return 0.0
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_BUFFERSIZE:
+            self.buffersize = max(1, int(value))
+            return True
+        return False
+
+    def isOpened(self):
+        return self.opened
+
+    def release(self):
+        self.opened = False
+
+
+class LatestFrameGrabber(FrameSource):
+    """Keeps only the newest frame of a live source.
+
+    A daemon thread calls `grab()` on the source as fast as it delivers,
+    which drains the driver queue without decoding anything; `read()`
+    then retrieves (decodes) only the most recent grab. Grab and retrieve
+    never overlap on the device: a reader waits for the grab in progress,
+    which is the freshest frame anyway, and the grabber holds off until
+    the reader is done. `stale` counts grabs nobody read. `pause()` stops
+    grabbing altogether (the device stays open) until `resume()`.
+
+    `read()` waits up to `wait` seconds for a frame newer than the last
+    one read (default: `timeout`, which also bounds `release()`). A GUI
+    loop passes `wait=0` so a stalled camera fails the read at once
+    instead of freezing the event loop.
+    """
+
+    def __init__(self, source, timeout=2.0, wait=None):
+        super().__init__()
+        self.source = source
+        self.name = source.name
+        self.realtime = True
+        self.timeout = timeout
+        self.wait = timeout if wait is None else wait
+        self.stale = 0
+        self._device = threading.Lock()
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._read_seq = 0
+        self._readers = 0
+        self._stamps = None
+        self._running = True
+        self._paused = False
+        self._thread = threading.Thread(target=self._run, name="frame-grabber", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        source = self.source
+        while self._running:
+            with self._cond:
+                self._cond.wait_for(lambda: (not self._readers and not self._paused) or not self._running)
+            with self._device:
+                ok = self._running and source.grab()
+                with self._cond:
+                    if not ok:
+                        self._running = False
+                    else:
+                        if self._seq > self._read_seq:
+                            self.stale += 1
+                        self._seq += 1
+                        self._stamps = (source.timestamp, source.captured_at)
+                    self._cond.notify_all()
+
+    def read(self):
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq > self._read_seq or not self._running, self.wait):
+                return False, None
+            if self._seq == self._read_seq:
+                return False, None
+            self._readers += 1
+        try:
+            with self._device:
+                with self._cond:
+                    self._read_seq = self._seq
+                    self.timestamp, self.captured_at = self._stamps
+                ok, frame = self.source.retrieve()
+        finally:
+            with self._cond:
+                self._readers -= 1
+                self._cond.notify_all()
+        if ok:
+            self.frames += 1
+        return ok, frame
+
+    def pause(self):
+        """Stop grabbing; the grab in progress, if any, still completes."""
+        with self._cond:
+            self._paused = True
+
+    def resume(self):
+        """Grab again; the last frame from before the pause is not returned."""
+        with self._cond:
+            self._paused = False
+            self._read_seq = self._seq
+            self._cond.notify_all()
+
+    def get(self, prop):
+        return self.source.get(prop)
+
+    def isOpened(self):
+        return self.source.isOpened()
+
+    def release(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._thread.join(self.timeout)
+        self.source.release()
+
+
+def open_source(spec, width=640, height=480, fps=10.0, start=None, profile=None, latest=False, wait=None):
+    """Camera index ("0"), "fake[:fps[:buffersize[:image]]]", image directory/glob,
+    or video file path -> FrameSource.
+
+    `profile` (see utils.CAMERA_PROFILES) applies to cameras; with `latest`
+    live sources are wrapped in a LatestFrameGrabber whose reads wait at
+    most `wait` seconds for a frame.
+    """
+    spec = str(spec)
+    if spec.isdigit() or spec == "fake" or spec.startswith("fake:"):
+        if spec.isdigit():
+            source = CameraSource(int(spec), width, height, profile)
+        else:
+            opts = spec.split(":", 3)[1:]
+            source = FakeCamera(float(opts[0]) if opts and opts[0] else 30.0,
+                                int(opts[1]) if len(opts) > 1 and opts[1] else 4,
+                                width, height, opts[2] if len(opts) > 2 else None)
+        return LatestFrameGrabber(source, wait=wait) if latest else source
+    if os.path.isdir(spec) or any(c in spec for c in '*?['):
+        return ImageSequenceSource(spec, fps, start)
+    return VideoFileSource(spec, start)
@@ -10,12 +10,57 @@ COLORS = {
     'success': '#00b894',
     'danger': '#e74c3c',
     'warning': '#f39c12',
+    'orange': '#e67e22',
     'text': '#ffffff',
     'text_dim': '#a0a0b0',
     'border': '#3d3d5c',
     'purple': '#9b59b6',
 }
 
+def _darken(hex_color, amount=30):
+    rgb = tuple(int(hex_color.lstrip('#')[i:i+2], 16) for i in (0, 2, 4))
+    d = tuple(max(0, c - amount) for c in rgb)
+    return f'#{d[0]:02x}{d[1]:02x}{d[2]:02x}'
+
+def _lighten(hex_color, amount=20):
+    rgb = tuple(int(hex_color.lstrip('#')[i:i+2], 16) for i in (0, 2, 4))
+    l = tuple(min(255, c + amount) for c in rgb)
+    return f'#{l[0]:02x}{l[1]:02x}{l[2]:02x}'
+
+# Colour roles usable by buttons, section titles and status labels, with
+# their hover/pressed shades computed once at import time.
+ROLES = ('accent', 'accent_light', 'success', 'danger', 'warning', 'purple', 'orange', 'border')
+VARIANTS = {role: (COLORS[role], _lighten(COLORS[role]), _darken(COLORS[role])) for role in ROLES}
+
+# make_button sizes: (font px, vertical padding px, horizontal padding px)
+BUTTON_SIZES = {
+    'normal': (11, 10, 20),
+    'wide': (10, 8, 20),
+    'small': (10, 6, 15),
+    'compact': (10, 5, 15),
+}
+
+# Status label states -> colour key.
+STATES = {'idle': 'text_dim', 'success': 'success', 'warning': 'warning', 'danger': 'danger'}
+
+
+def _role_rules():
+    rules = []
+    for role, (base, light, dark) in VARIANTS.items():
+        rules.append(f"""
+QPushButton#actionButton[role="{role}"] {{ background-color: {base}; }}
+QPushButton#actionButton[role="{role}"]:hover {{ background-color: {light}; }}
+QPushButton#actionButton[role="{role}"]:pressed {{ background-color: {dark}; }}
+QLabel#sectionTitle[role="{role}"] {{ color: {base}; }}""")
+    for size, (font, pady, padx) in BUTTON_SIZES.items():
+        rules.append(f"""
+QPushButton#actionButton[variant="{size}"] {{ font-size: {font}px; padding: {pady}px {padx}px; }}""")
+    for state, color in STATES.items():
+        rules.append(f"""
+QLabel#statusLabel[state="{state}"] {{ color: {COLORS[color]}; }}""")
+    return "".join(rules)
+
+
 GLOBAL_STYLESHEET = f"""
 QMainWindow, QWidget#centralWidget {{
     background-color: {COLORS['bg_dark']};
@@ -43,41 +88,303 @@ QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical {{
 QScrollBar:horizontal {{
     height: 0;
 }}
+
+/* ── Chrome ── */
+QFrame#header, QFrame#header QLabel {{
+    background-color: {COLORS['bg_card']};
+    border-radius: 10px;
+}}
+QLabel#appTitle {{
+    color: {COLORS['accent_light']};
+    font-family: 'Segoe UI';
+    font-size: 22px;
+    font-weight: bold;
+}}
+QPushButton#iconButton {{
+    background-color: {COLORS['bg_hover']};
+    color: #ffffff;
+    font-size: 18px;
+    border: none;
+    border-radius: 20px;
+}}
+QPushButton#iconButton:hover {{
+    background-color: {COLORS['accent']};
+}}
+QFrame#menuFrame {{
+    background-color: {COLORS['bg_dark']};
+    border-radius: 12px;
+    padding: 8px;
+}}
+QPushButton#menuCard {{
+    background-color: {COLORS['bg_hover']};
+    color: {COLORS['text']};
+    font-family: 'Segoe UI';
+    font-size: 11px;
+    font-weight: bold;
+    border: none;
+    border-radius: 12px;
+    padding: 10px 8px;
+    text-align: center;
+}}
+QPushButton#menuCard:hover {{
+    background-color: {COLORS['border']};
+}}
+QPushButton#menuCard:pressed {{
+    background-color: {COLORS['accent']};
+}}
+QScrollArea#contentScroll {{
+    background-color: {COLORS['bg_card']};
+    border-radius: 10px;
+}}
+QStackedWidget#viewStack, QWidget#viewPage {{
+    background-color: {COLORS['bg_card']};
+    border-radius: 10px;
+}}
+QWidget#buttonRow {{
+    background: transparent;
+}}
+
+/* ── Shared labels ── */
+QLabel#welcomeTitle {{
+    color: {COLORS['text']};
+    font-family: 'Segoe UI';
+    font-size: 30px;
+    font-weight: bold;
+    padding-top: 40px;
+}}
+QLabel#welcomeSubtitle {{
+    color: {COLORS['text_dim']};
+    font-family: 'Segoe UI';
+    font-size: 14px;
+    padding-bottom: 20px;
+}}
+QLabel#sectionTitle {{
+    font-family: 'Segoe UI';
+    font-size: 20px;
+    font-weight: bold;
+    padding: 10px;
+}}
+QLabel#sectionSubtitle {{
+    color: {COLORS['text_dim']};
+    font-family: 'Segoe UI';
+    font-size: 11px;
+}}
+QLabel#fieldLabel {{
+    color: {COLORS['text']};
+    font-family: 'Segoe UI';
+    font-size: 12px;
+    font-weight: bold;
+}}
+
+/* ── Camera views ── */
+QFrame#cameraFrame {{
+    background-color: {COLORS['border']};
+    border-radius: 8px;
+    padding: 3px;
+}}
+QLabel#cameraLabel {{
+    background-color: {COLORS['bg_dark']};
+    border-radius: 6px;
+    padding: 3px;
+}}
+QLabel#perfOverlay {{
+    color: {COLORS['success']};
+    background-color: rgba(10, 10, 26, 180);
+    font-family: 'Consolas';
+    font-size: 10px;
+    padding: 4px;
+    border-radius: 4px;
+}}
+QLabel#statusLabel {{
+    font-family: 'Segoe UI';
+    font-size: 13px;
+    padding: 8px;
+}}
+QLabel#statusLabel[emphasis="true"] {{
+    font-size: 15px;
+    font-weight: bold;
+}}
+QLabel#scannerResult {{
+    color: {COLORS['text']};
+    background-color: {COLORS['bg_hover']};
+    font-family: 'Consolas';
+    font-size: 12px;
+    padding: 15px 20px;
+    border-radius: 8px;
+}}
+
+/* ── Generators ── */
+QPlainTextEdit#codeInput {{
+    color: {COLORS['text']};
+    background-color: {COLORS['bg_dark']};
+    font-family: 'Consolas';
+    font-size: 11px;
+    border: none;
+    border-radius: 6px;
+    padding: 10px;
+}}
+QComboBox#formatCombo {{
+    color: {COLORS['text']};
+    background-color: {COLORS['bg_dark']};
+    font-family: 'Consolas';
+    font-size: 11px;
+    border: 2px solid {COLORS['border']};
+    border-radius: 6px;
+    padding: 8px 12px;
+}}
+QComboBox#formatCombo::drop-down {{
+    border: none;
+    padding-right: 10px;
+}}
+QComboBox#formatCombo QAbstractItemView {{
+    color: {COLORS['text']};
+    background-color: {COLORS['bg_dark']};
+    selection-background-color: {COLORS['accent']};
+    border: 1px solid {COLORS['border']};
+}}
+QFrame#previewFrame {{
+    background-color: {COLORS['border']};
+    border-radius: 8px;
+    padding: 3px;
+}}
+QLabel#previewLabel {{
+    color: {COLORS['text_dim']};
+    background-color: {COLORS['bg_dark']};
+    font-family: 'Segoe UI';
+    font-size: 12px;
+    border-radius: 6px;
+    padding: 3px;
+}}
+QLabel#contentPreview {{
+    color: {COLORS['text_dim']};
+    background-color: {COLORS['bg_hover']};
+    font-family: 'Consolas';
+    font-size: 10px;
+    padding: 10px 15px;
+    border-radius: 6px;
+}}
+
+/* ── Logs ── */
+QTextEdit#logView {{
+    color: {COLORS['text']};
+    background-color: {COLORS['bg_dark']};
+    font-family: 'Consolas';
+    font-size: 11px;
+    border: 2px solid {COLORS['border']};
+    border-radius: 8px;
+    padding: 15px;
+}}
+
+/* ── Manage codes ── */
+QLabel#emptyLabel {{
+    color: {COLORS['text_dim']};
+    font-family: 'Segoe UI';
+    font-size: 14px;
+    padding: 40px;
+}}
+QLabel#countLabel {{
+    color: {COLORS['text_dim']};
+    font-family: 'Segoe UI';
+    font-size: 11px;
+    padding: 5px 0;
+}}
+QFrame#codeRow {{
+    background-color: {COLORS['bg_hover']};
+    border-radius: 6px;
+    padding: 4px;
+}}
+QLabel#codeIndex, QLabel#codeText {{
+    color: {COLORS['text']};
+    font-family: 'Consolas';
+    font-size: 11px;
+    background: transparent;
+    padding: 4px;
+}}
+QLabel#codeIndex {{
+    color: {COLORS['text_dim']};
+}}
+QPushButton#deleteButton {{
+    background-color: transparent;
+    color: {COLORS['danger']};
+    font-size: 14px;
+    border: none;
+    border-radius: 15px;
+}}
+QPushButton#deleteButton:hover {{
+    background-color: {COLORS['danger']};
+    color: #ffffff;
+}}
+
+/* ── Help dialog ── */
+QDialog#helpDialog {{
+    background-color: rgba(26, 26, 46, 240);
+}}
+QScrollArea#helpScroll, QWidget#helpContent {{
+    border: none;
+    background: transparent;
+}}
+QScrollArea#helpScroll QScrollBar:vertical {{
+    width: 8px;
+    border-radius: 4px;
+}}
+QScrollArea#helpScroll QScrollBar::handle:vertical {{
+    border-radius: 4px;
+}}
+QLabel#helpText {{
+    color: {COLORS['text']};
+    font-family: 'Segoe UI';
+    font-size: 12px;
+    background: transparent;
+}}
+QPushButton#dialogButton {{
+    background-color: {COLORS['accent']};
+    color: #ffffff;
+    font-family: 'Segoe UI';
+    font-size: 11px;
+    font-weight: bold;
+    border: none;
+    border-radius: 6px;
+    padding: 8px 20px;
+}}
+QPushButton#dialogButton:hover {{
+    background-color: {COLORS['accent_light']};
+}}
+
+/* ── Action buttons (make_button) ── */
+QPushButton#actionButton {{
+    color: #ffffff;
+    font-family: 'Segoe UI';
+    font-weight: bold;
+    border: none;
+    border-radius: 6px;
+}}
+{_role_rules()}
+QPushButton#actionButton:disabled {{
+    background-color: {COLORS['border']};
+    color: {COLORS['text_dim']};
+}}
 """
 
-def _darken(hex_color, amount=30):
-    rgb = tuple(int(hex_color.lstrip('#')[i:i+2], 16) for i in (0, 2, 4))
-    d = tuple(max(0, c - amount) for c in rgb)
-    return f'#{d[0]:02x}{d[1]:02x}{d[2]:02x}'
 
-def _lighten(hex_color, amount=20):
-    rgb = tuple(int(hex_color.lstrip('#')[i:i+2], 16) for i in (0, 2, 4))
-    l = tuple(min(255, c + amount) for c in rgb)
-    return f'#{l[0]:02x}{l[1]:02x}{l[2]:02x}'
+def set_state(widget, name, value):
+    """Flip a dynamic property that the global stylesheet keys on.
+
+    Only re-polishes the one widget and does nothing when the value is
+    unchanged. This is about as fast as a per-widget setStyleSheet() (see
+    `benchmark.py styles`); it exists so the colours live in the one global
+    stylesheet. The stylesheet style drops its cached rules for the widget
+    in polish(), so the usual unpolish() round trip is not needed.
+    """
+    if widget.property(name) == value:
+        return
+    widget.setProperty(name, value)
+    widget.style().polish(widget)
+
 
-def make_button(text, color, font_size=11, padx=20, pady=10):
+def make_button(text, role='accent', size='normal'):
     btn = QPushButton(text)
     btn.setCursor(Qt.PointingHandCursor)
-    btn.setStyleSheet(f"""
-        QPushButton {{
-            background-color: {color};
-            color: #ffffff;
-            font-family: 'Segoe UI';
-            font-size: {font_size}px;
-            font-weight: bold;
-            border: none;
-            border-radius: 6px;
-            padding: {pady}px {padx}px;
-        }}
-        QPushButton:hover {{
-            background-color: {_lighten(color)};
-        }}
-        QPushButton:pressed {{
-            background-color: {_darken(color)};
-        }}
-        QPushButton:disabled {{
-            background-color: {COLORS['border']};
-            color: {COLORS['text_dim']};
-        }}
-    """)
+    btn.setObjectName("actionButton")
+    btn.setProperty("role", role)
+    btn.setProperty("variant", size)
     return btn
@@ -0,0 +1,439 @@
+"""Delta synchronization of the authorized list between gates.
+
+Every add and delete made through `AuthIndex` is appended to a change
+journal next to the list (`myDataFile.txt.journal`) with a monotonically
+increasing sequence number. A gate serves its journal over HTTP and other
+gates pull only the entries after the last version they applied. A gate
+that is too far behind (its version was compacted away) or brand new
+downloads a gzip snapshot of the whole list instead and continues with
+deltas from there.
+
+    python sync.py serve --host 0.0.0.0 --port 8766 --token SECRET     # on the primary
+    python sync.py pull --peer http://primary:8766 --token SECRET       # on each gate (loops)
+    python sync.py status
+
+The journal and snapshot expose the whole authorized list, so the server
+listens on 127.0.0.1 unless told otherwise and every request must carry
+the shared token in an `X-Sync-Token` header. The token can also come
+from the QRAUTH_SYNC_TOKEN environment variable.
+
+Changes a gate pulls are journaled locally too, so gates can be chained.
+Only one node should be edited by hand; this is replication, not merging.
+"""
+import argparse
+import gzip
+import hmac
+import json
+import os
+import sys
+import threading
+import time
+from array import array
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.error import HTTPError
+from urllib.parse import parse_qs, urlparse
+from urllib.request import Request, urlopen
+
+try:
+    import fcntl
+except ImportError:   # Windows: single writer process assumed
+    fcntl = None
+
+from authindex import AuthIndex, parse_entry, read_entries
+
+TOKEN_HEADER = "X-Sync-Token"
+TOKEN_ENV = "QRAUTH_SYNC_TOKEN"
+
+
+class ChangeJournal:
+    """Append-only `seq<TAB>op<TAB>code` log of changes to an authorized list.
+
+    Entries with sequence numbers in (base, version] are available as
+    deltas. A journal created for a list that already has codes starts at
+    base = version = 1, so peers at version 0 fetch a snapshot first.
+    """
+
+    def __init__(self, source, path=None, max_entries=200000):
+        self.source = source
+        self.path = path or source + ".journal"
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.base = 0
+        self.version = 0
+        self._offsets = array('q')
+        self._read_pos = 0
+        self._ident = None
+        if not os.path.exists(self.path):
+            has_codes = False
+            if os.path.exists(source):
+                with open(source, 'r') as f:
+                    has_codes = any(line.strip() for line in f)
+            self._write_fresh(1 if has_codes else 0, [])
+        self._load()
+
+    # ── File handling ─────────────────────────────────────────────────────
+    def _write_fresh(self, base, entries):
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            f.write(f"#base\t{base}\n")
+            for seq, op, code in entries:
+                f.write(f"{seq}\t{op}\t{code}\n")
+        os.replace(tmp, self.path)
+
+    def _load(self):
+        with open(self.path, 'rb') as f:
+            self._ident = None
+            self._sync(f)
+
+    def _sync(self, f):
+        """Bring the in-memory index up to date with the open journal `f`.
+
+        Everything is read through one handle, since a compaction may replace
+        the file at `path` at any moment. A new file can even reuse the old
+        one's inode, but never its base, so both identify the file.
+        """
+        st = os.fstat(f.fileno())
+        f.seek(0)
+        base = int(f.readline().split(b"\t")[1])
+        ident = (st.st_ino, st.st_dev, base)
+        if ident != self._ident or st.st_size < self._read_pos:
+            self._ident = ident
+            self._offsets = array('q')
+            self.base = self.version = base
+            self._read_pos = f.tell()
+        self._tail(f)
+
+    def _tail(self, f):
+        """Index entries appended since the last read (by this or another process)."""
+        f.seek(self._read_pos)
+        while True:
+            pos = f.tell()
+            line = f.readline()
+            if not line.endswith(b"\n"):
+                break
+            self._offsets.append(pos)
+            self.version = int(line.split(b"\t", 1)[0])
+            self._read_pos = f.tell()
+
+    def refresh(self):
+        with self.lock:
+            try:
+                f = open(self.path, 'rb')
+            except FileNotFoundError:
+                return
+            with f:
+                self._sync(f)
+
+    # ── Writing ───────────────────────────────────────────────────────────
+    def _open_locked(self):
+        """The journal opened for append under an exclusive flock.
+
+        A compaction replaces the file while writers may be waiting for the
+        lock on the old one, so after locking we check that the path still
+        names the file we hold and start over if it does not. (The inode
+        we hold stays allocated, so it cannot have been reused.)
+        """
+        while True:
+            f = open(self.path, 'a')
+            if not fcntl:
+                return f
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                st = None
+            held = os.fstat(f.fileno())
+            if st is not None and (st.st_ino, st.st_dev) == (held.st_ino, held.st_dev):
+                return f
+            f.close()
+
+    def record(self, op, codes):
+        """Append one entry per code (`op` is '+' or '-'); returns the new version."""
+        with self.lock:
+            f = self._open_locked()
+            try:
+                # While we hold the lock the file at `path` cannot change.
+                with open(self.path, 'rb') as r:
+                    # Catch up with other writers (or a compaction) before numbering.
+                    self._sync(r)
+                    lines = []
+                    for code in codes:
+                        self.version += 1
+                        lines.append(f"{self.version}\t{op}\t{code}\n")
+                    f.write("".join(lines))
+                    f.flush()
+                    self._tail(r)
+                    if len(self._offsets) > self.max_entries:
+                        # Still under the lock, so nobody can append to the old file.
+                        self._compact(r, self.max_entries // 2)
+            finally:
+                f.close()     # releases the flock
+            return self.version
+
+    def _compact(self, f, keep):
+        entries = self._entries(f, len(self._offsets) - keep, len(self._offsets))
+        self._write_fresh(entries[0][0] - 1 if entries else self.version, entries)
+        self._load()
+
+    # ── Reading ───────────────────────────────────────────────────────────
+    def _entries(self, f, start, stop):
+        out = []
+        for i in range(start, stop):
+            f.seek(self._offsets[i])
+            seq, op, code = f.readline().decode("utf-8", "replace").rstrip("\n").split("\t", 2)
+            out.append((int(seq), op, code))
+        return out
+
+    def entries(self):
+        """Every entry still in the journal."""
+        with self.lock:
+            with open(self.path, 'rb') as f:
+                self._sync(f)
+                return self._entries(f, 0, len(self._offsets))
+
+    def changes_since(self, version, limit=5000):
+        """Entries after `version`, or None if they were compacted away (snapshot needed)."""
+        with self.lock:
+            with open(self.path, 'rb') as f:
+                self._sync(f)
+                if version < self.base or version > self.version:
+                    return None
+                start = version - self.base
+                return self._entries(f, start, min(len(self._offsets), start + limit))
+
+    def snapshot(self):
+        """(version, gzip bytes of the list) for peers that cannot catch up with deltas."""
+        self.refresh()
+        version = self.version
+        with open(self.source, 'rb') as f:
+            data = f.read()
+        # Entries after `version` may already be in the file; applying them
+        # again is harmless because adds and deletes are idempotent.
+        return version, gzip.compress(data)
+
+
+def apply_changes(index, changes):
+    """Apply journal entries to an AuthIndex, batching consecutive ops.
+
+    '+' entries carry the whole list line, so validity windows travel too:
+    a code that is already listed with a different window is re-added with
+    the new one. Returns the '+' entries whose line cannot be parsed; they
+    are skipped so one bad line cannot stall sync.
+    """
+    bad = []
+
+    def flush(op, run):
+        if op == '-':
+            index.remove(run)
+            return
+        entries = []
+        for seq, line in run:
+            try:
+                entry = parse_entry(line, strict=True)
+            except ValueError:
+                bad.append((seq, line))
+                continue
+            if entry is not None:
+                entries.append(entry)
+        have = index.windows([code for code, _ in entries])
+        changed = [code for (code, window), old in zip(entries, have) if old is not None and old != window]
+        if changed:
+            index.remove(changed)
+        index.add_many(entries)
+
+    run_op, run = None, []
+    for seq, op, code in changes:
+        if op != run_op and run:
+            flush(run_op, run)
+            run = []
+        run_op = op
+        run.append((seq, code) if op == '+' else code)
+    if run:
+        flush(run_op, run)
+    return bad
+
+
+# ── Server ─────────────────────────────────────────────────────────────────
+def serve(journal, port, host="127.0.0.1", token="", block=False):
+    """GET /version, /changes?since=N[&limit=M] and /snapshot, for clients sending `token`."""
+    if not token:
+        raise ValueError("sync server needs a shared token")
+    expected = token.encode("utf-8")
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, code, body, ctype="application/json", headers=None):
+            self.send_response(code)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            given = self.headers.get(TOKEN_HEADER, "").encode("utf-8")
+            if not hmac.compare_digest(given, expected):
+                self._send(401, b'{"error": "missing or wrong token"}')
+                return
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            if url.path == "/version":
+                journal.refresh()
+                self._send(200, json.dumps({"version": journal.version, "base": journal.base}).encode())
+            elif url.path == "/changes":
+                try:
+                    since = int(query.get("since", ["0"])[0])
+                    limit = int(query.get("limit", ["5000"])[0])
+                except ValueError:
+                    self._send(400, b'{"error": "since and limit must be integers"}')
+                    return
+                changes = journal.changes_since(since, limit)
+                if changes is None:
+                    self._send(410, json.dumps({"error": "snapshot required", "base": journal.base}).encode())
+                else:
+                    self._send(200, json.dumps({"version": journal.version, "changes": changes}).encode())
+            elif url.path == "/snapshot":
+                version, blob = journal.snapshot()
+                self._send(200, blob, "application/gzip", {"X-Sync-Version": str(version)})
+            else:
+                self._send(404, b'{"error": "not found"}')
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    if block:
+        server.serve_forever()
+    else:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ── Client ─────────────────────────────────────────────────────────────────
+class SyncClient:
+    """Pulls a peer's journal into the local list; progress kept in `<source>.sync.json`."""
+
+    def __init__(self, index, peer, token="", state_path=None, timeout=10.0):
+        self.index = index
+        self.peer = peer.rstrip("/")
+        self.token = token
+        self.state_path = state_path or index.source + ".sync.json"
+        self.timeout = timeout
+        self.version = 0
+        self.skipped = 0
+        self.last_error = None
+        if os.path.exists(self.state_path):
+            with open(self.state_path, 'r') as f:
+                state = json.load(f)
+            if state.get("peer") == self.peer:
+                self.version = state.get("version", 0)
+
+    def _save(self):
+        tmp = self.state_path + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump({"peer": self.peer, "version": self.version}, f)
+        os.replace(tmp, self.state_path)
+
+    def _get(self, path):
+        request = Request(self.peer + path, headers={TOKEN_HEADER: self.token})
+        with urlopen(request, timeout=self.timeout) as resp:
+            return resp.read(), resp.headers
+
+    def _restore_snapshot(self):
+        blob, headers = self._get("/snapshot")
+        lines = gzip.decompress(blob).decode("utf-8", "replace").splitlines()
+        wanted = dict(e for e in map(parse_entry, lines) if e is not None)
+        have = dict(read_entries(self.index.source))
+        # Go through the index so the local journal records the difference;
+        # a code whose validity window changed is removed and added again.
+        self.index.remove(sorted(c for c in have if wanted.get(c) != have[c]))
+        self.index.add_many(sorted((c, w) for c, w in wanted.items() if have.get(c) != w))
+        self.version = int(headers["X-Sync-Version"])
+        return len(wanted)
+
+    def pull(self):
+        """Catch up with the peer; returns the number of changes applied."""
+        applied = 0
+        while True:
+            try:
+                body, _ = self._get(f"/changes?since={self.version}")
+            except HTTPError as e:
+                if e.code != 410:
+                    raise
+                applied += self._restore_snapshot()
+                self._save()
+                continue
+            reply = json.loads(body)
+            changes = reply["changes"]
+            if changes:
+                for seq, line in apply_changes(self.index, changes):
+                    self.skipped += 1
+                    print(f"sync: skipped unparsable entry {seq} from {self.peer}: {line!r}", file=sys.stderr)
+                self.version = changes[-1][0]
+                applied += len(changes)
+                self._save()
+            if self.version >= reply["version"] or not changes:
+                return applied
+
+    def run_forever(self, interval=30.0, stop=None):
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            try:
+                self.pull()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+            stop.wait(interval)
+
+    def start(self, interval=30.0):
+        """Pull on a daemon thread every `interval` seconds; returns the stop Event."""
+        stop = threading.Event()
+        threading.Thread(target=self.run_forever, args=(interval, stop), daemon=True).start()
+        return stop
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Authorized-list delta sync between gates")
+    parser.add_argument("--list", default="myDataFile.txt", help="Authorized code list")
+    parser.add_argument("--token", default=os.environ.get(TOKEN_ENV, ""),
+                        help=f"Shared secret of the gates (default: ${TOKEN_ENV})")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("serve", help="Serve this gate's change journal")
+    p.add_argument("--port", type=int, default=8766)
+    p.add_argument("--host", default="127.0.0.1", help="Address to listen on (0.0.0.0 for every interface)")
+    p = sub.add_parser("pull", help="Pull changes from a peer")
+    p.add_argument("--peer", required=True, help="e.g. http://gate1:8766")
+    p.add_argument("--interval", type=float, default=30.0, help="Seconds between pulls")
+    p.add_argument("--once", action="store_true", help="Pull once and exit")
+    sub.add_parser("status", help="Show the local journal version")
+    args = parser.parse_args(argv)
+
+    if args.command in ("serve", "pull") and not args.token:
+        parser.error(f"--token (or ${TOKEN_ENV}) is required")
+    journal = ChangeJournal(args.list)
+    if args.command == "serve":
+        print(f"serving {journal.path} (version {journal.version}) on port {args.port}", file=sys.stderr)
+        try:
+            serve(journal, args.port, args.host, args.token, block=True)
+        except KeyboardInterrupt:
+            pass
+    elif args.command == "pull":
+        client = SyncClient(AuthIndex(args.list, journal=journal), args.peer, args.token)
+        while True:
+            try:
+                n = client.pull()
+                print(f"{time.strftime('%H:%M:%S')} version {client.version}: {n} change(s)", file=sys.stderr)
+            except OSError as e:
+                print(f"{time.strftime('%H:%M:%S')} pull failed: {e}", file=sys.stderr)
+                if args.once:
+                    return 1
+            if args.once:
+                break
+            time.sleep(args.interval)
+    else:
+        print(json.dumps({"version": journal.version, "base": journal.base, "entries": len(journal._offsets)}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+import random
+
+from auth import AUTHORIZED, UNAUTHORIZED, ScanEvent
+from detector import ALERT, REPLAY, Detector
+
+RATE = 20000 / 60.0     # the detector benchmark's load: 20000 denials per window
+
+
+def _events(codes, outcome=UNAUTHORIZED):
+    return [ScanEvent(code, outcome, i / RATE, "0") for i, code in enumerate(codes)]
+
+
+def test_no_false_alerts_under_load_at_the_default_threshold():
+    rng = random.Random(0)
+    # Every code is denied at most twice, spread across a busy window in
+    # which the sketch alone over-counts well past code_alert=3.
+    codes = [f"CODE-{i}" for i in range(15000)] * 2
+    rng.shuffle(codes)
+    detector = Detector(camera_alert=0)
+    assert [e for e in _events(codes) if detector.observe(e)] == []
+    assert detector.denied_codes.estimate("CODE-0", len(codes) / RATE) >= 3
+
+
+def test_a_code_denied_three_times_still_alerts():
+    codes = [f"CODE-{i}" for i in range(15000)]
+    for at in (100, 5000, 9000):
+        codes.insert(at, "RETRIED")
+    detector = Detector(camera_alert=0)
+    alerts = [(e.code, detector.observe(e)) for e in _events(codes)]
+    assert [a for a in alerts if a[1]] == [("RETRIED", ALERT)]
+
+
+def test_replay_alerts_are_confirmed_too():
+    codes = [f"CODE-{i}" for i in range(15000)] + ["SHARED"] * 5
+    detector = Detector(camera_alert=0, replay_alert=5)
+    alerts = [(e.code, detector.observe(e)) for e in _events(codes, AUTHORIZED)]
+    assert [a for a in alerts if a[1]] == [("SHARED", REPLAY)]
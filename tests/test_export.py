@@ -0,0 +1,33 @@
+import os
+
+import pytest
+
+from export import export_logs
+from logstore import AUTHORIZED, LogEntry
+
+pytest.importorskip("pyarrow")
+
+
+class _Store:
+    def __init__(self, entries):
+        self.entries = entries
+
+    def read(self, kinds, start=None, end=None):
+        return iter(self.entries)
+
+
+@pytest.mark.parametrize("name", ["out.parquet", "out.feather"])
+def test_failed_export_leaves_no_temp_file(tmp_path, name):
+    path = str(tmp_path / name)
+    good = LogEntry("2024-05-01 09:00:00", "A", AUTHORIZED, "gate-0")
+    bad = LogEntry("not a time", "B", AUTHORIZED, "gate-0")
+    with pytest.raises(Exception):
+        export_logs(_Store([good, bad]), path, batch_rows=1)
+    assert os.listdir(tmp_path) == []
+
+
+def test_export_writes_every_row(tmp_path):
+    path = str(tmp_path / "out.parquet")
+    entries = [LogEntry(f"2024-05-01 09:00:0{i}", f"C{i}", AUTHORIZED, "gate-0") for i in range(5)]
+    assert export_logs(_Store(entries), path, batch_rows=2) == (5, path, "parquet")
+    assert os.listdir(tmp_path) == ["out.parquet"]
@@ -0,0 +1,30 @@
+from overlay import Overlay
+
+GREEN = (0, 255, 0)
+RED = (0, 0, 255)
+SQUARE = [(0, 0), (10, 0), (10, 10), (0, 10)]
+
+
+def test_repeated_codes_keep_their_own_color_and_label():
+    overlay = Overlay(ttl=0.6)
+    # One frame with an authorized and an unauthorized code.
+    overlay.add("good", SQUARE, GREEN, "good", now=0.0)
+    overlay.add("bad", SQUARE, RED, "bad", now=0.0)
+    # Later ticks see both again but the cooldown suppresses their events,
+    # including after the first outlines have faded out.
+    for now in (0.1, 1.0):
+        assert overlay.repeat("good", SQUARE, now=now)
+        assert overlay.repeat("bad", SQUARE, now=now)
+        good, bad = overlay.shapes["good"], overlay.shapes["bad"]
+        assert good.color.green() == 255 and good.color.red() == 0
+        assert bad.color.red() == 255 and bad.color.green() == 0
+        assert (good.label, bad.label) == ("good", "bad")
+
+
+def test_repeat_needs_an_earlier_decision():
+    overlay = Overlay()
+    assert not overlay.repeat("unseen", SQUARE)
+    assert "unseen" not in overlay.shapes
+    overlay.add("seen", SQUARE, GREEN)
+    overlay.clear()
+    assert not overlay.repeat("seen", SQUARE)
@@ -0,0 +1,81 @@
+import statistics
+import threading
+import time
+
+from sources import FakeCamera, LatestFrameGrabber
+
+FPS = 30.0
+DECODE_S = 0.06     # a consumer about half as fast as the camera
+
+
+def _latencies(source, frames=25, warmup=5):
+    latencies = []
+    try:
+        for i in range(warmup + frames):
+            ok, _ = source.read()
+            assert ok
+            if i >= warmup:
+                latencies.append((time.monotonic() - source.captured_at) * 1000.0)
+            time.sleep(DECODE_S)    # stands in for decoding the frame
+    finally:
+        source.release()
+    return latencies
+
+
+def test_latest_frame_grabber_keeps_latency_below_one_decode():
+    queued = statistics.median(_latencies(FakeCamera(FPS, 4)))
+    latest = statistics.median(_latencies(LatestFrameGrabber(FakeCamera(FPS, 4))))
+    # A slow reader of a 4-frame queue sees frames several decodes old; the
+    # grabber hands over the newest one, at most a frame period plus a grab old.
+    assert queued > 3 * DECODE_S * 1000.0 * 0.8
+    assert latest < 2 * 1000.0 / FPS + 20.0
+    assert latest < queued / 3
+
+
+def test_grabber_stops_grabbing_while_paused():
+    camera = FakeCamera(FPS, 4)
+    grabber = LatestFrameGrabber(camera, timeout=0.3)
+    try:
+        assert grabber.read()[0]
+        grabber.pause()
+        time.sleep(0.1)                 # let a grab in progress finish
+        grabbed = camera.frames
+        time.sleep(0.3)
+        assert camera.frames == grabbed
+        grabber.resume()
+        ok, _ = grabber.read()
+        assert ok
+        assert camera.frames > grabbed
+        assert (time.monotonic() - grabber.captured_at) * 1000.0 < 2 * 1000.0 / FPS + 20.0
+    finally:
+        grabber.release()
+
+
+class _StalledCamera(FakeCamera):
+    """Delivers one frame, then hangs like an unplugged camera."""
+
+    def __init__(self):
+        super().__init__(FPS, 1)
+        self.unplugged = threading.Event()
+
+    def grab(self):
+        if self.frames:
+            self.unplugged.wait(5)
+            return False
+        return super().grab()
+
+
+def test_grabber_read_without_wait_does_not_block_on_a_stalled_camera():
+    camera = _StalledCamera()
+    grabber = LatestFrameGrabber(camera, wait=0)
+    try:
+        deadline = time.monotonic() + 2
+        while not grabber.read()[0]:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        start = time.monotonic()
+        assert grabber.read() == (False, None)
+        assert time.monotonic() - start < 0.05
+    finally:
+        camera.unplugged.set()
+        grabber.release()
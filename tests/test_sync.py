@@ -0,0 +1,190 @@
+import os
+import socket
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+from datetime import datetime
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+import pytest
+
+from authindex import AuthIndex, read_entries
+from sync import TOKEN_HEADER, ChangeJournal, SyncClient
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOKEN = "test-token"
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _codes(path):
+    return sorted(code for code, _ in read_entries(path))
+
+
+@pytest.fixture
+def primary(tmp_path):
+    """A `sync.py serve` process for tmp_path/primary.txt; yields its URL."""
+    source = tmp_path / "primary.txt"
+    source.write_text("")
+    port = _free_port()
+    proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "sync.py"), "--list", str(source),
+                             "--token", TOKEN, "serve", "--port", str(port)],
+                            cwd=str(tmp_path), stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 10
+    while True:
+        try:
+            urlopen(Request(url + "/version", headers={TOKEN_HEADER: TOKEN}), timeout=1).close()
+            break
+        except (URLError, ConnectionError):
+            if time.monotonic() > deadline or proc.poll() is not None:
+                proc.kill()
+                pytest.fail("sync server did not start")
+            time.sleep(0.05)
+    yield url, str(source)
+    proc.terminate()
+    proc.wait(10)
+
+
+def test_round_trip_through_compaction(primary, tmp_path):
+    url, source = primary
+    # Edits are made here, the journal is served by the other process, and a
+    # small max_entries makes this process compact it several times.
+    index = AuthIndex(source, journal=ChangeJournal(source, max_entries=40))
+    replica_source = str(tmp_path / "replica.txt")
+    open(replica_source, 'w').close()
+    replica = AuthIndex(replica_source, journal=ChangeJournal(replica_source))
+    client = SyncClient(replica, url, TOKEN)
+
+    index.add_many([f"A-{i}" for i in range(30)])
+    assert client.pull() == 30
+    assert _codes(replica_source) == _codes(source)
+
+    # Small steps stay within the journal: deltas only.
+    index.remove(["A-3", "A-7"])
+    index.add_many(["B-1", "B-2"])
+    assert client.pull() == 4
+    assert _codes(replica_source) == _codes(source)
+
+    # Far more changes than the journal keeps: the replica's version is
+    # compacted away and it must come back through a snapshot.
+    for i in range(5):
+        index.add_many([f"C-{i}-{j}" for j in range(25)])
+    index.remove([f"A-{i}" for i in range(10, 20)])
+    client.pull()
+    assert _codes(replica_source) == _codes(source)
+    assert client.version == ChangeJournal(source).version
+
+    # And deltas resume after the snapshot.
+    index.add_many(["D-1"])
+    assert client.pull() == 1
+    assert _codes(replica_source) == _codes(source)
+
+
+def test_requests_without_the_token_are_refused(primary):
+    url, _ = primary
+    for headers in ({}, {TOKEN_HEADER: "wrong"}):
+        with pytest.raises(HTTPError) as err:
+            urlopen(Request(url + "/snapshot", headers=headers), timeout=5)
+        assert err.value.code == 401
+
+
+def test_malformed_queries_are_rejected(primary):
+    url, _ = primary
+    for query in ("since=abc", "since=1&limit=x", "since=1.5"):
+        with pytest.raises(HTTPError) as err:
+            urlopen(Request(f"{url}/changes?{query}", headers={TOKEN_HEADER: TOKEN}), timeout=5)
+        assert err.value.code == 400
+    # The server is still serving.
+    with urlopen(Request(url + "/changes?since=0", headers={TOKEN_HEADER: TOKEN}), timeout=5) as resp:
+        assert resp.status == 200
+
+
+WRITER = textwrap.dedent("""
+    import sys
+    sys.path.insert(0, sys.argv[1])
+    from sync import ChangeJournal
+    journal = ChangeJournal(sys.argv[2], max_entries=25)
+    for i in range(int(sys.argv[4])):
+        journal.record('+', [f"{sys.argv[3]}-{i}"])
+""")
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="journal locking needs fcntl")
+def test_concurrent_writers_lose_nothing_across_compactions(tmp_path):
+    source = str(tmp_path / "list.txt")
+    open(source, 'w').close()
+    ChangeJournal(source)
+    writers, per_writer = 4, 150
+    procs = [subprocess.Popen([sys.executable, "-c", WRITER, ROOT, source, f"w{n}", str(per_writer)])
+             for n in range(writers)]
+    for proc in procs:
+        assert proc.wait(60) == 0
+    journal = ChangeJournal(source)
+    entries = journal.entries()
+    assert journal.version == writers * per_writer
+    assert [seq for seq, _, _ in entries] == list(range(journal.base + 1, journal.version + 1))
+    assert len(entries) <= 25
+    with open(journal.path) as f:
+        assert f.readline().startswith("#base\t")
+
+
+def test_list_writers_lose_no_adds(tmp_path):
+    # The sync thread appends pulled codes through its own AuthIndex while
+    # the GUI's index deletes and purges by rewriting the list.
+    source = str(tmp_path / "list.txt")
+    with open(source, 'w') as f:
+        f.write("".join(f"old-{i}\n" for i in range(300)))
+    journal = ChangeJournal(source)
+    syncing = AuthIndex(source, journal=journal)
+    gui = AuthIndex(source, journal=journal)
+
+    def add():
+        for i in range(300):
+            syncing.add_many([f"new-{i}"])
+
+    def delete():
+        for i in range(300):
+            gui.remove([f"old-{i}"])
+
+    threads = [threading.Thread(target=add), threading.Thread(target=delete)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert _codes(source) == sorted(f"new-{i}" for i in range(300))
+    # The journal agrees with the list: replaying it over the original gives the same codes.
+    listed = {f"old-{i}" for i in range(300)}
+    for _, op, code in journal.entries():
+        (listed.add if op == '+' else listed.discard)(code)
+    assert sorted(listed) == _codes(source)
+
+
+def test_purge_loses_no_concurrent_adds(tmp_path):
+    source = str(tmp_path / "list.txt")
+    with open(source, 'w') as f:
+        f.write("".join(f"old-{i}\t\t{datetime.fromtimestamp(1000 + i):%Y-%m-%d %H:%M:%S}\n" for i in range(300)))
+    syncing = AuthIndex(source)
+    gui = AuthIndex(source)
+
+    def add():
+        for i in range(300):
+            syncing.add_many([f"new-{i}"])
+
+    def purge():
+        for i in range(300):
+            gui.purge_expired(now=1001 + i)     # one code runs out per call
+
+    threads = [threading.Thread(target=add), threading.Thread(target=purge)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert _codes(source) == sorted(f"new-{i}" for i in range(300))
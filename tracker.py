@@ -0,0 +1,99 @@
+import time
+from collections import namedtuple
+
+import cv2
+
+# Same fields the UI reads from pyzbar's Decoded results.
+TrackedCode = namedtuple("TrackedCode", "data type rect polygon")
+
+
+class _Track:
+    __slots__ = ("code", "template", "scale")
+
+    def __init__(self, code, template, scale):
+        self.code = code
+        self.template = template
+        self.scale = scale
+
+
+class CodeTracker:
+    """Follows decoded codes between frames with normalised template matching.
+
+    After a full decode `update()` stores a small grayscale patch of every
+    code. `confirm()` looks for each patch in a window around its last
+    position; if all of them are still there it returns the shifted codes and
+    the caller can skip the decoder. It returns None (re-decode) when any code
+    is lost, when nothing is being tracked, or every `redecode_every` seconds
+    so a swapped badge is never reported under the old payload for long.
+    """
+
+    def __init__(self, match_threshold=0.75, search_margin=32, template_size=64,
+                 redecode_every=1.5):
+        self.match_threshold = match_threshold
+        self.search_margin = search_margin
+        self.template_size = template_size
+        self.redecode_every = redecode_every
+        self.tracks = []
+        self.last_decode = 0.0
+
+    def reset(self):
+        self.tracks = []
+        self.last_decode = 0.0
+
+    @staticmethod
+    def _gray(frame):
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+
+    def update(self, frame, barcodes):
+        """Start tracking the results of a full decode of `frame`."""
+        self.last_decode = time.monotonic()
+        self.tracks = []
+        if not barcodes:
+            return
+        gray = self._gray(frame)
+        fh, fw = gray.shape
+        for bc in barcodes:
+            x, y, w, h = bc.rect
+            x0, y0 = max(0, x), max(0, y)
+            x1, y1 = min(fw, x + w), min(fh, y + h)
+            if x1 - x0 < 8 or y1 - y0 < 8:
+                continue
+            scale = min(1.0, self.template_size / max(x1 - x0, y1 - y0))
+            patch = gray[y0:y1, x0:x1]
+            if scale < 1.0:
+                patch = cv2.resize(patch, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            code = TrackedCode(bc.data, bc.type, (x0, y0, x1 - x0, y1 - y0),
+                               [(int(p[0]), int(p[1])) for p in bc.polygon])
+            self.tracks.append(_Track(code, patch, scale))
+
+    def confirm(self, frame):
+        """Return the tracked codes moved to their new position, or None to re-decode."""
+        if not self.tracks or time.monotonic() - self.last_decode > self.redecode_every:
+            return None
+        gray = self._gray(frame)
+        fh, fw = gray.shape
+        moved = []
+        for track in self.tracks:
+            x, y, w, h = track.code.rect
+            m = self.search_margin
+            wx0, wy0 = max(0, x - m), max(0, y - m)
+            wx1, wy1 = min(fw, x + w + m), min(fh, y + h + m)
+            window = gray[wy0:wy1, wx0:wx1]
+            if track.scale < 1.0:
+                window = cv2.resize(window, None, fx=track.scale, fy=track.scale, interpolation=cv2.INTER_AREA)
+            th, tw = track.template.shape
+            if window.shape[0] < th or window.shape[1] < tw:
+                return None
+            result = cv2.matchTemplate(window, track.template, cv2.TM_CCOEFF_NORMED)
+            _, score, _, loc = cv2.minMaxLoc(result)
+            if score < self.match_threshold:
+                return None
+            nx = wx0 + int(round(loc[0] / track.scale))
+            ny = wy0 + int(round(loc[1] / track.scale))
+            dx, dy = nx - x, ny - y
+            track.code = track.code._replace(
+                rect=(nx, ny, w, h),
+                polygon=[(px + dx, py + dy) for px, py in track.code.polygon],
+            )
+            moved.append(track.code)
+        return moved
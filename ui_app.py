@@ -1,30 +1,81 @@
 import sys
 import os
+import argparse
 import time
 import csv
 import cv2
-import numpy as np
+from collections import deque
 from PIL import Image
-from datetime import datetime
-import qrcode
-import barcode
-from barcode.writer import ImageWriter
+from datetime import datetime, timedelta
 import winsound
 
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QPushButton, QScrollArea, QTextEdit, QFrame, QFileDialog,
-    QMessageBox, QSizePolicy, QPlainTextEdit, QGridLayout, QComboBox
+    QMessageBox, QSizePolicy, QPlainTextEdit, QGridLayout, QComboBox, QStackedWidget
 )
-from PySide6.QtCore import Qt, QTimer
-from PySide6.QtGui import QImage, QPixmap
+from PySide6.QtCore import Qt, QTimer, QEvent
+from PySide6.QtGui import QImage, QPixmap, QKeySequence, QShortcut, QTextCursor
+
+from styles import COLORS, GLOBAL_STYLESHEET, make_button, set_state
+from utils import decode_codes_silent, pil_to_qpixmap, make_qr_image, make_barcode_image
+from metrics import Metrics
+from config import load_config, CONFIG_FILE
+from decoders import make_decoder, resolve_backend
+from scheduler import FrameScheduler
+from camera import CameraSession
+from tracker import CodeTracker
+from authindex import AuthIndex, ALWAYS, format_time as format_valid_time, parse_entry, read_entries
+from auth import (Authenticator, AUTHORIZED, UNAUTHORIZED, ADDED, DUPLICATE, EXPIRED, NOT_YET_VALID,
+                  LOCKED_OUT, AWAITING)
+from rules import make_rules
+from detector import make_detector, LOCKOUT, DENIED
+from snapshots import make_recorder
+from logstore import make_logstore
+from overlay import Overlay
+from diagnostics import Diagnostics
+from export import export_logs
+from sources import open_source
+from events import make_bus
+from sync import ChangeJournal, SyncClient, TOKEN_ENV as SYNC_TOKEN_ENV, serve as serve_sync
+
+class _LogViewState:
+    """Widgets of one cached log view; `load` is set by the view."""
+
+    def __init__(self, kind, text, scope_combo, range_combo):
+        self.kind = kind
+        self.text = text
+        self.scope_combo = scope_combo
+        self.range_combo = range_combo
+        self.load = None
+
+    def kinds(self):
+        return (AUTHORIZED, UNAUTHORIZED) if self.scope_combo.currentIndex() else (self.kind,)
 
-from styles import COLORS, GLOBAL_STYLESHEET, make_button, _lighten, _darken
-from utils import decode_codes_silent, init_camera, convert_1bit_to_rgb, pil_to_qpixmap
 
 class QRAuthApp(QMainWindow):
-    def __init__(self):
+    # Attributes that point at widgets/state of whichever cached view is showing.
+    VIEW_STATE = ('camera_label', 'perf_overlay', 'status_label', 'auto_refresh_btn', '_current_log')
+
+    # "Valid for" choices of the Add view, in seconds (None = no expiry).
+    VALIDITY_CHOICES = [("Always", None), ("1 hour", 3600), ("8 hours", 8 * 3600),
+                        ("1 day", 86400), ("1 week", 7 * 86400)]
+
+    # Outline colours (BGR) per outcome, and which outcome a frame's feedback
+    # reports when it holds several codes (most severe first).
+    OUTCOME_COLORS = {AUTHORIZED: (0, 255, 0), ADDED: (0, 255, 0), DUPLICATE: (0, 165, 255),
+                      EXPIRED: (0, 165, 255), NOT_YET_VALID: (0, 165, 255), AWAITING: (0, 215, 255),
+                      UNAUTHORIZED: (0, 0, 255), LOCKED_OUT: (0, 0, 255)}
+    AUTH_SEVERITY = (LOCKED_OUT, UNAUTHORIZED, EXPIRED, NOT_YET_VALID, AWAITING, AUTHORIZED)
+
+    # "From" choices of the log views: seconds back from now, or whole days back
+    # from today's midnight as (first, last) with 0 = today.
+    LOG_RANGES = [("All", None), ("Last hour", 3600), ("Today", (0, 0)), ("Yesterday", (1, 1)),
+                  ("Last 7 days", (6, 0))]
+
+    def __init__(self, config=None, metrics=None, metrics_file=""):
         super().__init__()
+        self.config = config or load_config()
         self.setWindowTitle("QR & Barcode")
         self.resize(950, 720)
         self.setMinimumSize(700, 500)
@@ -34,20 +85,101 @@ class QRAuthApp(QMainWindow):
         self.cap = None
         self.camera_running = False
         self.current_mode = None
-        self.last_scanned = ""
-        self.last_time = 0
-        self.cooldown = 2
         self.camera_timer = QTimer(self)
+        self.camera_timer.setSingleShot(True)
         self.camera_timer.timeout.connect(self._update_camera)
+        self.scheduler = FrameScheduler()
+        self.tracker = CodeTracker()
+        cam_cfg = self.config["camera"]
+        self.camera = CameraSession(self, cam_cfg["index"], cam_cfg["width"], cam_cfg["height"],
+                                    cam_cfg["idle_timeout"])
+        # A recording or image folder can stand in for the live camera. The
+        # scan loop runs on the GUI thread, so it never waits for a frame.
+        self.camera.open_fn = lambda camera_id, width, height: open_source(
+            cam_cfg["source"] or camera_id, width, height,
+            profile=cam_cfg["profile"], latest=cam_cfg["latest_frame"], wait=0)
+        self.overlay = Overlay()
         self.generated_qr_image = None
         self.scanned_data = ""
         self.sound_enabled = True
         self.log_refresh_timer = QTimer(self)
         self.log_refresh_timer.setInterval(3000)
-        self._current_log_file = None
-        self._current_log_widget = None
+        self.log_refresh_timer.timeout.connect(self._refresh_current_log)
+        self._current_log = None
+        self._views = {}
+        self._view_state = {}
+        self.metrics = metrics or Metrics()
+        self.decoders = self._build_decoders()
+        self.metrics_file = metrics_file
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.setInterval(500)
+        self.metrics_timer.timeout.connect(self._refresh_metrics)
+        self._metrics_ticks = 0
+        self.perf_overlay = None
         self._init_files()
+        self.journal = ChangeJournal(self.authorized_file)
+        self.auth_index = AuthIndex(self.authorized_file, journal=self.journal)
+        self.logs = make_logstore(self.config["logs"], legacy={AUTHORIZED: self.authorized_log,
+                                                               UNAUTHORIZED: self.unauthorized_log})
+        self.auth = Authenticator(self.auth_index, logs=self.logs,
+                                  cooldown=2, camera=cam_cfg["source"] or cam_cfg["index"], metrics=self.metrics,
+                                  detector=make_detector(self.config["detector"]),
+                                  rules=make_rules(self.config["rules"]))
+        self.events = make_bus(self.config["events"])
+        self.snapshots = make_recorder(self.config["snapshots"])
+        self._shown_frame = None
+        self._start_sync(self.config["sync"])
+        self.purge_timer = QTimer(self)
+        self.purge_timer.setSingleShot(True)
+        self.purge_timer.timeout.connect(self._purge_expired)
+        self._schedule_purge()
+        diag_cfg = dict(self.config["diagnostics"])
+        diag_enabled = diag_cfg.pop("enabled")
+        self.diagnostics = Diagnostics(self, metrics=self.metrics, **diag_cfg)
         self._build_ui()
+        QShortcut(QKeySequence("F3"), self, self._toggle_metrics)
+        # Hidden diagnostics keys (see diagnostics.py).
+        QShortcut(QKeySequence("Ctrl+Shift+D"), self, self._toggle_diagnostics)
+        QShortcut(QKeySequence("Ctrl+Shift+P"), self, self._toggle_profiling)
+        QShortcut(QKeySequence("Ctrl+Shift+S"), self, self._dump_diagnostics)
+        if diag_enabled:
+            self.diagnostics.start()
+        if self.metrics.enabled:
+            self.metrics_timer.start()
+
+    def _start_sync(self, cfg):
+        self.sync_server = None
+        self.sync_stop = None
+        token = cfg.get("token") or os.environ.get(SYNC_TOKEN_ENV, "")
+        if (cfg["serve_port"] or cfg["peer"]) and not token:
+            print(f"sync is off: set sync.token or ${SYNC_TOKEN_ENV}", file=sys.stderr)
+            return
+        if cfg["serve_port"]:
+            self.sync_server = serve_sync(self.journal, cfg["serve_port"], cfg.get("host", "127.0.0.1"), token)
+        if cfg["peer"]:
+            # Own index instance: the pull thread must not share the GUI's mmap.
+            client = SyncClient(AuthIndex(self.authorized_file, journal=self.journal), cfg["peer"], token)
+            self.sync_stop = client.start(cfg["interval"])
+
+    def _schedule_purge(self):
+        """Wake up when the next code expires, but no more often than `purge_interval`."""
+        interval = self.config["expiry"]["purge_interval"]
+        expiry = self.auth_index.next_expiry()
+        if not interval or expiry is None:
+            return
+        delay = min(max(expiry - time.time(), interval), 86400)
+        self.purge_timer.start(int(delay * 1000))
+
+    def _purge_expired(self):
+        # Expired codes are already refused at lookup; this only tidies the
+        # list, dropping everything that ran out since the last purge at once.
+        try:
+            manage = self._views.get('manage')
+            if self.auth_index.purge_expired() and manage is not None and self.view_stack.currentWidget() is manage:
+                self._refresh_codes_list()
+        except OSError:
+            pass
+        self._schedule_purge()
 
     def _init_files(self):
         for path, header in [
@@ -68,38 +200,17 @@ class QRAuthApp(QMainWindow):
         root_layout.setSpacing(8)
         header = QFrame()
         header.setFixedHeight(70)
-        header.setStyleSheet(f"""
-            QFrame {{
-                background-color: {COLORS['bg_card']};
-                border-radius: 10px;
-            }}
-        """)
+        header.setObjectName("header")
         h_layout = QHBoxLayout(header)
         title = QLabel("🔐 QR & Barcode Authentication System")
-        title.setStyleSheet(f"""
-            color: {COLORS['accent_light']};
-            font-family: 'Segoe UI';
-            font-size: 22px;
-            font-weight: bold;
-        """)
+        title.setObjectName("appTitle")
         title.setAlignment(Qt.AlignCenter)
         h_layout.addWidget(title)
         self.sound_btn = QPushButton("🔊")
         self.sound_btn.setFixedSize(40, 40)
         self.sound_btn.setCursor(Qt.PointingHandCursor)
         self.sound_btn.setToolTip("Toggle Sound")
-        self.sound_btn.setStyleSheet(f"""
-            QPushButton {{
-                background-color: {COLORS['bg_hover']};
-                color: #ffffff;
-                font-size: 18px;
-                border: none;
-                border-radius: 20px;
-            }}
-            QPushButton:hover {{
-                background-color: {COLORS['accent']};
-            }}
-        """)
+        self.sound_btn.setObjectName("iconButton")
         self.sound_btn.clicked.connect(self._toggle_sound)
         h_layout.addWidget(self.sound_btn)
         
@@ -107,29 +218,12 @@ class QRAuthApp(QMainWindow):
         self.help_btn.setFixedSize(40, 40)
         self.help_btn.setCursor(Qt.PointingHandCursor)
         self.help_btn.setToolTip("Help & Information")
-        self.help_btn.setStyleSheet(f"""
-            QPushButton {{
-                background-color: {COLORS['bg_hover']};
-                color: #ffffff;
-                font-size: 18px;
-                border: none;
-                border-radius: 20px;
-            }}
-            QPushButton:hover {{
-                background-color: {COLORS['accent']};
-            }}
-        """)
+        self.help_btn.setObjectName("iconButton")
         self.help_btn.clicked.connect(self._show_help)
         h_layout.addWidget(self.help_btn)
         root_layout.addWidget(header)
         menu_frame = QFrame()
-        menu_frame.setStyleSheet(f"""
-            QFrame {{
-                background-color: {COLORS['bg_dark']};
-                border-radius: 12px;
-                padding: 8px;
-            }}
-        """)
+        menu_frame.setObjectName("menuFrame")
         menu_grid = QGridLayout(menu_frame)
         menu_grid.setContentsMargins(8, 8, 8, 8)
         menu_grid.setSpacing(8)
@@ -149,25 +243,7 @@ class QRAuthApp(QMainWindow):
             card_btn.setCursor(Qt.PointingHandCursor)
             card_btn.setFixedHeight(90)
             card_btn.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
-            card_btn.setStyleSheet(f"""
-                QPushButton {{
-                    background-color: {COLORS['bg_hover']};
-                    color: {COLORS['text']};
-                    font-family: 'Segoe UI';
-                    font-size: 11px;
-                    font-weight: bold;
-                    border: none;
-                    border-radius: 12px;
-                    padding: 10px 8px;
-                    text-align: center;
-                }}
-                QPushButton:hover {{
-                    background-color: {COLORS['border']};
-                }}
-                QPushButton:pressed {{
-                    background-color: {COLORS['accent']};
-                }}
-            """)
+            card_btn.setObjectName("menuCard")
             card_btn.clicked.connect(callback)
             row = idx // 4
             col = idx % 4
@@ -177,56 +253,89 @@ class QRAuthApp(QMainWindow):
         self.scroll_area = QScrollArea()
         self.scroll_area.setWidgetResizable(True)
         self.scroll_area.setFrameShape(QFrame.NoFrame)
-        self.scroll_area.setStyleSheet(f"""
-            QScrollArea {{
-                background-color: {COLORS['bg_card']};
-                border-radius: 10px;
-            }}
-        """)
-
-        self.content_widget = QWidget()
-        self.content_widget.setStyleSheet(f"background-color: {COLORS['bg_card']}; border-radius: 10px;")
-        self.content_layout = QVBoxLayout(self.content_widget)
-        self.content_layout.setAlignment(Qt.AlignTop | Qt.AlignHCenter)
-        self.content_layout.setContentsMargins(20, 10, 20, 20)
-        self.content_layout.setSpacing(10)
-
-        self.scroll_area.setWidget(self.content_widget)
+        self.scroll_area.setObjectName("contentScroll")
+
+        self.view_stack = QStackedWidget()
+        self.view_stack.setObjectName("viewStack")
+        self.content_layout = None
+
+        self.scroll_area.setWidget(self.view_stack)
         root_layout.addWidget(self.scroll_area, 1)
 
         self._show_welcome()
 
-    def _clear_content(self):
+    def _build_decoders(self):
+        cfg = self.config["decoder"]
+        backend = resolve_backend(cfg)
+        return {mode: make_decoder(backend, cfg["symbols"].get(mode), cfg.get("escalate"), self.metrics)
+                for mode in ("add", "auth", "scanner")}
+
+    # ── Cached views ──────────────────────────────────────────────────────
+    def _activate_view(self, name, build, mode=None):
+        """Show view `name`, building it with `build()` the first time only."""
+        self._leave_view()
+        page = self._views.get(name)
+        if page is None:
+            page = QWidget()
+            page.setObjectName("viewPage")
+            layout = QVBoxLayout(page)
+            layout.setAlignment(Qt.AlignTop | Qt.AlignHCenter)
+            layout.setContentsMargins(20, 10, 20, 20)
+            layout.setSpacing(10)
+            self.content_layout = layout
+            for attr in self.VIEW_STATE:
+                setattr(self, attr, None)
+            build()
+            self._view_state[name] = {attr: getattr(self, attr) for attr in self.VIEW_STATE}
+            self.view_stack.addWidget(page)
+            self._views[name] = page
+        else:
+            for attr, value in self._view_state[name].items():
+                setattr(self, attr, value)
+        self.content_layout = page.layout()
+        self._set_current_page(page)
+        self.current_mode = mode
+        if self.perf_overlay is not None:
+            self.perf_overlay.setVisible(self.metrics.enabled)
+        self.diagnostics.view_switched(name)
+        return page
+
+    def _set_current_page(self, page):
+        # Hidden pages must not contribute to the stack's size hint, otherwise
+        # every view would scroll as far as the longest one.
+        for i in range(self.view_stack.count()):
+            w = self.view_stack.widget(i)
+            policy = QSizePolicy.Preferred if w is page else QSizePolicy.Ignored
+            w.setSizePolicy(policy, policy)
+        self.view_stack.setCurrentWidget(page)
+        self.view_stack.adjustSize()
+
+    def _leave_view(self):
         self._stop_camera()
         self.log_refresh_timer.stop()
-        while self.content_layout.count():
-            item = self.content_layout.takeAt(0)
-            w = item.widget()
-            if w:
-                w.deleteLater()
+
+    @staticmethod
+    def _remember_initial(label):
+        label.setProperty("initialText", label.text())
+
+    @staticmethod
+    def _reset_label(label):
+        label.setText(label.property("initialText"))
+        if label.property("state") is not None:
+            set_state(label, "state", "idle")
 
     def _show_welcome(self):
-        self._clear_content()
+        self._activate_view('welcome', self._build_welcome)
 
+    def _build_welcome(self):
         title = QLabel("👋 Welcome!")
         title.setAlignment(Qt.AlignCenter)
-        title.setStyleSheet(f"""
-            color: {COLORS['text']};
-            font-family: 'Segoe UI';
-            font-size: 30px;
-            font-weight: bold;
-            padding-top: 40px;
-        """)
+        title.setObjectName("welcomeTitle")
         self.content_layout.addWidget(title)
 
         sub = QLabel("Select an option from the menu above to get started")
         sub.setAlignment(Qt.AlignCenter)
-        sub.setStyleSheet(f"""
-            color: {COLORS['text_dim']};
-            font-family: 'Segoe UI';
-            font-size: 14px;
-            padding-bottom: 20px;
-        """)
+        sub.setObjectName("welcomeSubtitle")
         self.content_layout.addWidget(sub)
         self.content_layout.addStretch()
 
@@ -237,221 +346,278 @@ class QRAuthApp(QMainWindow):
 
     def _add_camera_view(self):
         cam_frame = QFrame()
-        cam_frame.setStyleSheet(f"""
-            QFrame {{
-                background-color: {COLORS['border']};
-                border-radius: 8px;
-                padding: 3px;
-            }}
-        """)
+        cam_frame.setObjectName("cameraFrame")
         cam_inner = QVBoxLayout(cam_frame)
         cam_inner.setContentsMargins(3, 3, 3, 3)
 
         self.camera_label = QLabel()
         self.camera_label.setFixedSize(540, 360)
         self.camera_label.setAlignment(Qt.AlignCenter)
-        self.camera_label.setStyleSheet(f"background-color: {COLORS['bg_dark']}; border-radius: 6px;")
+        self.camera_label.setObjectName("cameraLabel")
         cam_inner.addWidget(self.camera_label)
 
+        self.perf_overlay = QLabel(self.camera_label)
+        self.perf_overlay.move(6, 6)
+        self.perf_overlay.setObjectName("perfOverlay")
+        self.perf_overlay.setVisible(self.metrics.enabled)
+
         self.content_layout.addWidget(cam_frame, alignment=Qt.AlignCenter)
-        snap_btn = make_button("📸 Capture Snapshot", COLORS['accent'], font_size=10, padx=15, pady=6)
+        snap_btn = make_button("📸 Capture Snapshot", size='small')
         snap_btn.clicked.connect(self._capture_snapshot)
         self.content_layout.addWidget(snap_btn, alignment=Qt.AlignCenter)
 
     def _start_camera(self):
         try:
-            self.cap = init_camera()
+            self.cap = self.camera.acquire()
             self.camera_running = True
-            self.camera_timer.start(30)
+            self.scheduler.reset(self.cap.get(cv2.CAP_PROP_FPS))
+            self.tracker.reset()
+            self.overlay.clear()
+            self.camera_timer.start(0)
         except Exception as e:
             QMessageBox.critical(self, "Camera Error", f"Failed to start camera: {e}")
 
-    def _stop_camera(self):
+    def _stop_camera(self, release=False):
         self.camera_running = False
         self.camera_timer.stop()
-        if self.cap:
-            self.cap.release()
-            self.cap = None
+        if release:
+            self.camera.release()
+        else:
+            self.camera.pause()
+        self.cap = None
 
     def _update_camera(self):
         if not self.camera_running or not self.cap:
             return
-        ret, frame = self.cap.read()
+        tick_start = time.perf_counter()
+        try:
+            with self.diagnostics.scan_profile():
+                self._camera_tick()
+        finally:
+            if self.camera_running:
+                elapsed_ms = (time.perf_counter() - tick_start) * 1000.0
+                self.camera_timer.start(self.scheduler.next_interval_ms(elapsed_ms))
+
+    def _camera_tick(self):
+        metrics = self.metrics
+        with metrics.stage("capture"):
+            ret, frame = self.cap.read()
         if not ret:
             return
-        barcodes = decode_codes_silent(frame)
+        # Frames are shared as-is with the tracker, the recorder and the
+        # preview; overlays are painted on the preview pixmap instead.
+        frame.setflags(write=False)
+        metrics.frame()
+        if self.snapshots is not None:
+            self.snapshots.push(frame, getattr(self.cap, "timestamp", None) or time.time())
+        with metrics.stage("motion"):
+            changed = self.scheduler.should_decode(frame)
+        if changed:
+            self._scan_frame(frame)
+        # Painted even for an unchanged frame so outlines keep fading.
+        with metrics.stage("preview"):
+            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            frame_rgb = cv2.resize(frame_rgb, (540, 360))
+            h, w, ch = frame_rgb.shape
+            img = QImage(frame_rgb.data, w, h, ch * w, QImage.Format_RGB888)
+            pixmap = self.overlay.paint(QPixmap.fromImage(img), (frame.shape[1], frame.shape[0]))
+            self.camera_label.setPixmap(pixmap)
+            self._shown_frame = frame
+
+    def _scan_frame(self, frame):
+        """Track, decode and judge the codes of a frame that changed."""
+        metrics = self.metrics
+        captured_at = getattr(self.cap, "captured_at", None)
+        if captured_at is not None:
+            metrics.observe("latency", (time.monotonic() - captured_at) * 1000.0)
+        with metrics.stage("track"):
+            barcodes = self.tracker.confirm(frame)
+        if barcodes is None:
+            with metrics.stage("decode"):
+                barcodes = decode_codes_silent(frame, self.decoders.get(self.current_mode))
+            self.tracker.update(frame, barcodes)
+        if barcodes:
+            self.scheduler.note_detection()
+            with metrics.stage("process"):
+                self._process_codes(barcodes)
+
+    def _process_codes(self, barcodes):
+        """Judge every code of the frame together and give one combined feedback."""
+        polygons = {}
         for bc in barcodes:
-            self._process_barcode(frame, bc)
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        frame_rgb = cv2.resize(frame_rgb, (540, 360))
-        h, w, ch = frame_rgb.shape
-        img = QImage(frame_rgb.data, w, h, ch * w, QImage.Format_RGB888)
-        self.camera_label.setPixmap(QPixmap.fromImage(img))
-
-    def _process_barcode(self, frame, bc):
-        data = bc.data.decode("utf-8").strip()
-        if not data:
+            data = bc.data.decode("utf-8").strip()
+            if data:
+                polygons[data] = [(int(x), int(y)) for x, y in bc.polygon]
+        if not polygons:
             return
-
-        current_time = time.time()
-        pts = np.array([bc.polygon], np.int32).reshape((-1, 1, 2))
-
-        if data == self.last_scanned and (current_time - self.last_time) < self.cooldown:
+        events = self.auth.process_frame(list(polygons), self.current_mode, getattr(self.cap, "timestamp", None))
+        decided = {event.code for event in events}
+        for data, pts in polygons.items():
+            if data not in decided:
+                # Held back by the cooldown: keep its own outline and label.
+                self.overlay.repeat(data, pts)
+        if not events:
             return
-
-        self.last_scanned = data
-        self.last_time = current_time
-        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        for event in events:
+            self.events.publish(event)
+        denied = [e for e in events if e.outcome in DENIED or e.outcome == LOCKED_OUT]
+        if self.snapshots is not None and denied:
+            self.snapshots.trigger(denied[0])
 
         if self.current_mode == 'add':
-            self._add_authorized_code(data, pts, frame)
+            self._add_authorized_codes(events, polygons)
         elif self.current_mode == 'auth':
-            self._authenticate_code(data, pts, frame, now)
+            self._authenticate_codes(events, polygons)
         elif self.current_mode == 'scanner':
-            self._scan_code(data, pts, frame, bc.rect)
+            self._scan_codes(events, polygons)
+
+    def _draw_events(self, events, polygons):
+        for event in events:
+            label = event.code if self.current_mode == 'scanner' else ""
+            color = self.OUTCOME_COLORS.get(event.outcome, (255, 0, 255))
+            self.overlay.add(event.code, polygons.get(event.code), color, label)
 
     def _show_add_qr(self):
-        self._clear_content()
-        self.current_mode = 'add'
+        self._activate_view('add', self._build_add_qr, mode='add')
+        self._reset_label(self.status_label)
+        self._start_camera()
 
-        self._add_section_title("➕ Add Authorized Code", COLORS['success'])
+    def _build_add_qr(self):
+        self._add_section_title("➕ Add Authorized Code", 'success')
         self._add_section_subtitle("Scan a QR code or barcode to add it to the authorized list")
         self._add_camera_view()
 
+        valid_label = QLabel("Valid for:")
+        valid_label.setObjectName("fieldLabel")
+        self.content_layout.addWidget(valid_label)
+        self.validity_combo = QComboBox()
+        self.validity_combo.addItems([name for name, _ in self.VALIDITY_CHOICES])
+        self.validity_combo.setObjectName("formatCombo")
+        self.validity_combo.currentIndexChanged.connect(self._set_validity)
+        self.content_layout.addWidget(self.validity_combo)
+
         self.status_label = QLabel("📷 Point camera at QR code or barcode to add")
         self.status_label.setAlignment(Qt.AlignCenter)
-        self.status_label.setStyleSheet(f"""
-            color: {COLORS['text_dim']};
-            font-family: 'Segoe UI';
-            font-size: 13px;
-            padding: 8px;
-        """)
+        self.status_label.setObjectName("statusLabel")
+        self.status_label.setProperty("state", "idle")
+        self._remember_initial(self.status_label)
         self.content_layout.addWidget(self.status_label)
         self.content_layout.addStretch()
-        self._start_camera()
 
-    def _add_authorized_code(self, data, pts, frame):
-        with open(self.authorized_file, 'r') as f:
-            existing = f.read().splitlines()
+    def _set_validity(self, index):
+        self.auth.valid_for = self.VALIDITY_CHOICES[index][1]
 
-        if data in existing:
-            cv2.polylines(frame, [pts], True, (0, 165, 255), 4)
+    def _add_authorized_codes(self, events, polygons):
+        added = [e for e in events if e.outcome == ADDED]
+        event = added[0] if added else events[0]
+        self._draw_events(events, polygons)
+        data = event.code
+        if not added:
             self.status_label.setText(f"⚠️ Already authorized: {data[:40]}...")
-            self.status_label.setStyleSheet(f"color: {COLORS['warning']}; font-family: 'Segoe UI'; font-size: 13px; padding: 8px;")
+            set_state(self.status_label, "state", "warning")
             self._play_beep(1000, 200)
         else:
-            with open(self.authorized_file, 'a') as f:
-                f.write(data + "\n")
-            cv2.polylines(frame, [pts], True, (0, 255, 0), 4)
-            self.status_label.setText(f"✅ Added: {data[:40]}...")
-            self.status_label.setStyleSheet(f"color: {COLORS['success']}; font-family: 'Segoe UI'; font-size: 13px; padding: 8px;")
+            until = f" (until {format_valid_time(event.timestamp + self.auth.valid_for)})" if self.auth.valid_for else ""
+            more = f" and {len(added) - 1} more" if len(added) > 1 else ""
+            self.status_label.setText(f"✅ Added: {data[:40]}...{more}{until}")
+            set_state(self.status_label, "state", "success")
             self._play_beep(1500, 300)
+            self._schedule_purge()
 
     def _show_auth(self):
-        self._clear_content()
-        self.current_mode = 'auth'
+        self._activate_view('auth', self._build_auth, mode='auth')
+        self._reset_label(self.status_label)
+        self._start_camera()
 
-        self._add_section_title("🔒 Authentication Mode", COLORS['accent_light'])
+    def _build_auth(self):
+        self._add_section_title("🔒 Authentication Mode", 'accent_light')
         self._add_section_subtitle("Scan QR code to verify authorization")
         self._add_camera_view()
 
         self.status_label = QLabel("🔍 Waiting for scan...")
         self.status_label.setAlignment(Qt.AlignCenter)
-        self.status_label.setStyleSheet(f"""
-            color: {COLORS['text_dim']};
-            font-family: 'Segoe UI';
-            font-size: 15px;
-            font-weight: bold;
-            padding: 8px;
-        """)
+        self.status_label.setObjectName("statusLabel")
+        self.status_label.setProperty("state", "idle")
+        self.status_label.setProperty("emphasis", True)
+        self._remember_initial(self.status_label)
         self.content_layout.addWidget(self.status_label)
         self.content_layout.addStretch()
-        self._start_camera()
 
-    def _authenticate_code(self, data, pts, frame, now):
-        with open(self.authorized_file, 'r') as f:
-            authorized_list = f.read().splitlines()
-
-        if data in authorized_list:
-            cv2.polylines(frame, [pts], True, (0, 255, 0), 4)
-            self.status_label.setText("✅ AUTHORIZED ACCESS")
-            self.status_label.setStyleSheet(f"color: {COLORS['success']}; font-family: 'Segoe UI'; font-size: 15px; font-weight: bold; padding: 8px;")
+    def _authenticate_codes(self, events, polygons):
+        event = min(events, key=lambda e: self.AUTH_SEVERITY.index(e.outcome))
+        self._draw_events(events, polygons)
+        if event.outcome == AUTHORIZED:
+            granted = len(events)
+            self.status_label.setText("✅ AUTHORIZED ACCESS" + (f" ({granted} codes)" if granted > 1 else ""))
+            set_state(self.status_label, "state", "success")
             self._play_beep(1500, 200)
-            with open(self.authorized_log, 'a') as f:
-                f.write(f"{now}  |  {data}\n")
+        elif event.outcome == LOCKED_OUT:
+            self.status_label.setText("⛔ GATE LOCKED — too many denied scans")
+            set_state(self.status_label, "state", "danger")
+        elif event.outcome == AWAITING:
+            self.status_label.setText("🔑 Waiting for the matching code...")
+            set_state(self.status_label, "state", "warning")
+            self._play_beep(1200, 150)
+        elif event.outcome in (EXPIRED, NOT_YET_VALID):
+            self.status_label.setText("⌛ PASS EXPIRED" if event.outcome == EXPIRED else "⏳ PASS NOT YET VALID")
+            set_state(self.status_label, "state", "warning")
+            self._play_beep(800, 400)
         else:
-            cv2.polylines(frame, [pts], True, (0, 0, 255), 4)
             self.status_label.setText("❌ UNAUTHORIZED ACCESS")
-            self.status_label.setStyleSheet(f"color: {COLORS['danger']}; font-family: 'Segoe UI'; font-size: 15px; font-weight: bold; padding: 8px;")
+            set_state(self.status_label, "state", "danger")
             self._play_beep(800, 400)
             time.sleep(0.1)
             self._play_beep(800, 400)
-            with open(self.unauthorized_log, 'a') as f:
-                f.write(f"{now}  |  {data}\n")
+        alerts = [e.alert for e in events if e.alert]
+        if alerts:
+            self.metrics.set_counter("alerts", self.auth.detector.alerts)
+            if LOCKOUT in alerts:
+                self.status_label.setText("⛔ GATE LOCKED — too many denied scans")
+            else:
+                self.status_label.setText(f"{self.status_label.text()}  🚨 repeated {alerts[0]}")
+            set_state(self.status_label, "state", "danger")
 
     def _show_scanner(self):
-        self._clear_content()
-        self.current_mode = 'scanner'
+        self._activate_view('scanner', self._build_scanner, mode='scanner')
+        self._reset_label(self.scanner_result)
+        self._start_camera()
 
-        self._add_section_title("📷 QR / Barcode Scanner", COLORS['warning'])
+    def _build_scanner(self):
+        self._add_section_title("📷 QR / Barcode Scanner", 'warning')
         self._add_section_subtitle("Scan any QR code or barcode to view its content")
         self._add_camera_view()
 
         self.scanner_result = QLabel("📱 Scan a QR code or barcode...")
         self.scanner_result.setAlignment(Qt.AlignCenter)
         self.scanner_result.setWordWrap(True)
-        self.scanner_result.setStyleSheet(f"""
-            color: {COLORS['text']};
-            background-color: {COLORS['bg_hover']};
-            font-family: 'Consolas';
-            font-size: 12px;
-            padding: 15px 20px;
-            border-radius: 8px;
-        """)
+        self.scanner_result.setObjectName("scannerResult")
+        self._remember_initial(self.scanner_result)
         self.content_layout.addWidget(self.scanner_result)
 
-        self.copy_btn = make_button("📋 Copy to Clipboard", COLORS['accent'], font_size=10, padx=20, pady=8)
+        self.copy_btn = make_button("📋 Copy to Clipboard", size='wide')
         self.copy_btn.clicked.connect(self._copy_scanned_data)
         self.content_layout.addWidget(self.copy_btn, alignment=Qt.AlignCenter)
 
         self.content_layout.addStretch()
-        self._start_camera()
 
-    def _scan_code(self, data, pts, frame, rect):
-        cv2.polylines(frame, [pts], True, (255, 0, 255), 4)
-        x, y, w, h = rect
-        cv2.putText(frame, data, (x, y - 10),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 0, 255), 2)
+    def _scan_codes(self, events, polygons):
+        self._draw_events(events, polygons)
+        data = "\n".join(event.code for event in events)
 
-        self.scanner_result.setText(f"📱 {data}")
+        self.scanner_result.setText("\n".join(f"📱 {event.code}" for event in events))
         self.scanned_data = data
         self._play_beep(1500, 200)
         clipboard = QApplication.clipboard()
         clipboard.setText(data)
 
         self.copy_btn.setText("✅ Copied!")
-        self.copy_btn.setStyleSheet(f"""
-            QPushButton {{
-                background-color: {COLORS['success']};
-                color: #ffffff; font-family: 'Segoe UI'; font-size: 10px;
-                font-weight: bold; border: none; border-radius: 6px;
-                padding: 8px 20px;
-            }}
-        """)
+        set_state(self.copy_btn, "role", "success")
         QTimer.singleShot(2000, lambda: self._reset_copy_btn())
 
     def _reset_copy_btn(self):
         if hasattr(self, 'copy_btn') and self.copy_btn:
             self.copy_btn.setText("📋 Copy to Clipboard")
-            self.copy_btn.setStyleSheet(f"""
-                QPushButton {{
-                    background-color: {COLORS['accent']};
-                    color: #ffffff; font-family: 'Segoe UI'; font-size: 10px;
-                    font-weight: bold; border: none; border-radius: 6px;
-                    padding: 8px 20px;
-                }}
-                QPushButton:hover {{ background-color: {_lighten(COLORS['accent'])}; }}
-            """)
+            set_state(self.copy_btn, "role", "accent")
 
     def _copy_scanned_data(self):
         if self.scanned_data:
@@ -462,45 +628,34 @@ class QRAuthApp(QMainWindow):
             QMessageBox.warning(self, "No Data", "No data to copy. Scan a code first.")
 
     def _show_generate_qr(self):
-        self._clear_content()
-        self.current_mode = None
+        self._activate_view('generate_qr', self._build_generate_qr)
+        self.generated_qr_image = None
+        self.qr_preview_label.setText("QR Code preview")
+        self.qr_content_preview.hide()
+        self.save_qr_btn.setEnabled(False)
 
-        self._add_section_title("🔲 QR Code Generator", COLORS['purple'])
+    def _build_generate_qr(self):
+        self._add_section_title("🔲 QR Code Generator", 'purple')
         self._add_section_subtitle("Enter text or URL to generate a QR code")
         input_label = QLabel("Content:")
-        input_label.setStyleSheet(f"""
-            color: {COLORS['text']};
-            font-family: 'Segoe UI';
-            font-size: 12px;
-            font-weight: bold;
-        """)
+        input_label.setObjectName("fieldLabel")
         self.content_layout.addWidget(input_label)
 
         self.qr_input = QPlainTextEdit()
         self.qr_input.setFixedHeight(90)
-        self.qr_input.setStyleSheet(f"""
-            QPlainTextEdit {{
-                color: {COLORS['text']};
-                background-color: {COLORS['bg_dark']};
-                font-family: 'Consolas';
-                font-size: 11px;
-                border: none;
-                border-radius: 6px;
-                padding: 10px;
-            }}
-        """)
+        self.qr_input.setObjectName("codeInput")
         self.content_layout.addWidget(self.qr_input)
         btn_row = QWidget()
-        btn_row.setStyleSheet("background: transparent;")
+        btn_row.setObjectName("buttonRow")
         btn_row_layout = QHBoxLayout(btn_row)
         btn_row_layout.setContentsMargins(0, 0, 0, 0)
         btn_row_layout.setSpacing(10)
 
-        gen_btn = make_button("🔲 Generate QR", COLORS['purple'])
+        gen_btn = make_button("🔲 Generate QR", 'purple')
         gen_btn.clicked.connect(self._generate_qr)
         btn_row_layout.addWidget(gen_btn)
 
-        self.save_qr_btn = make_button("💾 Save QR", COLORS['accent'])
+        self.save_qr_btn = make_button("💾 Save QR")
         self.save_qr_btn.setEnabled(False)
         self.save_qr_btn.clicked.connect(self._save_generated_image)
         btn_row_layout.addWidget(self.save_qr_btn)
@@ -508,43 +663,23 @@ class QRAuthApp(QMainWindow):
         btn_row_layout.addStretch()
         self.content_layout.addWidget(btn_row)
         preview_frame = QFrame()
-        preview_frame.setStyleSheet(f"""
-            QFrame {{
-                background-color: {COLORS['border']};
-                border-radius: 8px;
-                padding: 3px;
-            }}
-        """)
+        preview_frame.setObjectName("previewFrame")
         pf_layout = QVBoxLayout(preview_frame)
         pf_layout.setContentsMargins(3, 3, 3, 3)
         self.qr_preview_label = QLabel("QR Code preview")
         self.qr_preview_label.setFixedSize(220, 220)
         self.qr_preview_label.setAlignment(Qt.AlignCenter)
-        self.qr_preview_label.setStyleSheet(f"""
-            color: {COLORS['text_dim']};
-            background-color: {COLORS['bg_dark']};
-            font-family: 'Segoe UI';
-            font-size: 12px;
-            border-radius: 6px;
-        """)
+        self.qr_preview_label.setObjectName("previewLabel")
         pf_layout.addWidget(self.qr_preview_label)
         self.content_layout.addWidget(preview_frame, alignment=Qt.AlignCenter)
         self.qr_content_preview = QLabel("")
         self.qr_content_preview.setWordWrap(True)
         self.qr_content_preview.setAlignment(Qt.AlignLeft)
-        self.qr_content_preview.setStyleSheet(f"""
-            color: {COLORS['text_dim']};
-            background-color: {COLORS['bg_hover']};
-            font-family: 'Consolas';
-            font-size: 10px;
-            padding: 10px 15px;
-            border-radius: 6px;
-        """)
+        self.qr_content_preview.setObjectName("contentPreview")
         self.qr_content_preview.hide()
         self.content_layout.addWidget(self.qr_content_preview)
 
         self.content_layout.addStretch()
-        self.generated_qr_image = None
 
     def _generate_qr(self):
         content = self.qr_input.toPlainText().strip()
@@ -552,11 +687,7 @@ class QRAuthApp(QMainWindow):
             QMessageBox.warning(self, "Empty", "Please enter some text or URL.")
             return
         try:
-            qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=10, border=4)
-            qr.add_data(content)
-            qr.make(fit=True)
-            qr_img = qr.make_image(fill_color="black", back_color="white")
-            pil_img = convert_1bit_to_rgb(qr_img)
+            pil_img = make_qr_image(content)
 
             self.generated_qr_image = pil_img
             preview = pil_img.resize((200, 200), Image.Resampling.LANCZOS)
@@ -586,21 +717,20 @@ class QRAuthApp(QMainWindow):
                 QMessageBox.critical(self, "Error", f"Failed to save: {e}")
 
     def _show_generate_barcode(self):
-        self._clear_content()
-        self.current_mode = None
+        self._activate_view('generate_barcode', self._build_generate_barcode)
+        self.generated_qr_image = None
+        self.barcode_preview_label.setText("Barcode preview")
+        self.barcode_content_preview.hide()
+        self.save_barcode_btn.setEnabled(False)
 
-        self._add_section_title("📊 Barcode Generator", '#e67e22')
+    def _build_generate_barcode(self):
+        self._add_section_title("📊 Barcode Generator", 'orange')
         self._add_section_subtitle("Enter data and select a barcode format to generate")
 
         # Format selection
         from PySide6.QtWidgets import QComboBox
         format_label = QLabel("Barcode Format:")
-        format_label.setStyleSheet(f"""
-            color: {COLORS['text']};
-            font-family: 'Segoe UI';
-            font-size: 12px;
-            font-weight: bold;
-        """)
+        format_label.setObjectName("fieldLabel")
         self.content_layout.addWidget(format_label)
 
         self.barcode_format = QComboBox()
@@ -614,63 +744,28 @@ class QRAuthApp(QMainWindow):
             "itf — ITF (even digit count)",
             "pzn7 — PZN (6 digits)",
         ])
-        self.barcode_format.setStyleSheet(f"""
-            QComboBox {{
-                color: {COLORS['text']};
-                background-color: {COLORS['bg_dark']};
-                font-family: 'Consolas';
-                font-size: 11px;
-                border: 2px solid {COLORS['border']};
-                border-radius: 6px;
-                padding: 8px 12px;
-            }}
-            QComboBox::drop-down {{
-                border: none;
-                padding-right: 10px;
-            }}
-            QComboBox QAbstractItemView {{
-                color: {COLORS['text']};
-                background-color: {COLORS['bg_dark']};
-                selection-background-color: {COLORS['accent']};
-                border: 1px solid {COLORS['border']};
-            }}
-        """)
+        self.barcode_format.setObjectName("formatCombo")
         self.content_layout.addWidget(self.barcode_format)
         input_label = QLabel("Data:")
-        input_label.setStyleSheet(f"""
-            color: {COLORS['text']};
-            font-family: 'Segoe UI';
-            font-size: 12px;
-            font-weight: bold;
-        """)
+        input_label.setObjectName("fieldLabel")
         self.content_layout.addWidget(input_label)
 
         self.barcode_input = QPlainTextEdit()
         self.barcode_input.setFixedHeight(60)
         self.barcode_input.setPlaceholderText("Enter barcode data (e.g. 123456789012 for EAN-13)")
-        self.barcode_input.setStyleSheet(f"""
-            QPlainTextEdit {{
-                color: {COLORS['text']};
-                background-color: {COLORS['bg_dark']};
-                font-family: 'Consolas';
-                font-size: 11px;
-                border: none;
-                border-radius: 6px;
-                padding: 10px;
-            }}
-        """)
+        self.barcode_input.setObjectName("codeInput")
         self.content_layout.addWidget(self.barcode_input)
         btn_row = QWidget()
-        btn_row.setStyleSheet("background: transparent;")
+        btn_row.setObjectName("buttonRow")
         btn_row_layout = QHBoxLayout(btn_row)
         btn_row_layout.setContentsMargins(0, 0, 0, 0)
         btn_row_layout.setSpacing(10)
 
-        gen_btn = make_button("📊 Generate Barcode", '#e67e22')
+        gen_btn = make_button("📊 Generate Barcode", 'orange')
         gen_btn.clicked.connect(self._generate_barcode)
         btn_row_layout.addWidget(gen_btn)
 
-        self.save_barcode_btn = make_button("💾 Save Barcode", COLORS['accent'])
+        self.save_barcode_btn = make_button("💾 Save Barcode")
         self.save_barcode_btn.setEnabled(False)
         self.save_barcode_btn.clicked.connect(self._save_generated_image)
         btn_row_layout.addWidget(self.save_barcode_btn)
@@ -678,42 +773,22 @@ class QRAuthApp(QMainWindow):
         btn_row_layout.addStretch()
         self.content_layout.addWidget(btn_row)
         preview_frame = QFrame()
-        preview_frame.setStyleSheet(f"""
-            QFrame {{
-                background-color: {COLORS['border']};
-                border-radius: 8px;
-                padding: 3px;
-            }}
-        """)
+        preview_frame.setObjectName("previewFrame")
         pf_layout = QVBoxLayout(preview_frame)
         pf_layout.setContentsMargins(3, 3, 3, 3)
         self.barcode_preview_label = QLabel("Barcode preview")
         self.barcode_preview_label.setFixedSize(400, 180)
         self.barcode_preview_label.setAlignment(Qt.AlignCenter)
-        self.barcode_preview_label.setStyleSheet(f"""
-            color: {COLORS['text_dim']};
-            background-color: {COLORS['bg_dark']};
-            font-family: 'Segoe UI';
-            font-size: 12px;
-            border-radius: 6px;
-        """)
+        self.barcode_preview_label.setObjectName("previewLabel")
         pf_layout.addWidget(self.barcode_preview_label)
         self.content_layout.addWidget(preview_frame, alignment=Qt.AlignCenter)
         self.barcode_content_preview = QLabel("")
         self.barcode_content_preview.setWordWrap(True)
         self.barcode_content_preview.setAlignment(Qt.AlignLeft)
-        self.barcode_content_preview.setStyleSheet(f"""
-            color: {COLORS['text_dim']};
-            background-color: {COLORS['bg_hover']};
-            font-family: 'Consolas';
-            font-size: 10px;
-            padding: 10px 15px;
-            border-radius: 6px;
-        """)
+        self.barcode_content_preview.setObjectName("contentPreview")
         self.barcode_content_preview.hide()
         self.content_layout.addWidget(self.barcode_content_preview)
         self.content_layout.addStretch()
-        self.generated_qr_image = None
 
     def _generate_barcode(self):
         data = self.barcode_input.toPlainText().strip()
@@ -723,28 +798,7 @@ class QRAuthApp(QMainWindow):
         fmt = self.barcode_format.currentText().split(" — ")[0].strip()
 
         try:
-            bc_class = barcode.get_barcode_class(fmt)
-            bc_instance = bc_class(data, writer=ImageWriter())
-            filename = "temp_barcode"
-            bc_instance.save(filename, options={
-                "write_text": True,
-                "module_width": 0.4,
-                "module_height": 15.0,
-                "font_size": 10,
-                "text_distance": 5,
-                "quiet_zone": 6.5,
-            })
-            full_path = f"{filename}.png"
-            try:
-                src_img = Image.open(full_path)
-                pil_img = Image.new("RGB", src_img.size, (255, 255, 255))
-                if src_img.mode == 'RGBA':
-                     pil_img.paste(src_img, (0, 0), src_img)
-                else:
-                     pil_img.paste(src_img, (0, 0))
-            finally:
-                if os.path.exists(full_path):
-                    os.remove(full_path)
+            pil_img = make_barcode_image(fmt, data)
             self.generated_qr_image = pil_img
             w, h = pil_img.size
             ratio = min(390 / w, 160 / h)
@@ -761,35 +815,52 @@ class QRAuthApp(QMainWindow):
             QMessageBox.critical(self, "Error", f"Failed to generate barcode:\n{e}")
 
     def _show_auth_logs(self):
-        self._clear_content()
-        self.current_mode = None
-        self._add_section_title("📗 Authorized Access Log", COLORS['success'])
-        self._create_log_view(self.authorized_log, COLORS['success'])
+        self._activate_view('auth_logs', lambda: self._create_log_view(
+            "📗 Authorized Access Log", AUTHORIZED, 'success'))
+        self._on_log_view_shown()
 
     def _show_unauth_logs(self):
-        self._clear_content()
-        self.current_mode = None
-        self._add_section_title("📕 Unauthorized Access Log", COLORS['danger'])
-        self._create_log_view(self.unauthorized_log, COLORS['danger'])
+        self._activate_view('unauth_logs', lambda: self._create_log_view(
+            "📕 Unauthorized Access Log", UNAUTHORIZED, 'danger'))
+        self._on_log_view_shown()
 
-    def _create_log_view(self, log_file, accent_color):
+    def _on_log_view_shown(self):
+        self._set_auto_refresh_btn(False)
+        self._current_log.load()
+
+    def _refresh_current_log(self):
+        if self._current_log is not None:
+            self._current_log.load()
+
+    def _create_log_view(self, title, kind, role):
+        self._add_section_title(title, role)
         controls = QWidget()
-        controls.setStyleSheet("background: transparent;")
+        controls.setObjectName("buttonRow")
         cl = QHBoxLayout(controls)
         cl.setContentsMargins(0, 0, 0, 0)
         cl.setSpacing(10)
 
-        refresh_btn = make_button("🔄 Refresh", accent_color, font_size=10, padx=15, pady=5)
-        clear_btn = make_button("🗑️ Clear Log", COLORS['danger'], font_size=10, padx=15, pady=5)
-        export_btn = make_button("💾 Export CSV", COLORS['accent'], font_size=10, padx=15, pady=5)
+        refresh_btn = make_button("🔄 Refresh", role, size='compact')
+        clear_btn = make_button("🗑️ Clear Log", 'danger', size='compact')
+        export_btn = make_button("💾 Export", size='compact')
         cl.addWidget(refresh_btn)
         cl.addWidget(clear_btn)
         cl.addWidget(export_btn)
+
+        # Which outcomes and how far back; every gate's shards are merged by time.
+        scope_combo = QComboBox()
+        scope_combo.addItems(["This log", "Both logs"])
+        scope_combo.setObjectName("formatCombo")
+        range_combo = QComboBox()
+        range_combo.addItems([name for name, _ in self.LOG_RANGES])
+        range_combo.setObjectName("formatCombo")
+        cl.addWidget(scope_combo)
+        cl.addWidget(range_combo)
         cl.addStretch()
 
         # Auto-refresh toggle
-        self.auto_refresh_btn = make_button("⏰ Auto-Refresh: OFF", COLORS['border'], font_size=10, padx=15, pady=5)
-        self.auto_refresh_btn.clicked.connect(lambda: self._toggle_auto_refresh(log_file))
+        self.auto_refresh_btn = make_button("⏰ Auto-Refresh: OFF", 'border', size='compact')
+        self.auto_refresh_btn.clicked.connect(self._toggle_auto_refresh)
         cl.addWidget(self.auto_refresh_btn)
 
         self.content_layout.addWidget(controls)
@@ -797,68 +868,70 @@ class QRAuthApp(QMainWindow):
         log_text.setReadOnly(True)
         log_text.setMinimumHeight(300)
         log_text.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-        log_text.setStyleSheet(f"""
-            QTextEdit {{
-                color: {COLORS['text']};
-                background-color: {COLORS['bg_dark']};
-                font-family: 'Consolas';
-                font-size: 11px;
-                border: 2px solid {COLORS['border']};
-                border-radius: 8px;
-                padding: 15px;
-            }}
-        """)
+        log_text.setObjectName("logView")
         self.content_layout.addWidget(log_text, 1)
 
-        self._load_log(log_file, log_text)
-        self._current_log_file = log_file
-        self._current_log_widget = log_text
-
-        refresh_btn.clicked.connect(lambda: self._load_log(log_file, log_text))
-        clear_btn.clicked.connect(lambda: self._clear_log(log_file, log_text))
-        export_btn.clicked.connect(lambda: self._export_csv(log_file))
-
-    def _load_log(self, log_file, text_widget):
-        try:
-            with open(log_file, 'r') as f:
-                content = f.read()
-            text_widget.setPlainText(content.strip() if content.strip() else "📭 No entries yet...")
-        except FileNotFoundError:
-            text_widget.setPlainText("📭 Log file not found...")
+        log = _LogViewState(kind, log_text, scope_combo, range_combo)
+        log.load = lambda: self._load_log(log)
+        self._current_log = log
+
+        refresh_btn.clicked.connect(log.load)
+        scope_combo.currentIndexChanged.connect(log.load)
+        range_combo.currentIndexChanged.connect(log.load)
+        clear_btn.clicked.connect(lambda: self._clear_log(log))
+        export_btn.clicked.connect(lambda: self._export_csv(log))
+
+    def _log_range(self, log):
+        """(start, end) epoch seconds of the chosen "From" range; None = open."""
+        back = self.LOG_RANGES[log.range_combo.currentIndex()][1]
+        if back is None:
+            return None, None
+        if not isinstance(back, tuple):
+            return time.time() - back, None
+        first, last = back
+        midnight = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        end = (midnight - timedelta(days=last - 1)).timestamp() if last else None
+        return (midnight - timedelta(days=first)).timestamp(), end
+
+    def _load_log(self, log):
+        kinds = log.kinds()
+        # Only the newest entries are kept, so memory stays flat however long the logs get.
+        shown = deque(maxlen=self.config["logs"]["view_lines"])
+        total = 0
+        for entry in self.logs.read(kinds, *self._log_range(log)):
+            total += 1
+            outcome = f"{entry.kind:<12}  |  " if len(kinds) > 1 else ""
+            shown.append(f"{entry.time}  |  {outcome}{entry.code}  |  {entry.shard}")
+        if not total:
+            log.text.setPlainText("📭 No entries yet...")
+            return
+        if total > len(shown):
+            shown.appendleft(f"… {total - len(shown)} older entries not shown (use Export for all)")
+        log.text.setPlainText("\n".join(shown))
+        log.text.moveCursor(QTextCursor.End)
 
-    def _clear_log(self, log_file, text_widget):
+    def _clear_log(self, log):
         reply = QMessageBox.question(
             self, "Confirm", "Are you sure you want to clear this log?",
             QMessageBox.Yes | QMessageBox.No
         )
         if reply == QMessageBox.Yes:
-            header = "=== AUTHORIZED LOG START ===" if "Authorized" in log_file else "=== UNAUTHORIZED LOG START ==="
-            with open(log_file, 'w') as f:
-                f.write(header + "\n")
-            self._load_log(log_file, text_widget)
+            self.logs.clear(log.kinds())
+            log.load()
             QMessageBox.information(self, "Done", "Log cleared successfully!")
 
     # ── Shared label helpers ───────────────────────────────────────────────
-    def _add_section_title(self, text, color):
+    def _add_section_title(self, text, role):
         lbl = QLabel(text)
         lbl.setAlignment(Qt.AlignCenter)
-        lbl.setStyleSheet(f"""
-            color: {color};
-            font-family: 'Segoe UI';
-            font-size: 20px;
-            font-weight: bold;
-            padding: 10px;
-        """)
+        lbl.setObjectName("sectionTitle")
+        lbl.setProperty("role", role)
         self.content_layout.addWidget(lbl)
 
     def _add_section_subtitle(self, text):
         lbl = QLabel(text)
         lbl.setAlignment(Qt.AlignCenter)
-        lbl.setStyleSheet(f"""
-            color: {COLORS['text_dim']};
-            font-family: 'Segoe UI';
-            font-size: 11px;
-        """)
+        lbl.setObjectName("sectionSubtitle")
         self.content_layout.addWidget(lbl)
 
     def _show_help(self):
@@ -897,7 +970,7 @@ and maintain detailed logs of all authentication attempts.</p>
 <li><b>Decoding:</b> pyzbar library for QR/barcode detection</li>
 <li><b>Cooldown:</b> 2-second delay prevents duplicate scans</li>
 <li><b>Storage:</b> Plain text files (myDataFile.txt for authorized codes)</li>
-<li><b>Logs:</b> Timestamped entries in Authorized_log.txt and Unauthorized_log.txt</li>
+<li><b>Logs:</b> Timestamped entries per gate and camera in logs/, merged by time in the log views</li>
 <li><b>Audio:</b> Windows beep sounds (1500Hz = authorized, 800Hz = unauthorized)</li>
 </ul>
 
@@ -917,8 +990,8 @@ and maintain detailed logs of all authentication attempts.</p>
 <li><b>styles.py:</b> UI styling and color schemes</li>
 <li><b>utils.py:</b> Camera and image utilities</li>
 <li><b>myDataFile.txt:</b> Authorized codes database</li>
-<li><b>Authorized_log.txt:</b> Successful authentication log</li>
-<li><b>Unauthorized_log.txt:</b> Failed authentication attempts</li>
+<li><b>logs/*.authorized.log:</b> Successful authentications, one file per gate and camera</li>
+<li><b>logs/*.unauthorized.log:</b> Failed authentication attempts</li>
 </ul>
 
 <h3 style='color: #a29bfe; margin: 12px 0 4px 0;'>👨‍💻 Developer Notes</h3>
@@ -935,11 +1008,7 @@ and utilities for easy maintenance and extension.</p>
         dlg.setWindowTitle("Help & Information")
         dlg.resize(550, 600)
         dlg.setMinimumSize(400, 300)
-        dlg.setStyleSheet(f"""
-            QDialog {{
-                background-color: rgba(26, 26, 46, 240);
-            }}
-        """)
+        dlg.setObjectName("helpDialog")
 
         dlg_layout = QVBoxLayout(dlg)
         dlg_layout.setContentsMargins(0, 0, 0, 10)
@@ -948,31 +1017,10 @@ and utilities for easy maintenance and extension.</p>
         scroll = QScrollArea()
         scroll.setWidgetResizable(True)
         scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        scroll.setStyleSheet(f"""
-            QScrollArea {{
-                border: none;
-                background: transparent;
-            }}
-            QScrollBar:vertical {{
-                background: {COLORS['bg_dark']};
-                width: 8px;
-                border-radius: 4px;
-            }}
-            QScrollBar::handle:vertical {{
-                background: {COLORS['border']};
-                border-radius: 4px;
-                min-height: 30px;
-            }}
-            QScrollBar::handle:vertical:hover {{
-                background: {COLORS['accent']};
-            }}
-            QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical {{
-                height: 0px;
-            }}
-        """)
+        scroll.setObjectName("helpScroll")
 
         content_widget = QWidget()
-        content_widget.setStyleSheet("background: transparent;")
+        content_widget.setObjectName("helpContent")
         content_layout = QVBoxLayout(content_widget)
         content_layout.setContentsMargins(24, 16, 24, 16)
         content_layout.setSpacing(0)
@@ -980,12 +1028,7 @@ and utilities for easy maintenance and extension.</p>
         help_label = QLabel(help_text)
         help_label.setTextFormat(Qt.RichText)
         help_label.setWordWrap(True)
-        help_label.setStyleSheet(f"""
-            color: {COLORS['text']};
-            font-family: 'Segoe UI';
-            font-size: 12px;
-            background: transparent;
-        """)
+        help_label.setObjectName("helpText")
         content_layout.addWidget(help_label)
 
         scroll.setWidget(content_widget)
@@ -994,21 +1037,7 @@ and utilities for easy maintenance and extension.</p>
         ok_btn = QPushButton("OK")
         ok_btn.setCursor(Qt.PointingHandCursor)
         ok_btn.setFixedWidth(100)
-        ok_btn.setStyleSheet(f"""
-            QPushButton {{
-                background-color: {COLORS['accent']};
-                color: #ffffff;
-                font-family: 'Segoe UI';
-                font-size: 11px;
-                font-weight: bold;
-                border: none;
-                border-radius: 6px;
-                padding: 8px 20px;
-            }}
-            QPushButton:hover {{
-                background-color: {COLORS['accent_light']};
-            }}
-        """)
+        ok_btn.setObjectName("dialogButton")
         ok_btn.clicked.connect(dlg.accept)
         dlg_layout.addWidget(ok_btn, 0, Qt.AlignRight | Qt.AlignBottom)
         dlg_layout.setContentsMargins(0, 0, 12, 10)
@@ -1022,171 +1051,213 @@ and utilities for easy maintenance and extension.</p>
 
     def _play_beep(self, freq, duration):
         if self.sound_enabled:
+            with self.metrics.stage("audio"):
+                try:
+                    winsound.Beep(freq, duration)
+                except Exception:
+                    pass
+
+    # ── Performance metrics ────────────────────────────────────────────────
+    def _toggle_metrics(self):
+        self.metrics.enabled = not self.metrics.enabled
+        if self.metrics.enabled:
+            self.metrics_timer.start()
+        else:
+            self.metrics_timer.stop()
+        if self.perf_overlay is not None:
+            self.perf_overlay.setVisible(self.metrics.enabled)
+
+    def _refresh_metrics(self):
+        self.metrics.set_counter("decode_errors", sum(d.errors for d in self.decoders.values()))
+        self.metrics.set_counter("decode_rescued", sum(getattr(d, "rescued", 0) for d in self.decoders.values()))
+        self.metrics.set_counter("events_dropped", self.events.dropped)
+        if self.perf_overlay is not None and self.perf_overlay.isVisible():
+            self.perf_overlay.setText(self.metrics.overlay_text())
+            self.perf_overlay.adjustSize()
+        self._metrics_ticks += 1
+        if self.metrics_file and self._metrics_ticks % 20 == 0:
             try:
-                winsound.Beep(freq, duration)
-            except Exception:
+                self.metrics.dump(self.metrics_file)
+            except OSError:
                 pass
 
+    # ── Diagnostics ───────────────────────────────────────────────────────
+    def _toggle_diagnostics(self):
+        on = self.diagnostics.toggle()
+        self._diagnostics_notice(f"Diagnostics {'on' if on else 'off'}: {self.diagnostics.directory}")
+
+    def _toggle_profiling(self):
+        if not self.diagnostics.enabled:
+            self.diagnostics.start()
+        on = self.diagnostics.toggle_profiling()
+        self._diagnostics_notice(f"Scan-loop profiling {'started' if on else 'saved'}")
+
+    def _dump_diagnostics(self):
+        try:
+            path = self.diagnostics.report()
+        except OSError as e:
+            QMessageBox.warning(self, "Diagnostics", f"Could not write report: {e}")
+            return
+        self._diagnostics_notice(f"Diagnostics written to {path}")
+
+    def _diagnostics_notice(self, text):
+        # The status bar only appears while a message is showing.
+        bar = self.statusBar()
+        if not getattr(self, "_notice_hooked", False):
+            bar.messageChanged.connect(lambda message: bar.setVisible(bool(message)))
+            self._notice_hooked = True
+        bar.showMessage(text, 5000)
+        bar.setVisible(True)
+
     def _capture_snapshot(self):
         if not self.cap or not self.camera_running:
             QMessageBox.warning(self, "No Camera", "Camera is not active.")
             return
-        ret, frame = self.cap.read()
-        if not ret:
-            QMessageBox.warning(self, "Error", "Failed to capture frame.")
+        if self._shown_frame is None:
+            QMessageBox.warning(self, "Error", "No frame shown yet.")
             return
+        # The frame on screen, taken before the dialog so it cannot move on.
+        # It is read-only, so holding on to it needs no copy.
+        frame = self._shown_frame
         filename, _ = QFileDialog.getSaveFileName(
             self, "Save Snapshot", f"snapshot_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png",
             "PNG files (*.png);;JPEG files (*.jpg);;All files (*.*)"
         )
-        if filename:
-            cv2.imwrite(filename, frame)
-            QMessageBox.information(self, "Saved", "Snapshot saved!")
+        if not filename:
+            return
+        try:
+            if self.snapshots is not None:
+                self.snapshots.save(frame, filename)
+            elif not cv2.imwrite(filename, frame):
+                raise OSError(f"could not write {filename}")
+        except (OSError, ValueError, cv2.error) as e:
+            QMessageBox.critical(self, "Error", f"Failed to save snapshot: {e}")
+            return
+        QMessageBox.information(self, "Saved", "Snapshot saved!")
 
-    def _export_csv(self, log_file):
+    def _export_csv(self, log):
+        kinds = log.kinds()
+        name = "Authorized_log" if kinds == (AUTHORIZED,) else "Unauthorized_log" if kinds == (UNAUTHORIZED,) else "Access_log"
         filename, _ = QFileDialog.getSaveFileName(
-            self, "Export to CSV", f"{os.path.splitext(log_file)[0]}.csv",
-            "CSV files (*.csv);;All files (*.*)"
+            self, "Export Log", f"{name}.csv",
+            "CSV files (*.csv);;Compressed CSV (*.csv.gz);;Parquet (*.parquet);;Feather (*.feather);;All files (*.*)"
         )
         if not filename:
             return
         try:
-            with open(log_file, 'r') as f:
-                lines = f.read().strip().splitlines()
-            with open(filename, 'w', newline='') as csvfile:
-                writer = csv.writer(csvfile)
-                writer.writerow(["Timestamp", "Data"])
-                for line in lines:
-                    if '|' in line:
-                        parts = line.split('|', 1)
-                        writer.writerow([p.strip() for p in parts])
-            QMessageBox.information(self, "Exported", "Log exported to CSV!")
+            rows, path, fmt = export_logs(self.logs, filename, kinds, *self._log_range(log))
+            note = "" if path == filename else "\n(pyarrow is not installed, so it was saved as gzip CSV)"
+            QMessageBox.information(self, "Exported", f"{rows} entries exported to {os.path.basename(path)}{note}")
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to export: {e}")
 
-    def _toggle_auto_refresh(self, log_file):
+    def _toggle_auto_refresh(self):
         if self.log_refresh_timer.isActive():
             self.log_refresh_timer.stop()
-            self.auto_refresh_btn.setText("\u23f0 Auto-Refresh: OFF")
-            self.auto_refresh_btn.setStyleSheet(f"""
-                QPushButton {{
-                    background-color: {COLORS['border']};
-                    color: #ffffff; font-family: 'Segoe UI'; font-size: 10px;
-                    font-weight: bold; border: none; border-radius: 6px;
-                    padding: 5px 15px;
-                }}
-            """)
         else:
-            self.log_refresh_timer.timeout.connect(
-                lambda: self._load_log(self._current_log_file, self._current_log_widget)
-            )
             self.log_refresh_timer.start()
+        self._set_auto_refresh_btn(self.log_refresh_timer.isActive())
+
+    def _set_auto_refresh_btn(self, on):
+        if not on:
+            self.auto_refresh_btn.setText("\u23f0 Auto-Refresh: OFF")
+            set_state(self.auto_refresh_btn, "role", "border")
+        else:
             self.auto_refresh_btn.setText("\u23f0 Auto-Refresh: ON")
-            self.auto_refresh_btn.setStyleSheet(f"""
-                QPushButton {{
-                    background-color: {COLORS['success']};
-                    color: #ffffff; font-family: 'Segoe UI'; font-size: 10px;
-                    font-weight: bold; border: none; border-radius: 6px;
-                    padding: 5px 15px;
-                }}
-            """)
+            set_state(self.auto_refresh_btn, "role", "success")
 
     # ── Manage Authorized Codes ───────────────────────────────────────────
     def _show_manage_codes(self):
         """Show manage authorized codes view with list and delete."""
-        self._clear_content()
-        self.current_mode = None
+        self._activate_view('manage', self._build_manage_codes)
+        self._refresh_codes_list()
 
-        self._add_section_title("\ud83d\udcc2 Manage Authorized Codes", COLORS['accent_light'])
+    def _build_manage_codes(self):
+        self._add_section_title("\ud83d\udcc2 Manage Authorized Codes", 'accent_light')
         self._add_section_subtitle("View, delete, or bulk import authorized codes")
         btn_row = QWidget()
-        btn_row.setStyleSheet("background: transparent;")
+        btn_row.setObjectName("buttonRow")
         br_layout = QHBoxLayout(btn_row)
         br_layout.setContentsMargins(0, 0, 0, 0)
         br_layout.setSpacing(10)
 
-        import_btn = make_button("\ud83d\udcf1 Import from File", COLORS['accent'], font_size=10, padx=15, pady=6)
+        import_btn = make_button("\ud83d\udcf1 Import from File", size='small')
         import_btn.clicked.connect(self._import_codes)
         br_layout.addWidget(import_btn)
 
-        refresh_btn = make_button("\ud83d\udd04 Refresh", COLORS['success'], font_size=10, padx=15, pady=6)
-        refresh_btn.clicked.connect(self._show_manage_codes)
+        refresh_btn = make_button("\ud83d\udd04 Refresh", 'success', size='small')
+        refresh_btn.clicked.connect(self._refresh_codes_list)
         br_layout.addWidget(refresh_btn)
 
         br_layout.addStretch()
         self.content_layout.addWidget(btn_row)
-        try:
-            with open(self.authorized_file, 'r') as f:
-                codes = [c.strip() for c in f.read().splitlines() if c.strip()]
-        except FileNotFoundError:
-            codes = []
+
+        self.codes_container = QWidget()
+        self.codes_container.setObjectName("buttonRow")
+        self.codes_layout = QVBoxLayout(self.codes_container)
+        self.codes_layout.setContentsMargins(0, 0, 0, 0)
+        self.codes_layout.setSpacing(10)
+        self.content_layout.addWidget(self.codes_container)
+        self.content_layout.addStretch()
+
+    def _refresh_codes_list(self):
+        """Rebuild only the rows of the manage view from the authorized file."""
+        while self.codes_layout.count():
+            w = self.codes_layout.takeAt(0).widget()
+            if w:
+                w.deleteLater()
+        codes = read_entries(self.authorized_file)
 
         if not codes:
             empty = QLabel("\ud83d\udced No authorized codes yet.")
             empty.setAlignment(Qt.AlignCenter)
-            empty.setStyleSheet(f"""
-                color: {COLORS['text_dim']};
-                font-family: 'Segoe UI';
-                font-size: 14px;
-                padding: 40px;
-            """)
-            self.content_layout.addWidget(empty)
+            empty.setObjectName("emptyLabel")
+            self.codes_layout.addWidget(empty)
         else:
             count_lbl = QLabel(f"\ud83d\udcca {len(codes)} authorized code(s)")
-            count_lbl.setStyleSheet(f"""
-                color: {COLORS['text_dim']};
-                font-family: 'Segoe UI';
-                font-size: 11px;
-                padding: 5px 0;
-            """)
-            self.content_layout.addWidget(count_lbl)
-
-            for i, code in enumerate(codes):
+            count_lbl.setObjectName("countLabel")
+            self.codes_layout.addWidget(count_lbl)
+
+            now = time.time()
+            for i, (code, window) in enumerate(codes):
                 row = QFrame()
-                row.setStyleSheet(f"""
-                    QFrame {{
-                        background-color: {COLORS['bg_hover']};
-                        border-radius: 6px;
-                        padding: 4px;
-                    }}
-                """)
+                row.setObjectName("codeRow")
                 rl = QHBoxLayout(row)
                 rl.setContentsMargins(12, 6, 8, 6)
                 rl.setSpacing(10)
 
                 idx_lbl = QLabel(f"{i+1}.")
                 idx_lbl.setFixedWidth(30)
-                idx_lbl.setStyleSheet(f"color: {COLORS['text_dim']}; font-family: 'Consolas'; font-size: 11px; background: transparent;")
+                idx_lbl.setObjectName("codeIndex")
                 rl.addWidget(idx_lbl)
 
                 code_lbl = QLabel(code if len(code) <= 60 else code[:57] + "...")
-                code_lbl.setStyleSheet(f"color: {COLORS['text']}; font-family: 'Consolas'; font-size: 11px; background: transparent;")
+                code_lbl.setObjectName("codeText")
                 code_lbl.setToolTip(code)
                 rl.addWidget(code_lbl, 1)
 
+                if window != ALWAYS:
+                    valid_from, valid_until = window
+                    if now >= valid_until:
+                        text = "expired"
+                    elif now < valid_from:
+                        text = f"from {format_valid_time(valid_from)}"
+                    else:
+                        text = f"until {format_valid_time(valid_until)}"
+                    window_lbl = QLabel(text)
+                    window_lbl.setObjectName("codeIndex")
+                    rl.addWidget(window_lbl)
+
                 del_btn = QPushButton("\u274c")
                 del_btn.setFixedSize(30, 30)
                 del_btn.setCursor(Qt.PointingHandCursor)
                 del_btn.setToolTip("Delete this code")
-                del_btn.setStyleSheet(f"""
-                    QPushButton {{
-                        background-color: transparent;
-                        color: {COLORS['danger']};
-                        font-size: 14px;
-                        border: none;
-                        border-radius: 15px;
-                    }}
-                    QPushButton:hover {{
-                        background-color: {COLORS['danger']};
-                        color: #ffffff;
-                    }}
-                """)
+                del_btn.setObjectName("deleteButton")
                 del_btn.clicked.connect(lambda checked=False, c=code: self._delete_code(c))
                 rl.addWidget(del_btn)
 
-                self.content_layout.addWidget(row)
+                self.codes_layout.addWidget(row)
 
-        self.content_layout.addStretch()
 
     def _delete_code(self, code):
         """Delete a single authorized code."""
@@ -1196,17 +1267,17 @@ and utilities for easy maintenance and extension.</p>
         )
         if reply == QMessageBox.Yes:
             try:
-                with open(self.authorized_file, 'r') as f:
-                    codes = f.read().splitlines()
-                codes = [c for c in codes if c.strip() != code]
-                with open(self.authorized_file, 'w') as f:
-                    f.write('\n'.join(codes) + '\n' if codes else '')
-                self._show_manage_codes()
+                self.auth_index.remove([code])
+                self._refresh_codes_list()
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to delete: {e}")
 
     def _import_codes(self):
-        """Import authorized codes from a text or CSV file."""
+        """Import authorized codes from a text or CSV file.
+
+        Optional second and third columns (tab-separated in text files) are
+        the valid-from and valid-until times, e.g. 2024-05-01 09:00:00.
+        """
         filename, _ = QFileDialog.getOpenFileName(
             self, "Import Codes", "",
             "Text files (*.txt);;CSV files (*.csv);;All files (*.*)"
@@ -1217,38 +1288,88 @@ and utilities for easy maintenance and extension.</p>
             with open(filename, 'r') as f:
                 if filename.endswith('.csv'):
                     reader = csv.reader(f)
-                    new_codes = [row[0].strip() for row in reader if row and row[0].strip()]
+                    rows = ["\t".join(row[:3]) for row in reader if row]
                 else:
-                    new_codes = [line.strip() for line in f if line.strip()]
-
-            # Load existing
-            with open(self.authorized_file, 'r') as f:
-                existing = set(f.read().splitlines())
-
-            added = 0
-            with open(self.authorized_file, 'a') as f:
-                for code in new_codes:
-                    if code not in existing:
-                        f.write(code + '\n')
-                        existing.add(code)
-                        added += 1
+                    rows = list(f)
+            new_codes = []
+            for n, row in enumerate(rows, 1):
+                try:
+                    entry = parse_entry(row, strict=True)
+                except ValueError:
+                    raise ValueError(f"line {n}: bad date in {row.strip()!r}") from None
+                if entry:
+                    new_codes.append(entry)
+
+            added = len(self.auth_index.add_many(new_codes))
             QMessageBox.information(
                 self, "Imported", f"Imported {added} new code(s).\n{len(new_codes) - added} duplicates skipped."
             )
-            self._show_manage_codes()
+            self._refresh_codes_list()
+            self._schedule_purge()
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to import: {e}")
 
+    def changeEvent(self, event):
+        # Don't pull frames for a minimised window; resume where we left off.
+        if event.type() == QEvent.WindowStateChange and self.current_mode in ('add', 'auth', 'scanner'):
+            if self.isMinimized() and self.camera_running:
+                self._stop_camera()
+            elif not self.isMinimized() and not self.camera_running:
+                self._start_camera()
+        super().changeEvent(event)
+
     def closeEvent(self, event):
-        self._stop_camera()
+        self._stop_camera(release=True)
         self.log_refresh_timer.stop()
+        self.metrics_timer.stop()
+        self.purge_timer.stop()
+        if self.diagnostics.enabled:
+            try:
+                self.diagnostics.stop()
+            except OSError:
+                pass
+        for decoder in self.decoders.values():
+            decoder.close()
+        self.auth_index.close()
+        self.logs.close()
+        self.events.close()
+        if self.snapshots is not None:
+            self.snapshots.close()
+        if self.sync_stop is not None:
+            self.sync_stop.set()
+        if self.sync_server is not None:
+            self.sync_server.shutdown()
+        if self.metrics_file:
+            try:
+                self.metrics.dump(self.metrics_file)
+            except OSError:
+                pass
         event.accept()
 
 
 def main():
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="QR & Barcode Authentication System")
+    parser.add_argument("--config", default=CONFIG_FILE, help="JSON settings file (missing keys use defaults)")
+    parser.add_argument("--metrics", action="store_true",
+                        help="Collect scan-loop stage timings and show the FPS/latency overlay (toggle with F3)")
+    parser.add_argument("--metrics-file", default="",
+                        help="Periodically dump metrics here (.prom for Prometheus text, otherwise JSON)")
+    parser.add_argument("--metrics-port", type=int, default=0,
+                        help="Serve Prometheus metrics on http://127.0.0.1:PORT/metrics")
+    parser.add_argument("--diagnostics", action="store_true",
+                        help="Start in diagnostics mode: tracemalloc snapshots, QObject counts, "
+                             "Ctrl+Shift+P profiles the scan loop (see diagnostics.py)")
+    args, qt_args = parser.parse_known_args()
+
+    app = QApplication(sys.argv[:1] + qt_args)
     app.setStyleSheet(GLOBAL_STYLESHEET)
-    window = QRAuthApp()
+    metrics = Metrics(enabled=args.metrics or bool(args.metrics_file) or bool(args.metrics_port))
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+    config = load_config(args.config)
+    if args.diagnostics:
+        config["diagnostics"]["enabled"] = True
+    window = QRAuthApp(config=config, metrics=metrics, metrics_file=args.metrics_file)
     window.show()
     sys.exit(app.exec())
 
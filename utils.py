@@ -1,22 +1,56 @@
 import cv2
 import numpy as np
+import qrcode
+import barcode
+from barcode.writer import ImageWriter
 from PIL import Image
-from pyzbar.pyzbar import decode
 from PySide6.QtGui import QImage, QPixmap
 
-def decode_codes_silent(frame):
-    try:
-        return decode(frame)
-    except Exception:
-        return []
+from decoders import make_decoder
 
-def init_camera(camera_id=0, width=640, height=480):
+_default_decoder = None
+
+def get_default_decoder():
+    global _default_decoder
+    if _default_decoder is None:
+        _default_decoder = make_decoder()
+    return _default_decoder
+
+def set_default_decoder(decoder):
+    global _default_decoder
+    _default_decoder = decoder
+
+def decode_codes_silent(frame, decoder=None):
+    return (decoder or get_default_decoder()).decode(frame)
+
+# Capture settings applied by `init_camera`. Drivers default to several
+# queued frames of uncompressed YUYV at whatever rate they like, which shows
+# up as 100-200 ms of stale frames; MJPEG with a one-frame buffer avoids it.
+# Settings a device does not support are ignored by OpenCV.
+CAMERA_PROFILES = {
+    'default': {},
+    'low_latency': {'fourcc': 'MJPG', 'fps': 30, 'buffersize': 1},
+    'quality': {'fourcc': 'YUYV', 'fps': 15, 'buffersize': 1},
+}
+
+def init_camera(camera_id=0, width=640, height=480, profile=None):
+    """Open a camera; `profile` is a CAMERA_PROFILES name or a dict of the same keys."""
+    settings = CAMERA_PROFILES[profile] if isinstance(profile, str) else (profile or {})
     cap = cv2.VideoCapture(camera_id)
-    cap.set(3, width)
-    cap.set(4, height)
+    # FOURCC must be set before the size for V4L2 to pick a matching mode.
+    if settings.get('fourcc'):
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*settings['fourcc']))
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    if settings.get('fps'):
+        cap.set(cv2.CAP_PROP_FPS, settings['fps'])
+    if settings.get('buffersize'):
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, settings['buffersize'])
     return cap
 
 def convert_1bit_to_rgb(img):
+    if hasattr(img, "get_image"):
+        img = img.get_image()
     pil_img = Image.new("RGB", img.size, (255, 255, 255))
     pil_img.paste(img, (0, 0))
     return pil_img
@@ -26,3 +60,28 @@ def pil_to_qpixmap(pil_img, width, height):
     data = preview.tobytes("raw", "RGB")
     qimg = QImage(data, width, height, width * 3, QImage.Format_RGB888)
     return QPixmap.fromImage(qimg)
+
+def make_qr_image(content, box_size=10, border=4):
+    qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=box_size, border=border)
+    qr.add_data(content)
+    qr.make(fit=True)
+    qr_img = qr.make_image(fill_color="black", back_color="white")
+    return convert_1bit_to_rgb(qr_img)
+
+def make_barcode_image(fmt, data):
+    bc_class = barcode.get_barcode_class(fmt)
+    bc_instance = bc_class(data, writer=ImageWriter())
+    src_img = bc_instance.render({
+        "write_text": True,
+        "module_width": 0.4,
+        "module_height": 15.0,
+        "font_size": 10,
+        "text_distance": 5,
+        "quiet_zone": 6.5,
+    })
+    pil_img = Image.new("RGB", src_img.size, (255, 255, 255))
+    if src_img.mode == 'RGBA':
+        pil_img.paste(src_img, (0, 0), src_img)
+    else:
+        pil_img.paste(src_img, (0, 0))
+    return pil_img